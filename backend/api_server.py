@@ -5,16 +5,33 @@ REST API + WebSocket for real-time trading bot platform
 
 from flask import Flask, jsonify, request
 from flask_cors import CORS
-from flask_socketio import SocketIO, emit, join_room, leave_room
-from flask_jwt_extended import JWTManager, jwt_required, get_jwt_identity
+from flask_socketio import emit, join_room, leave_room
+from flask_jwt_extended import JWTManager, jwt_required, get_jwt_identity, decode_token
 import os
+import re
+import hmac
 import logging
 from datetime import timedelta
+from pathlib import Path
 
 # Import services
 from services.auth_service import AuthService
 from services.payment_service import PaymentService
+from services.user_cache import UserCache
+from services.session_cache import SessionValidator
+from services.password_hasher import PasswordHasher
+from services.socket_relay import SocketRelay
+from services.socket_backplane import create_socketio
+from services.event_bridge import EventReceiver
+from services.platform_stats import PlatformStats
+from services.notification_fanout import NotificationFanout, TelegramClient, SmtpClient
 from database.db_manager import DatabaseManager
+from engines.multi_tenant_engine import STRATEGY_CLASSES
+from models import entitlements
+from utils.event_bus import EventBus, TRADE_UPDATE, POSITION_UPDATE, TRADING_TOGGLED
+from utils.response_cache import ResponseCache
+from utils import metrics
+from utils.helpers import load_config
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -22,21 +39,150 @@ app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-change-this'
 app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key-change-this')
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
 app.config['JWT_REFRESH_TOKEN_EXPIRES'] = timedelta(days=30)
+# Identities are integer user ids; newer flask-jwt-extended/PyJWT reject non-string subjects
+app.config['JWT_VERIFY_SUB'] = False
 
 # Initialize extensions
 CORS(app)
-socketio = SocketIO(app, cors_allowed_origins="*")
+# Run several API processes behind a sticky load balancer and point them at the
+# same SOCKETIO_MESSAGE_QUEUE (redis://... or local://host:port) to share rooms
+socketio = create_socketio(
+    app,
+    message_queue=os.getenv('SOCKETIO_MESSAGE_QUEUE'),
+    cors_allowed_origins="*"
+)
 jwt = JWTManager(app)
 
+# Platform events raised by this process
+event_bus = EventBus()
+
+# Trading engine events forwarded from the bot process (every worker gets each one)
+engine_events = EventBus()
+event_receiver = EventReceiver(
+    os.getenv('ENGINE_EVENTS_URL') or os.getenv('SOCKETIO_MESSAGE_QUEUE'),
+    engine_events
+)
+event_receiver.start()
+
 # Initialize services
-db_manager = DatabaseManager({'database': {'type': 'sqlite', 'sqlite_path': 'data/production.db'}})
-auth_service = AuthService(db_manager)
-payment_service = PaymentService(os.getenv('STRIPE_SECRET_KEY'), db_manager)
+db_manager = DatabaseManager({'database': {'type': 'sqlite', 'sqlite_path': os.getenv('DATABASE_PATH', 'data/production.db')}})
+user_cache = UserCache(
+    db_manager,
+    max_size=int(os.getenv('USER_CACHE_SIZE', 10000)),
+    ttl=int(os.getenv('USER_CACHE_TTL', 60)),
+    redis_url=os.getenv('REDIS_URL')
+)
+session_validator = SessionValidator(
+    db_manager,
+    ttl=int(os.getenv('SESSION_CACHE_TTL', 30)),
+    redis_url=os.getenv('REDIS_URL')
+)
+password_hasher = PasswordHasher.from_env()
+auth_service = AuthService(
+    db_manager,
+    user_cache=user_cache,
+    session_validator=session_validator,
+    password_hasher=password_hasher,
+    event_bus=event_bus
+)
+payment_service = PaymentService(
+    os.getenv('STRIPE_SECRET_KEY'),
+    db_manager,
+    user_cache=user_cache,
+    event_bus=event_bus
+)
+platform_stats = PlatformStats(
+    db_manager,
+    event_bus=event_bus,
+    engine_events=engine_events,
+    reconcile_interval=int(os.getenv('PLATFORM_STATS_RECONCILE_SECONDS', 300))
+)
+platform_stats.start()
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Strategies and pairs users may select: those the trading engine's config enables,
+# or (without a readable config) every strategy and any BASE/QUOTE symbol
+selectable_strategies = set(STRATEGY_CLASSES)
+selectable_pairs = None
+trading_config_path = Path(os.getenv('TRADING_CONFIG_PATH', Path(__file__).parent.parent / 'config.yaml'))
+if trading_config_path.exists():
+    trading_config = load_config(trading_config_path)
+    selectable_strategies &= {
+        strategy['name'] for strategy in trading_config['strategies'] if strategy.get('enabled', False)
+    }
+    selectable_pairs = {
+        pair for market in trading_config['markets'].values() if market.get('enabled', False)
+        for pair in market.get('pairs', [])
+    }
+PAIR_PATTERN = re.compile(r'^[A-Z0-9]{2,10}/[A-Z0-9]{2,10}$')
+
+# Trading events relayed to dashboards over Socket.IO. Engine events reach
+# every worker, so each worker emits them to its own clients only.
+socket_max_rate = float(os.getenv('SOCKET_MAX_EMIT_RATE', 4))
+socket_relay = SocketRelay(socketio, event_bus, max_rate=socket_max_rate)
+socket_relay.start()
+engine_relay = SocketRelay(socketio, engine_events, max_rate=socket_max_rate, local_only=True)
+engine_relay.start()
+
+# Per-user trade alerts (Telegram for entitled tiers, email for opted-in users) for
+# engine trades; with several workers, REDIS_URL makes only one send each alert
+telegram_client = None
+if os.getenv('TELEGRAM_BOT_TOKEN'):
+    telegram_client = TelegramClient(
+        os.getenv('TELEGRAM_BOT_TOKEN'),
+        base_url=os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org')
+    )
+smtp_client = None
+if os.getenv('SMTP_HOST'):
+    smtp_client = SmtpClient(
+        os.getenv('SMTP_HOST'),
+        port=int(os.getenv('SMTP_PORT', 587)),
+        username=os.getenv('SMTP_USERNAME'),
+        password=os.getenv('SMTP_PASSWORD'),
+        sender=os.getenv('SMTP_FROM_EMAIL'),
+        use_tls=os.getenv('SMTP_USE_TLS', 'True') == 'True'
+    )
+notification_fanout = None
+if telegram_client or smtp_client:
+    notification_fanout = NotificationFanout(
+        engine_events,
+        user_cache.get_user,
+        telegram=telegram_client,
+        smtp=smtp_client,
+        global_rate=float(os.getenv('TELEGRAM_GLOBAL_RATE', 30)),
+        workers=int(os.getenv('NOTIFICATION_WORKERS', 8)),
+        redis_client=user_cache.redis
+    )
+    notification_fanout.start()
+
+# Cached JSON for polled read endpoints; trade events invalidate it. Without the
+# event bridge engine trades can't invalidate, so entries expire quickly instead.
+response_cache = ResponseCache(
+    max_size=int(os.getenv('RESPONSE_CACHE_SIZE', 10000)),
+    ttl=int(os.getenv('RESPONSE_CACHE_TTL', 60 if event_receiver.enabled else 5)),
+    event_bus=event_bus,
+    engine_events=engine_events
+)
+
+# Operational metrics served at /metrics (queue depths are read at scrape time)
+SOCKET_CLIENTS = metrics.gauge('tradingbot_socket_clients', 'Connected Socket.IO clients')
+QUEUE_DEPTH = metrics.gauge('tradingbot_queue_depth', 'Items waiting in internal queues', ['queue'])
+QUEUE_DEPTH.labels('socket_relay_rooms').set_function(lambda: socket_relay.pending() + engine_relay.pending())
+if notification_fanout:
+    QUEUE_DEPTH.labels('notifications').set_function(notification_fanout.outbox.qsize)
+
+
+@jwt.token_in_blocklist_loader
+def check_session_revoked(jwt_header, jwt_payload):
+    """Reject access tokens whose session was logged out or revoked"""
+    if jwt_payload.get('type') != 'access':
+        return False
+    token = request.headers.get('Authorization', '').replace('Bearer ', '')
+    return not auth_service.verify_session(token)
+
 
 # ==================== AUTH ENDPOINTS ====================
 
@@ -50,6 +196,8 @@ def register():
         password=data.get('password'),
         full_name=data.get('full_name')
     )
+    if result.get('busy'):
+        return jsonify(result), 503
     return jsonify(result), 201 if result['success'] else 400
 
 
@@ -63,6 +211,8 @@ def login():
         ip_address=request.remote_addr,
         user_agent=request.headers.get('User-Agent')
     )
+    if result.get('busy'):
+        return jsonify(result), 503
     return jsonify(result), 200 if result['success'] else 401
 
 
@@ -71,7 +221,11 @@ def login():
 def refresh():
     """Refresh access token"""
     user_id = get_jwt_identity()
-    result = auth_service.refresh_token(user_id)
+    result = auth_service.refresh_token(
+        user_id,
+        ip_address=request.remote_addr,
+        user_agent=request.headers.get('User-Agent')
+    )
     return jsonify(result)
 
 
@@ -95,6 +249,8 @@ def change_password():
         old_password=data.get('old_password'),
         new_password=data.get('new_password')
     )
+    if result.get('busy'):
+        return jsonify(result), 503
     return jsonify(result)
 
 
@@ -105,7 +261,7 @@ def change_password():
 def get_profile():
     """Get user profile"""
     user_id = get_jwt_identity()
-    user = db_manager.get_user_by_id(user_id)
+    user = user_cache.get_user(user_id)
     
     if not user:
         return jsonify({'error': 'User not found'}), 404
@@ -120,7 +276,7 @@ def update_profile():
     user_id = get_jwt_identity()
     data = request.json
     
-    user = db_manager.get_user_by_id(user_id)
+    user = user_cache.get_user(user_id)
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
@@ -129,10 +285,14 @@ def update_profile():
         user.full_name = data['full_name']
     if 'phone' in data:
         user.phone = data['phone']
-  if 'country' in data:
+    if 'country' in data:
         user.country = data['country']
+    if 'telegram_chat_id' in data:
+        user.telegram_chat_id = str(data['telegram_chat_id']) if data['telegram_chat_id'] else None
+    if 'email_alerts' in data:
+        user.email_alerts = bool(data['email_alerts'])
     
-    db_manager.update_user(user)
+    user_cache.update_user(user)
     
     return jsonify({'success': True, 'user': user.to_dict()})
 
@@ -142,14 +302,16 @@ def update_profile():
 def get_trading_settings():
     """Get user trading settings"""
     user_id = get_jwt_identity()
-    user = db_manager.get_user_by_id(user_id)
+    user = user_cache.get_user(user_id)
     
     return jsonify({
         'auto_trading_enabled': user.auto_trading_enabled,
         'max_position_size': user.max_position_size,
         'max_positions': user.max_positions,
         'daily_loss_limit': user.daily_loss_limit,
-        'paper_balance': user.paper_balance
+        'paper_balance': user.paper_balance,
+        'enabled_strategies': user.enabled_strategies.split(',') if user.enabled_strategies else [],
+        'trading_pairs': user.trading_pairs.split(',') if user.trading_pairs else []
     })
 
 
@@ -160,7 +322,8 @@ def update_trading_settings():
     user_id = get_jwt_identity()
     data = request.json
     
-    user = db_manager.get_user_by_id(user_id)
+    user = user_cache.get_user(user_id)
+    was_enabled = user.auto_trading_enabled
     
     if 'auto_trading_enabled' in data:
         user.auto_trading_enabled = data['auto_trading_enabled']
@@ -170,12 +333,50 @@ def update_trading_settings():
         user.max_positions = int(data['max_positions'])
     if 'daily_loss_limit' in data:
         user.daily_loss_limit = float(data['daily_loss_limit'])
-    
-    db_manager.update_user(user)
+    if 'enabled_strategies' in data:
+        strategies, error = _parse_selection(
+            data['enabled_strategies'], selectable_strategies.__contains__,
+            entitlements.effective_limits(user)['max_strategies'], 'strategies'
+        )
+        if error:
+            return jsonify({'error': error}), 400
+        user.enabled_strategies = ','.join(strategies)
+    if 'trading_pairs' in data:
+        pairs, error = _parse_selection(
+            data['trading_pairs'],
+            selectable_pairs.__contains__ if selectable_pairs is not None else PAIR_PATTERN.match,
+            entitlements.max_pairs(user), 'pairs'
+        )
+        if error:
+            return jsonify({'error': error}), 400
+        user.trading_pairs = ','.join(pairs)
+    
+    user_cache.update_user(user)
+    if bool(user.auto_trading_enabled) != bool(was_enabled):
+        event_bus.publish(TRADING_TOGGLED, {'user_id': user_id, 'enabled': bool(user.auto_trading_enabled)})
     
     return jsonify({'success': True})
 
 
+def _parse_selection(value, is_known, limit, label):
+    """
+    Validate a list setting such as enabled strategies
+    
+    Returns:
+        tuple: (names without duplicates, None) or (None, error message)
+    """
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        return None, f"{label.capitalize()} must be a list of names"
+    
+    names = list(dict.fromkeys(item.strip() for item in value if item.strip()))
+    unknown = [name for name in names if not is_known(name)]
+    if unknown:
+        return None, f"Unknown {label}: {', '.join(unknown)}"
+    if limit != entitlements.UNLIMITED and len(names) > limit:
+        return None, f"Your plan allows up to {limit} {label}"
+    return names, None
+
+
 # ==================== PAYMENT ENDPOINTS ====================
 
 @app.route('/api/payment/create-customer', methods=['POST'])
@@ -185,7 +386,7 @@ def create_customer():
     user_id = get_jwt_identity()
     data = request.json
     
-    user = db_manager.get_user_by_id(user_id)
+    user = user_cache.get_user(user_id)
     result = payment_service.create_customer(
         user_id=user_id,
         email=user.email,
@@ -247,14 +448,16 @@ def payment_webhook():
 def start_trading():
     """Start auto trading for user"""
     user_id = get_jwt_identity()
-    user = db_manager.get_user_by_id(user_id)
+    user = user_cache.get_user(user_id)
     
-    limits = user.get_subscription_limits()
-    if not limits['real_trading']:
+    if not entitlements.can_trade(user):
         return jsonify({'error': 'Upgrade to Pro to enable auto trading'}), 403
     
+    was_enabled = user.auto_trading_enabled
     user.auto_trading_enabled = True
-    db_manager.update_user(user)
+    user_cache.update_user(user)
+    if not was_enabled:
+        event_bus.publish(TRADING_TOGGLED, {'user_id': user_id, 'enabled': True})
     
     # Notify via WebSocket
     socketio.emit('trading_started', {'user_id': user_id}, room=f'user_{user_id}')
@@ -267,10 +470,13 @@ def start_trading():
 def stop_trading():
     """Stop auto trading"""
     user_id = get_jwt_identity()
-    user = db_manager.get_user_by_id(user_id)
+    user = user_cache.get_user(user_id)
     
+    was_enabled = user.auto_trading_enabled
     user.auto_trading_enabled = False
-    db_manager.update_user(user)
+    user_cache.update_user(user)
+    if was_enabled:
+        event_bus.publish(TRADING_TOGGLED, {'user_id': user_id, 'enabled': False})
     
     socketio.emit('trading_stopped', {'user_id': user_id}, room=f'user_{user_id}')
     
@@ -282,29 +488,31 @@ def stop_trading():
 def get_positions():
     """Get user's trading positions"""
     user_id = get_jwt_identity()
-    positions = db_manager.get_user_positions(user_id)
+    positions = db_manager.get_open_positions(user_id=user_id)
     
-    return jsonify({'positions': [p.to_dict() for p in positions]})
+    return jsonify({'positions': positions})
 
 
 @app.route('/api/trading/history', methods=['GET'])
 @jwt_required()
+@response_cache.cached(user_key=get_jwt_identity)
 def get_trade_history():
     """Get trade history"""
     user_id = get_jwt_identity()
     limit = request.args.get('limit', 100, type=int)
     
-    trades = db_manager.get_user_trade_history(user_id, limit=limit)
+    trades = db_manager.get_trade_history(limit=limit, user_id=user_id)
     
-    return jsonify({'trades': [t.to_dict() for t in trades]})
+    return jsonify({'trades': trades})
 
 
 @app.route('/api/trading/performance', methods=['GET'])
 @jwt_required()
+@response_cache.cached(user_key=get_jwt_identity)
 def get_performance():
     """Get trading performance metrics"""
     user_id = get_jwt_identity()
-    stats = db_manager.get_user_performance_stats(user_id)
+    stats = db_manager.get_performance_stats(user_id=user_id)
     
     return jsonify(stats)
 
@@ -316,34 +524,27 @@ def get_performance():
 def admin_get_users():
     """Get all users (admin only)"""
     user_id = get_jwt_identity()
-    user = db_manager.get_user_by_id(user_id)
+    user = user_cache.get_user(user_id)
     
     if not user.is_admin:
         return jsonify({'error': 'Unauthorized'}), 403
     
     users = db_manager.get_all_users()
-    return jsonify({'users': [u.to_dict() for u in users]})
+    return jsonify({'users': entitlements.serialize_users(users)})
 
 
 @app.route('/api/admin/stats', methods=['GET'])
 @jwt_required()
+@response_cache.cached(user_key=get_jwt_identity, invalidate_on='any')
 def admin_stats():
     """Get platform statistics (admin only)"""
     user_id = get_jwt_identity()
-    user = db_manager.get_user_by_id(user_id)
+    user = user_cache.get_user(user_id)
     
     if not user.is_admin:
         return jsonify({'error': 'Unauthorized'}), 403
     
-    stats = {
-        'total_users': db_manager.get_total_users(),
-        'active_traders': db_manager.get_active_traders_count(),
-        'total_trades_today': db_manager.get_trades_count_today(),
-        'total_revenue': db_manager.get_total_revenue(),
-        'subscription_breakdown': db_manager.get_subscription_breakdown()
-    }
-    
-    return jsonify(stats)
+    return jsonify(platform_stats.snapshot())
 
 
 # ==================== WEBSOCKET EVENTS ====================
@@ -352,6 +553,7 @@ def admin_stats():
 def handle_connect():
     """Handle WebSocket connection"""
     logger.info(f"Client connected: {request.sid}")
+    SOCKET_CLIENTS.inc()
     emit('connected', {'message': 'Connected to trading bot server'})
 
 
@@ -359,12 +561,32 @@ def handle_connect():
 def handle_disconnect():
     """Handle WebSocket disconnection"""
     logger.info(f"Client disconnected: {request.sid}")
+    SOCKET_CLIENTS.dec()
+
+
+def _socket_identity(data):
+    """User id of the access token sent with a socket event, or None if it is not valid"""
+    token = (data or {}).get('token')
+    if not token:
+        return None
+    try:
+        claims = decode_token(token)
+    except Exception:
+        return None
+    if claims.get('type') != 'access' or not auth_service.verify_session(token):
+        return None
+    return claims.get('sub')
 
 
 @socketio.on('join_user_room')
 def handle_join_user_room(data):
-    """Join user-specific room for real-time updates"""
-    user_id = data.get('user_id')
+    """Join the caller's own room for real-time updates (the access token decides which)"""
+    user_id = _socket_identity(data)
+    requested = (data or {}).get('user_id', user_id)
+    if user_id is None or str(requested) != str(user_id):
+        emit('join_error', {'message': 'Unauthorized'})
+        return
+    
     room = f'user_{user_id}'
     join_room(room)
     emit('joined_room', {'room': room})
@@ -378,15 +600,15 @@ def handle_leave_user_room(data):
     leave_room(room)
 
 
-# Helper function to emit trade updates
+# Helper function to emit trade updates (coalesced by the socket relay)
 def emit_trade_update(user_id, trade_data):
     """Emit trade update to user's room"""
-    socketio.emit('trade_update', trade_data, room=f'user_{user_id}')
+    event_bus.publish(TRADE_UPDATE, dict(trade_data, user_id=user_id))
 
 
 def emit_position_update(user_id, position_data):
     """Emit position update"""
-    socketio.emit('position_update', position_data, room=f'user_{user_id}')
+    event_bus.publish(POSITION_UPDATE, dict(position_data, user_id=user_id))
 
 
 # ==================== HEALTH CHECK ====================
@@ -401,6 +623,18 @@ def health_check():
     })
 
 
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus text-format metrics (needs `Authorization: Bearer $METRICS_TOKEN`; off without one)"""
+    token = os.getenv('METRICS_TOKEN')
+    if not token:
+        return jsonify({'error': 'Not found'}), 404
+    supplied = request.headers.get('Authorization', '').encode()
+    if not hmac.compare_digest(supplied, f'Bearer {token}'.encode()):
+        return jsonify({'error': 'Unauthorized'}), 401
+    return metrics.metrics_response()
+
+
 @app.route('/')
 def index():
     """API root"""
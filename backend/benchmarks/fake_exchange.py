@@ -0,0 +1,213 @@
+"""
+Fake Exchange
+In-process stand-in for a ccxt async exchange with injected latency and failures
+
+Also a load test for OrderPipeline:
+    python -m benchmarks.fake_exchange --orders 2000 --timeout-rate 0.05 --error-rate 0.05
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engines.order_pipeline import (
+    OrderPipeline, ExchangeError, NetworkError, InsufficientFunds, DuplicateOrderId, OrderNotFound, TERMINAL_STATES
+)
+from utils.latency import LatencyHistogram
+
+
+class FakeExchange:
+    """
+    Accepts orders like a ccxt async exchange
+
+    Failure injection:
+        error_rate: request fails with NetworkError before reaching the book
+        timeout_rate: order is placed but the reply is lost (NetworkError)
+        reject_rate: order is rejected (InsufficientFunds)
+    Orders fill in `fill_steps` partial fills spaced `fill_delay` seconds apart.
+    Client order ids are unique, as on real exchanges.
+    """
+
+    def __init__(self, latency=(0.005, 0.03), error_rate=0.0, timeout_rate=0.0, reject_rate=0.0,
+                 fill_delay=0.05, fill_steps=2, batch=True, max_batch=10, seed=3):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.reject_rate = reject_rate
+        self.fill_delay = fill_delay
+        self.fill_steps = fill_steps
+        self.max_batch = max_batch
+        self.rng = random.Random(seed)
+        self.has = {'createOrders': batch, 'fetchOpenOrders': True}
+
+        self.book = {}            # exchange id -> order
+        self.by_client_id = {}    # client order id -> exchange id
+        self._ids = itertools.count(1)
+        self.calls = {}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def _round_trip(self, method):
+        self.calls[method] = self.calls.get(method, 0) + 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.rng.uniform(*self.latency))
+        finally:
+            self.in_flight -= 1
+
+    def _structure(self, order):
+        now = time.monotonic()
+        steps = min(self.fill_steps, int((now - order['created']) / self.fill_delay)) if self.fill_delay else self.fill_steps
+        if order['status'] == 'open':
+            order['filled'] = order['amount'] * steps / self.fill_steps
+            if steps >= self.fill_steps:
+                order['status'] = 'closed'
+        return dict(order, average=order['price'] if order['filled'] else None)
+
+    def _place(self, symbol, type, side, amount, price, params):
+        client_id = params.get('clientOrderId')
+        if client_id in self.by_client_id:
+            raise DuplicateOrderId(f'duplicate clientOrderId {client_id}')
+        if self.rng.random() < self.reject_rate:
+            raise InsufficientFunds('insufficient balance')
+
+        order = {
+            'id': str(next(self._ids)), 'clientOrderId': client_id, 'symbol': symbol, 'type': type,
+            'side': side, 'amount': amount, 'price': price or 100.0, 'filled': 0.0,
+            'status': 'open', 'created': time.monotonic()
+        }
+        self.book[order['id']] = order
+        self.by_client_id[client_id] = order['id']
+
+        if self.rng.random() < self.timeout_rate:
+            raise NetworkError('request timed out')
+        return self._structure(order)
+
+    async def create_order(self, symbol, type, side, amount, price=None, params=None):
+        await self._round_trip('create_order')
+        if self.rng.random() < self.error_rate:
+            raise NetworkError('connection reset')
+        return self._place(symbol, type, side, amount, price, params or {})
+
+    async def create_orders(self, orders, params=None):
+        await self._round_trip('create_orders')
+        if len(orders) > self.max_batch:
+            raise ExchangeError(f'batch larger than {self.max_batch}')
+        if self.rng.random() < self.error_rate:
+            raise NetworkError('connection reset')
+
+        results = []
+        for spec in orders:
+            try:
+                results.append(self._place(spec['symbol'], spec['type'], spec['side'], spec['amount'],
+                                           spec.get('price'), spec.get('params') or {}))
+            except DuplicateOrderId:
+                results.append(self._structure(self.book[self.by_client_id[spec['params']['clientOrderId']]]))
+            except NetworkError:
+                # Placed, but this entry of the reply is lost
+                results.append({'clientOrderId': spec['params']['clientOrderId'], 'status': None})
+            except ExchangeError:
+                results.append({'clientOrderId': spec['params']['clientOrderId'], 'status': 'rejected'})
+        return results
+
+    async def fetch_order(self, id, symbol=None, params=None):
+        await self._round_trip('fetch_order')
+        if id is None:
+            id = self.by_client_id.get((params or {}).get('clientOrderId'))
+        if id not in self.book:
+            raise OrderNotFound(f'order {id} not found')
+        return self._structure(self.book[id])
+
+    async def fetch_open_orders(self, symbol=None, since=None, limit=None, params=None):
+        await self._round_trip('fetch_open_orders')
+        orders = (self._structure(order) for order in self.book.values() if symbol in (None, order['symbol']))
+        return [order for order in orders if order['status'] == 'open']
+
+    async def cancel_order(self, id, symbol=None, params=None):
+        await self._round_trip('cancel_order')
+        if id is None:
+            id = self.by_client_id.get((params or {}).get('clientOrderId'))
+        order = self.book.get(id)
+        if order is None:
+            raise OrderNotFound(f'order {id} not found')
+        if order['status'] == 'open':
+            order['status'] = 'canceled'
+        return self._structure(order)
+
+    async def close(self):
+        pass
+
+
+def run(orders=2000, batch=True, error_rate=0.05, timeout_rate=0.05, reject_rate=0.01,
+        max_in_flight=16, latency_ms=(5, 30)):
+    """
+    Push orders through OrderPipeline against the fake exchange
+
+    Returns:
+        dict: Throughput, acknowledgement latency and consistency checks
+    """
+    exchange = FakeExchange(latency=(latency_ms[0] / 1000, latency_ms[1] / 1000), error_rate=error_rate,
+                            timeout_rate=timeout_rate, reject_rate=reject_rate, batch=batch)
+    pipeline = OrderPipeline(exchange, max_in_flight=max_in_flight, retry_backoff=0.01, poll_interval=0.05)
+    pipeline.start()
+
+    pairs = ['BTC/USDT', 'ETH/USDT', 'SOL/USDT', 'BNB/USDT']
+    started = time.monotonic()
+    submitted = [pipeline.submit(random.choice(pairs), random.choice(['buy', 'sell']), 1.0, 100.0)
+                 for _ in range(orders)]
+    for order in submitted:
+        order.wait(TERMINAL_STATES, timeout=60)
+    elapsed = time.monotonic() - started
+    pipeline.stop()
+
+    ack = LatencyHistogram()
+    for order in submitted:
+        if order.acknowledged is not None:
+            ack.record((order.acknowledged - order.created) * 1e9)
+
+    stats = pipeline.get_stats()
+    placed = len(exchange.book)
+    filled_on_exchange = sum(1 for o in exchange.book.values() if exchange._structure(o)['status'] == 'closed')
+    return {
+        'orders': orders,
+        'batched': batch,
+        'elapsed_sec': elapsed,
+        'orders_per_sec': orders / elapsed,
+        'ack_ms': {key: value for key, value in ack.summary().items() if key.startswith('p') or key == 'max_ms'},
+        'states': stats['states'],
+        'exchange_calls': exchange.calls,
+        'peak_in_flight': exchange.peak_in_flight,
+        'retries': stats['retries'],
+        'reconciled': stats['reconciled'],
+        'placed_on_exchange': placed,
+        'duplicates_on_exchange': placed - len(exchange.by_client_id),
+        'state_matches_exchange': stats['states'].get('filled', 0) == filled_on_exchange
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Order pipeline load test against a fake exchange')
+    parser.add_argument('--orders', type=int, default=2000)
+    parser.add_argument('--no-batch', action='store_true', help='exchange without createOrders')
+    parser.add_argument('--error-rate', type=float, default=0.05)
+    parser.add_argument('--timeout-rate', type=float, default=0.05)
+    parser.add_argument('--reject-rate', type=float, default=0.01)
+    parser.add_argument('--max-in-flight', type=int, default=16)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    print(json.dumps(run(args.orders, not args.no_batch, args.error_rate, args.timeout_rate,
+                         args.reject_rate, args.max_in_flight), indent=2))
+
+
+if __name__ == '__main__':
+    main()
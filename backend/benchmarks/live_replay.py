@@ -0,0 +1,121 @@
+"""
+Live Loop Replay Test
+Drives TradingBot.run_live on replayed market data, faster than real time and fully offline
+
+Reports trading-loop throughput and duration, the per-stage latency
+report and peak memory for a paper-trading bot over many symbols.
+
+Usage:
+    python -m benchmarks.live_replay --symbols 50 --bars 3000
+    python -m benchmarks.live_replay --source data/synthetic --speed 0
+"""
+
+import argparse
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import yaml
+
+from main import TradingBot
+from utils.latency import LatencyHistogram
+
+
+def make_config(workdir, symbols=20, bars=3000, source=None, speed=0.0, timeframe='1h', loop_interval=3600):
+    """Paper-trading config with notifications off and every file under `workdir`"""
+    pairs = [f'SYN{i}/USD' for i in range(symbols)]
+    return {
+        'trading_mode': 'paper',
+        'loop_interval': loop_interval,
+        'markets': {
+            'crypto': {'enabled': False, 'pairs': []},
+            'forex': {'enabled': True, 'broker': 'replay', 'pairs': pairs}
+        },
+        'strategies': [
+            {'name': 'RSI_Mean_Reversion', 'enabled': True, 'timeframe': '15m'},
+            {'name': 'MACD_Trend_Following', 'enabled': True, 'timeframe': '1h'},
+            {'name': 'Bollinger_Bands', 'enabled': True, 'timeframe': '30m'},
+            {'name': 'MA_Crossover', 'enabled': True, 'timeframe': '4h', 'fast_ma': 10, 'slow_ma': 30}
+        ],
+        'risk_management': {
+            'max_position_size': 1000,
+            'max_positions': 10,
+            'stop_loss_percent': 2.0,
+            'take_profit_percent': 4.0,
+            'risk_per_trade_percent': 1.0,
+            'max_daily_loss': 1000000
+        },
+        'database': {'type': 'sqlite', 'sqlite_path': str(Path(workdir) / 'replay.db')},
+        'notifications': {'telegram': {'enabled': False}, 'email': {'enabled': False}},
+        'logging': {'level': 'ERROR', 'file': str(Path(workdir) / 'replay.log')},
+        'latency': {'report_path': str(Path(workdir) / 'latency.json')},
+        'synthetic_data': {'seed': 7, 'bars': bars, 'timeframe': timeframe, 'correlation': 0.3},
+        'replay': {'enabled': True, 'source': source, 'speed': speed, 'warmup_bars': 250},
+    }
+
+
+def run(symbols=20, bars=3000, source=None, speed=0.0, loop_interval=3600):
+    """
+    Run the live loop until the replay is exhausted
+
+    Returns:
+        dict: Loop throughput and timings, stage latencies, replay progress and peak RSS
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        config_path = Path(workdir) / 'config.yaml'
+        config_path.write_text(yaml.safe_dump(make_config(workdir, symbols, bars, source, speed, loop_interval=loop_interval)))
+
+        bot = TradingBot(str(config_path))
+        loop_times = LatencyHistogram()
+        trading_loop = bot._trading_loop
+
+        def timed_loop():
+            started = time.perf_counter_ns()
+            trading_loop()
+            loop_times.record(time.perf_counter_ns() - started)
+
+        bot._trading_loop = timed_loop
+
+        started = time.perf_counter()
+        bot.run_live()
+        elapsed = time.perf_counter() - started
+
+        loops = loop_times.total
+        pairs = len(bot._all_pairs())
+        return {
+            'symbols': pairs,
+            'loops': loops,
+            'elapsed_sec': elapsed,
+            'loops_per_sec': loops / elapsed,
+            'pair_updates_per_sec': loops * pairs / elapsed,
+            'loop_ms': loop_times.summary(),
+            'stages_ms': bot.latency.report()['stages'],
+            'replay': bot.data_feed.get_stats(),
+            'trades': bot.db_manager.get_performance_stats().get('total_trades', 0),
+            'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay market data through the live trading loop')
+    parser.add_argument('--symbols', type=int, default=20)
+    parser.add_argument('--bars', type=int, default=3000, help='bars per symbol when generating data')
+    parser.add_argument('--source', help='dataset from engines.synthetic_data or a CSV directory')
+    parser.add_argument('--speed', type=float, default=0.0, help='market-time multiplier (0 = as fast as possible)')
+    parser.add_argument('--loop-interval', type=float, default=3600, help='market seconds between loops')
+    args = parser.parse_args()
+
+    result = run(args.symbols, args.bars, args.source, args.speed, args.loop_interval)
+    logging.getLogger().setLevel(logging.CRITICAL)
+    print(json.dumps(result, indent=2, default=str))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Login Storm Load Test
+Many clients logging in at once through AuthService and the bounded PasswordHasher
+
+Every login verifies a scrypt/pbkdf2 hash on the hasher pool, so a burst
+beyond `max_pending` is turned away with "Server busy" instead of queueing
+on request threads. The report shows login latency and how many attempts
+were accepted, rejected as busy or failed, at each concurrency level.
+
+Usage:
+    python -m benchmarks.login_storm --users 50 --logins 300 --concurrency 8 64 256
+    python -m benchmarks.login_storm --method pbkdf2:sha256:600000 --hash-workers 4 --max-pending 32
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from flask import Flask
+from flask_jwt_extended import JWTManager
+
+from database.db_manager import DatabaseManager
+from services.auth_service import AuthService
+from services.password_hasher import PasswordHasher
+
+
+PASSWORD = 'correct horse battery staple'
+
+
+def _login(app, auth, username):
+    with app.app_context():
+        started = time.perf_counter()
+        result = auth.login_user(username, PASSWORD, ip_address='127.0.0.1')
+        elapsed = time.perf_counter() - started
+    if result['success']:
+        return elapsed, 'accepted'
+    return elapsed, 'rejected' if result.get('busy') else 'failed'
+
+
+def run(users=50, logins=300, concurrency=(8, 64, 256), method='scrypt', hash_workers=None,
+        max_pending=64, use_processes=True):
+    """
+    Run the login storm
+
+    Args:
+        users: Registered users the logins are spread over
+        logins: Login attempts per concurrency level
+        concurrency: Simultaneous clients to test
+        method: werkzeug hashing method including cost
+        hash_workers: Hasher pool size (default: half the CPU cores)
+        max_pending: Hasher queue limit before logins are rejected as busy
+        use_processes: Process pool (True) or thread pool (False) for hashing
+
+    Returns:
+        dict: Per-concurrency latency percentiles and outcome counts
+    """
+    workdir = tempfile.mkdtemp()
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'login-storm-secret-key-at-least-32-bytes'
+    app.config['JWT_VERIFY_SUB'] = False
+    JWTManager(app)
+
+    hasher = PasswordHasher(method=method, workers=hash_workers, max_pending=max_pending,
+                            use_processes=use_processes)
+    db = DatabaseManager({'database': {'type': 'sqlite', 'sqlite_path': str(Path(workdir) / 'login.db')}})
+    auth = AuthService(db, password_hasher=hasher)
+
+    results = {'users': users, 'logins': logins, 'method': hasher.target_prefix,
+               'hash_workers': hasher.workers, 'max_pending': max_pending}
+    try:
+        for index in range(users):
+            auth.register_user(f'storm{index}', f'storm{index}@example.com', PASSWORD)
+
+        for clients in concurrency:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=clients) as pool:
+                outcomes = list(pool.map(lambda i: _login(app, auth, f'storm{i % users}'), range(logins)))
+            wall = time.perf_counter() - started
+
+            latency = np.array([elapsed for elapsed, _ in outcomes]) * 1000
+            accepted = np.array([elapsed for elapsed, outcome in outcomes if outcome == 'accepted']) * 1000
+            counts = {outcome: sum(1 for _, seen in outcomes if seen == outcome)
+                      for outcome in ('accepted', 'rejected', 'failed')}
+            results[f'c{clients}'] = dict(
+                counts,
+                p50_ms=float(np.percentile(latency, 50)),
+                p99_ms=float(np.percentile(latency, 99)),
+                accepted_p50_ms=float(np.percentile(accepted, 50)) if len(accepted) else None,
+                accepted_p99_ms=float(np.percentile(accepted, 99)) if len(accepted) else None,
+                logins_per_sec=counts['accepted'] / wall
+            )
+    finally:
+        hasher.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Login storm load test')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--logins', type=int, default=300, help='attempts per concurrency level')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[8, 64, 256])
+    parser.add_argument('--method', default='scrypt', help="werkzeug hash method, e.g. 'pbkdf2:sha256:600000'")
+    parser.add_argument('--hash-workers', type=int)
+    parser.add_argument('--max-pending', type=int, default=64)
+    parser.add_argument('--threads', action='store_true', help='hash on a thread pool instead of processes')
+    args = parser.parse_args()
+
+    # Every login is logged at INFO
+    logging.basicConfig(level=logging.WARNING)
+
+    print(json.dumps(run(args.users, args.logins, args.concurrency, args.method, args.hash_workers,
+                         args.max_pending, not args.threads), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""
+Multi-Tenant Engine Simulation
+Runs thousands of paper users through MultiTenantEngine on synthetic candles
+
+Reports how per-cycle work scales: strategy evaluations should track the
+number of (pair, strategy) pairs in use, not users x pairs.
+
+Usage:
+    python -m benchmarks.multi_tenant --users 10000 --cycles 50
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from engines.multi_tenant_engine import MultiTenantEngine
+from models.entitlements import SubscriptionTier
+from models.user import User
+from utils.event_bus import EventBus, TRADE_UPDATE
+
+
+PAIRS = ['BTC/USDT', 'ETH/USDT', 'BNB/USDT', 'SOL/USDT', 'XRP/USDT', 'ADA/USDT', 'DOGE/USDT',
+         'EUR/USD', 'GBP/USD', 'USD/JPY', 'AUD/USD', 'USD/CHF']
+
+CONFIG = {
+    'markets': {
+        'crypto': {'enabled': True, 'pairs': PAIRS[:3]},
+        'forex': {'enabled': True, 'pairs': PAIRS[7:9]}
+    },
+    'strategies': [
+        {'name': 'RSI_Mean_Reversion', 'enabled': True, 'timeframe': '15m'},
+        {'name': 'MACD_Trend_Following', 'enabled': True, 'timeframe': '1h'},
+        {'name': 'Bollinger_Bands', 'enabled': True, 'timeframe': '30m'},
+        {'name': 'MA_Crossover', 'enabled': True, 'timeframe': '4h', 'fast_ma': 10, 'slow_ma': 30}
+    ],
+    'risk_management': {
+        'max_position_size': 1000,
+        'max_positions': 3,
+        'stop_loss_percent': 2.0,
+        'take_profit_percent': 4.0,
+        'risk_per_trade_percent': 1.0,
+        'max_daily_loss': 500
+    }
+}
+
+
+class SyntheticFeed:
+    """
+    Random-walk candles, one new candle per cycle
+
+    Every timeframe of a pair returns the same frame so all timeframes
+    agree on the latest price.
+    """
+
+    def __init__(self, seed=7, history=250):
+        self.rng = np.random.default_rng(seed)
+        self.history = history
+        self.frames = {}
+        self.fetches = 0
+
+    def advance(self):
+        for key, frame in self.frames.items():
+            self.frames[key] = self._append(frame)
+
+    def _append(self, frame):
+        last = frame['close'].iloc[-1]
+        close = last * float(np.exp(self.rng.normal(0, 0.01)))
+        row = pd.DataFrame({
+            'open': [last], 'high': [max(last, close) * 1.002], 'low': [min(last, close) * 0.998],
+            'close': [close], 'volume': [float(self.rng.uniform(10, 100))]
+        })
+        return pd.concat([frame.iloc[1:], row], ignore_index=True)
+
+    def get_market_data(self, symbol, timeframe='1h', limit=100):
+        self.fetches += 1
+        if symbol not in self.frames:
+            steps = np.exp(np.cumsum(self.rng.normal(0, 0.01, self.history)))
+            close = 100 * steps
+            self.frames[symbol] = pd.DataFrame({
+                'open': close, 'high': close * 1.002, 'low': close * 0.998,
+                'close': close, 'volume': self.rng.uniform(10, 100, self.history)
+            })
+        return self.frames[symbol]
+
+
+def make_users(count, seed=11):
+    """Paper users with varied tiers, pairs and strategy selections"""
+    rng = random.Random(seed)
+    strategies = [s['name'] for s in CONFIG['strategies']]
+    tiers = [SubscriptionTier.FREE, SubscriptionTier.PRO, SubscriptionTier.ENTERPRISE]
+    users = []
+    for user_id in range(1, count + 1):
+        users.append(User(
+            f'user{user_id}', f'user{user_id}@example.com',
+            id=user_id,
+            is_active=True,
+            auto_trading_enabled=True,
+            subscription_tier=rng.choice(tiers),
+            subscription_end=datetime.utcnow() + timedelta(days=30),
+            paper_balance=10000.0,
+            max_position_size=rng.choice([250.0, 500.0, 1000.0]),
+            max_positions=rng.randint(1, 10),
+            daily_loss_limit=5.0,
+            trading_pairs=','.join(rng.sample(PAIRS, rng.randint(1, 6))),
+            enabled_strategies=','.join(rng.sample(strategies, rng.randint(1, 3)))
+        ))
+    return users
+
+
+def run(users=10000, cycles=50):
+    """
+    Run the simulation
+
+    Returns:
+        dict: Per-cycle timings and work counters
+    """
+    feed = SyntheticFeed()
+    event_bus = EventBus()
+    trade_events = []
+    event_bus.subscribe(TRADE_UPDATE, lambda event_type, payload: trade_events.append(payload['status']))
+
+    engine = MultiTenantEngine(CONFIG, data_feed=feed, event_bus=event_bus)
+
+    started = time.perf_counter()
+    engine.load_users(make_users(users))
+    load_seconds = time.perf_counter() - started
+
+    timings, totals = [], {'feeds': 0, 'signals_evaluated': 0, 'user_decisions': 0, 'opened': 0, 'closed': 0}
+    for _ in range(cycles):
+        stats = engine.run_cycle()
+        timings.append(stats['cycle_ms'])
+        for key in totals:
+            totals[key] += stats.get(key, 0)
+        feed.advance()
+
+    summary = engine.get_summary()
+    timings = np.array(timings)
+    return {
+        'users': summary['users'],
+        'pairs': summary['pairs'],
+        'subscriptions': summary['subscriptions'],
+        'cycles': cycles,
+        'load_ms': load_seconds * 1000,
+        'cycle_ms_mean': float(timings.mean()),
+        'cycle_ms_p99': float(np.percentile(timings, 99)),
+        'us_per_user_per_cycle': float(timings.mean() * 1000 / max(summary['users'], 1)),
+        'feeds_per_cycle': totals['feeds'] / cycles,
+        'strategy_evaluations_per_cycle': totals['signals_evaluated'] / cycles,
+        'user_decisions_per_cycle': totals['user_decisions'] / cycles,
+        'naive_evaluations_per_cycle': summary['subscriptions'],
+        'positions_opened': totals['opened'],
+        'positions_closed': totals['closed'],
+        'open_positions': summary['open_positions'],
+        'trade_events': len(trade_events)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Multi-tenant engine simulation')
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--cycles', type=int, default=50)
+    args = parser.parse_args()
+
+    # Per-user risk warnings would swamp the output
+    logging.basicConfig(level=logging.ERROR)
+    logging.getLogger('engines.risk_manager').setLevel(logging.CRITICAL)
+
+    print(json.dumps(run(args.users, args.cycles), indent=2))
+
+
+if __name__ == '__main__':
+    main()
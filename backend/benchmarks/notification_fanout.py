@@ -0,0 +1,247 @@
+"""
+Notification Fan-out Throughput Test
+Drives NotificationFanout against local fake Telegram and SMTP servers
+
+The fake Telegram server enforces a global messages/sec limit with 429
+replies (like the real Bot API), so the report shows whether the fan-out
+stays under it as well as raw throughput.
+
+Usage:
+    python -m benchmarks.notification_fanout --users 500 --events 5000
+    python -m benchmarks.notification_fanout --telegram-rate 1000 --server-limit 0 --latency-ms 50
+"""
+
+import argparse
+import json
+import os
+import random
+import socketserver
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.entitlements import SubscriptionTier
+from models.user import User
+from services.notification_fanout import NotificationFanout, SmtpClient, TelegramClient
+from utils.event_bus import EventBus, TRADE_UPDATE
+
+
+class FakeTelegram(ThreadingHTTPServer):
+    """Bot API stand-in answering sendMessage, with an optional global rate limit"""
+
+    daemon_threads = True
+
+    def __init__(self, address, limit=30, latency=0.0):
+        super().__init__(address, self.Handler)
+        self.limit = limit
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.window_start = time.monotonic()
+        self.window_count = 0
+        self.delivered = []
+        self.rejected = 0
+
+    def admit(self):
+        with self.lock:
+            now = time.monotonic()
+            if now - self.window_start >= 1.0:
+                self.window_start, self.window_count = now, 0
+            if self.limit and self.window_count >= self.limit:
+                self.rejected += 1
+                return False
+            self.window_count += 1
+            return True
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            if self.server.latency:
+                time.sleep(self.server.latency)
+
+            if self.server.admit():
+                with self.server.lock:
+                    self.server.delivered.append((time.monotonic(), body['chat_id'], body['text']))
+                status, reply = 200, {'ok': True, 'result': {'message_id': 1}}
+            else:
+                status, reply = 429, {'ok': False, 'error_code': 429, 'parameters': {'retry_after': 1}}
+
+            data = json.dumps(reply).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+
+class FakeSmtp(socketserver.ThreadingTCPServer):
+    """Just enough SMTP to accept mail over persistent connections"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address):
+        super().__init__(address, self.Handler)
+        self.lock = threading.Lock()
+        self.delivered = []
+
+    class Handler(socketserver.StreamRequestHandler):
+        def reply(self, line):
+            self.wfile.write(line.encode() + b'\r\n')
+
+        def handle(self):
+            self.reply('220 fake-smtp ready')
+            while True:
+                line = self.rfile.readline()
+                if not line:
+                    return
+                command = line.decode().strip().upper()
+                if command.startswith(('EHLO', 'HELO')):
+                    self.reply('250 fake-smtp')
+                elif command == 'DATA':
+                    self.reply('354 end with .')
+                    while self.rfile.readline() not in (b'.\r\n', b''):
+                        pass
+                    with self.server.lock:
+                        self.server.delivered.append(time.monotonic())
+                    self.reply('250 queued')
+                elif command == 'QUIT':
+                    self.reply('221 bye')
+                    return
+                else:
+                    self.reply('250 ok')
+
+
+def _serve(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _make_users(count, email_share):
+    users = {}
+    for user_id in range(1, count + 1):
+        users[user_id] = User(
+            f'user{user_id}', f'user{user_id}@example.com',
+            id=user_id,
+            is_active=True,
+            subscription_tier=SubscriptionTier.PRO,
+            subscription_end=datetime.utcnow() + timedelta(days=30),
+            telegram_chat_id=str(100000 + user_id),
+            email_alerts=random.random() < email_share
+        )
+    return users
+
+
+def _trade(user_id, n):
+    trade = {
+        'user_id': user_id, 'id': f'{user_id}-{n}', 'pair': 'BTC/USDT', 'action': 'buy',
+        'size': 0.01, 'entry_price': 43000.0, 'strategy': 'RSI', 'status': 'open'
+    }
+    if n % 2:
+        trade.update(status='closed', exit_price=43500.0, pnl=5.0, pnl_percent=1.16, close_reason='take_profit')
+    return trade
+
+
+def run(users=500, events=5000, telegram_rate=30, server_limit=30, latency_ms=0,
+        email_share=0.2, batch_window=1.0, workers=8):
+    """
+    Run the fan-out throughput test
+
+    Args:
+        users: Simulated subscribed users
+        events: Trade events published (spread randomly across users)
+        telegram_rate: Fan-out global Telegram rate limit (messages/sec)
+        server_limit: Fake Telegram limit before answering 429 (0 = none)
+        latency_ms: Fake Telegram response latency
+        email_share: Fraction of users with email alerts on
+        batch_window: Fan-out digest window in seconds
+        workers: Fan-out sender threads
+
+    Returns:
+        dict: Throughput and delivery statistics
+    """
+    telegram_server = _serve(FakeTelegram(('127.0.0.1', 0), server_limit, latency_ms / 1000))
+    smtp_server = _serve(FakeSmtp(('127.0.0.1', 0)))
+
+    directory = _make_users(users, email_share)
+    event_bus = EventBus()
+    fanout = NotificationFanout(
+        event_bus,
+        directory.get,
+        telegram=TelegramClient('TEST:TOKEN', base_url=f'http://127.0.0.1:{telegram_server.server_port}',
+                                pool_size=workers),
+        smtp=SmtpClient('127.0.0.1', smtp_server.server_address[1], use_tls=False, pool_size=workers),
+        global_rate=telegram_rate,
+        batch_window=batch_window,
+        workers=workers,
+        max_queue=max(10000, users * 2)
+    )
+    fanout.start()
+
+    started = time.monotonic()
+    for n in range(events):
+        event_bus.publish(TRADE_UPDATE, _trade(random.randint(1, users), n))
+    publish_seconds = time.monotonic() - started
+
+    fanout.flush()
+    fanout.stop()
+    elapsed = time.monotonic() - started
+
+    # Busiest one-second window seen by the fake server
+    times = sorted(t for t, _, _ in telegram_server.delivered)
+    peak, left = 0, 0
+    for right, t in enumerate(times):
+        while t - times[left] >= 1.0:
+            left += 1
+        peak = max(peak, right - left + 1)
+
+    telegram_server.shutdown()
+    smtp_server.shutdown()
+
+    stats = fanout.get_stats()
+    telegram_messages = len(telegram_server.delivered)
+    email_messages = len(smtp_server.delivered)
+    return {
+        'users': users,
+        'events': events,
+        'publish_us_per_event': publish_seconds / events * 1e6,
+        'telegram_messages': telegram_messages,
+        'email_messages': email_messages,
+        'digests': stats['digests'],
+        'failed': stats['failed'],
+        'dropped': stats['dropped'],
+        'telegram_429s': telegram_server.rejected,
+        'telegram_peak_per_sec': peak,
+        'elapsed_sec': elapsed,
+        'messages_per_sec': (telegram_messages + email_messages) / elapsed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Notification fan-out throughput test')
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--events', type=int, default=5000)
+    parser.add_argument('--telegram-rate', type=float, default=30, help='fan-out global Telegram limit (msg/s)')
+    parser.add_argument('--server-limit', type=int, default=30, help='fake Telegram 429 threshold (0 = off)')
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--email-share', type=float, default=0.2)
+    parser.add_argument('--batch-window', type=float, default=1.0)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    results = run(args.users, args.events, args.telegram_rate, args.server_limit, args.latency_ms,
+                  args.email_share, args.batch_window, args.workers)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Sharded Engine Scaling Test
+Runs the multi-tenant simulation through ShardCoordinator at several worker counts
+
+Market data is fetched once per cycle by the coordinator and shared with
+every worker, so per-cycle time should fall close to 1/workers until the
+machine runs out of cores. The last run also adds and removes a worker to
+report how many users the consistent-hash ring moved.
+
+Usage:
+    python -m benchmarks.sharded_engine --users 20000 --cycles 20 --workers 1 2 4
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from benchmarks.multi_tenant import CONFIG, SyntheticFeed, make_users
+from engines.sharding import ShardCoordinator
+
+
+def run(users=20000, cycles=20, workers=1):
+    """
+    Run the simulation on a given number of worker processes
+
+    Returns:
+        dict: Per-cycle timings, fetch counts and throughput
+    """
+    feed = SyntheticFeed()
+    coordinator = ShardCoordinator(CONFIG, data_feed=feed, workers=workers)
+    coordinator.start()
+    try:
+        started = time.perf_counter()
+        coordinator.add_users(make_users(users))
+        load_seconds = time.perf_counter() - started
+
+        # First cycle warms strategy caches in every worker
+        coordinator.run_cycle()
+        feed.advance()
+
+        timings, fetch_ms, opened = [], [], 0
+        fetches = feed.fetches
+        for _ in range(cycles):
+            stats = coordinator.run_cycle()
+            timings.append(stats['cycle_ms'])
+            fetch_ms.append(stats['fetch_ms'])
+            opened += stats.get('opened', 0)
+            feed.advance()
+
+        timings = np.array(timings)
+        result = {
+            'workers': workers,
+            'users': users,
+            'load_ms': load_seconds * 1000,
+            'cycle_ms_mean': float(timings.mean()),
+            'cycle_ms_p99': float(np.percentile(timings, 99)),
+            'fetch_ms_mean': float(np.mean(fetch_ms)),
+            'fetches_per_cycle': (feed.fetches - fetches) / cycles,
+            'user_cycles_per_sec': users * 1000 / float(timings.mean()),
+            'positions_opened': opened
+        }
+
+        before = dict(coordinator.assignment)
+        added = coordinator.add_worker()
+        moved_on_join = sum(1 for uid, owner in coordinator.assignment.items() if before[uid] != owner)
+        coordinator.remove_worker(added)
+        result['moved_on_join'] = moved_on_join
+        result['moved_on_join_pct'] = 100.0 * moved_on_join / users
+        result['restored_after_leave'] = coordinator.assignment == before
+        return result
+    finally:
+        coordinator.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sharded engine scaling test')
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--cycles', type=int, default=20)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    logging.getLogger('engines.risk_manager').setLevel(logging.CRITICAL)
+
+    results = [run(args.users, args.cycles, workers) for workers in args.workers]
+    for result in results:
+        result['speedup'] = results[0]['cycle_ms_mean'] / result['cycle_ms_mean']
+
+    print(json.dumps({'cpus': os.cpu_count(), 'runs': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
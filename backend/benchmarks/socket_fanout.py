@@ -0,0 +1,167 @@
+"""
+Socket.IO Fan-out Load Test
+Simulates thousands of dashboard subscribers spread across Socket.IO worker processes
+
+Each worker is a real socketio.Server attached to the backplane whose
+subscribers are registered directly with its client manager, so the test
+measures backplane + room fan-out cost without opening thousands of sockets.
+
+Usage:
+    python -m benchmarks.socket_fanout --workers 4 --subscribers 5000 --rooms 500
+    python -m benchmarks.socket_fanout --url redis://localhost:6379/2
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import socketio
+
+from services.socket_backplane import LocalPubSubManager, create_socketio, run_local_broker
+
+
+EVENT = 'position_update'
+
+
+def _client_manager(url):
+    if url.startswith('local://'):
+        return LocalPubSubManager(url)
+    return socketio.RedisManager(url)
+
+
+def _worker(index, url, subscribers, rooms, results, ready, done):
+    """Socket.IO worker holding a slice of the subscribers"""
+    server = socketio.Server(client_manager=_client_manager(url), async_mode='threading')
+    manager = server.manager
+
+    latencies = []
+    last = {'packet': None, 'sent_at': 0.0}
+
+    def deliver(eio_sid, packet):
+        # Room emits reuse one encoded packet for every recipient
+        if packet is not last['packet']:
+            payload = json.loads(packet.data[packet.data.index('['):])[1]
+            last['packet'] = packet
+            last['sent_at'] = payload['sent_at']
+        latencies.append(time.time() - last['sent_at'])
+
+    server._send_eio_packet = deliver
+
+    for n in range(subscribers):
+        sid = manager.connect(f'w{index}-c{n}', '/')
+        manager.enter_room(sid, '/', f'user_{n % rooms}')
+
+    server.manager_initialized = True
+    manager.initialize()
+    time.sleep(0.5)  # let the backplane listener subscribe
+    ready.set()
+
+    done.wait()
+    time.sleep(0.5)  # drain in-flight messages
+    results.put((index, np.array(latencies)))
+
+
+def run(workers=4, subscribers=5000, rooms=500, messages=1000, rate=500, url='local://127.0.0.1:6391'):
+    """
+    Run the fan-out load test
+
+    Args:
+        workers: Number of Socket.IO worker processes
+        subscribers: Total simulated clients across all workers
+        rooms: Number of user rooms the clients are spread over
+        messages: Number of room emits published
+        rate: Emits per second
+        url: Backplane URL (local://host:port starts a local broker)
+
+    Returns:
+        dict: Delivery count, throughput and latency percentiles in ms
+    """
+    ctx = mp.get_context('spawn')
+    broker = None
+    if url.startswith('local://'):
+        broker_ready = ctx.Event()
+        broker = ctx.Process(target=run_local_broker, args=(url,), kwargs={'ready': broker_ready}, daemon=True)
+        broker.start()
+        broker_ready.wait(10)
+
+    results = ctx.Queue()
+    done = ctx.Event()
+    ready_events = []
+    processes = []
+    per_worker = subscribers // workers
+
+    for index in range(workers):
+        ready = ctx.Event()
+        process = ctx.Process(
+            target=_worker,
+            args=(index, url, per_worker, rooms, results, ready, done),
+            daemon=True
+        )
+        process.start()
+        processes.append(process)
+        ready_events.append(ready)
+
+    for ready in ready_events:
+        ready.wait(30)
+
+    emitter = create_socketio(message_queue=url)
+    interval = 1.0 / rate if rate > 0 else 0
+    payload = {'positions': [{'id': 'p1', 'pair': 'BTC/USDT', 'pnl': 12.5, 'current_price': 43250.5}]}
+
+    started = time.time()
+    for n in range(messages):
+        emitter.emit(EVENT, dict(payload, sent_at=time.time()), room=f'user_{random.randrange(rooms)}')
+        if interval:
+            time.sleep(interval)
+    elapsed = time.time() - started
+
+    done.set()
+    latencies = np.concatenate([results.get(timeout=60)[1] for _ in processes]) * 1000
+
+    for process in processes:
+        process.join(5)
+    if broker is not None:
+        broker.terminate()
+
+    if len(latencies) == 0:
+        return {'deliveries': 0}
+
+    return {
+        'workers': workers,
+        'subscribers': per_worker * workers,
+        'rooms': rooms,
+        'emits': messages,
+        'deliveries': int(len(latencies)),
+        'deliveries_per_sec': len(latencies) / elapsed,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p90_ms': float(np.percentile(latencies, 90)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'p999_ms': float(np.percentile(latencies, 99.9)),
+        'max_ms': float(latencies.max())
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Socket.IO fan-out load test')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--subscribers', type=int, default=5000)
+    parser.add_argument('--rooms', type=int, default=500)
+    parser.add_argument('--messages', type=int, default=1000)
+    parser.add_argument('--rate', type=float, default=500, help='emits per second (0 = unthrottled)')
+    parser.add_argument('--url', default='local://127.0.0.1:6391', help='backplane URL')
+    args = parser.parse_args()
+
+    results = run(args.workers, args.subscribers, args.rooms, args.messages, args.rate, args.url)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,399 @@
+"""
+Benchmark Suite
+Strategy signals, backtester, database and API latency, saved as JSON for comparison between commits
+
+Usage:
+    python -m benchmarks.suite                        # everything, results in data/benchmarks/
+    python -m benchmarks.suite --quick --only strategies db
+    python -m benchmarks.suite --compare data/benchmarks/OLD.json data/benchmarks/NEW.json
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engines.synthetic_data import SyntheticMarket
+from utils.latency import LatencyHistogram
+
+
+RESULTS_ROOT = Path(__file__).parent.parent.parent / 'data' / 'benchmarks'
+
+GROUPS = ('strategies', 'backtester', 'db', 'api')
+
+# Default API paths; /api/trading/* run as a user registered on the scratch server
+API_PATHS = ('/health', '/api/trading/positions', '/api/trading/history', '/api/trading/performance')
+
+STRATEGY_CONFIGS = [
+    {'name': 'RSI_Mean_Reversion', 'enabled': True, 'timeframe': '15m'},
+    {'name': 'MACD_Trend_Following', 'enabled': True, 'timeframe': '1h'},
+    {'name': 'Bollinger_Bands', 'enabled': True, 'timeframe': '30m'},
+    {'name': 'MA_Crossover', 'enabled': True, 'timeframe': '4h', 'fast_ma': 10, 'slow_ma': 30}
+]
+
+
+def _strategies():
+    from strategies.rsi_strategy import RSIStrategy
+    from strategies.macd_strategy import MACDStrategy
+    from strategies.bollinger_strategy import BollingerStrategy
+    from strategies.ma_crossover import MACrossoverStrategy
+
+    classes = [RSIStrategy, MACDStrategy, BollingerStrategy, MACrossoverStrategy]
+    return [strategy_class(config) for strategy_class, config in zip(classes, STRATEGY_CONFIGS)]
+
+
+def _timing(histogram, unit_count=1):
+    """Latency summary plus throughput; `better` tells compare() which way is a regression"""
+    summary = histogram.summary()
+    summary['ops_per_sec'] = unit_count * histogram.total / (histogram.sum / 1e9) if histogram.sum else 0.0
+    summary['primary'] = 'p50_ms'
+    summary['better'] = 'lower'
+    return summary
+
+
+# ==================== STRATEGIES ====================
+
+def bench_strategies(bars=2000, window=100):
+    """
+    Per-bar signal generation for each strategy class
+
+    Each bar runs generate_signal on the trailing `window` candles, as the
+    live loop does with its default 100-candle fetch.
+    """
+    frame = SyntheticMarket(['BENCH'], seed=1).frames(bars + window)['BENCH']
+    results = {}
+    for strategy in _strategies():
+        histogram = LatencyHistogram()
+        for end in range(window, window + bars):
+            data = frame.iloc[end - window:end]
+            started = time.perf_counter_ns()
+            strategy.generate_signal(data)
+            histogram.record(time.perf_counter_ns() - started)
+        results[f'strategy.{type(strategy).__name__}'] = _timing(histogram)
+    return results
+
+
+# ==================== BACKTESTER ====================
+
+def _backtest(bars, conn):
+    logging.disable(logging.CRITICAL)
+    from engines.backtester import Backtester
+
+    config = {
+        'markets': {'crypto': {'enabled': True, 'pairs': ['BENCH/USDT']}, 'forex': {'enabled': False, 'pairs': []}},
+        'backtesting': {'start_date': '2020-01-01', 'end_date': '2021-01-01', 'initial_balance': 10000,
+                        'data_source': 'synthetic', 'seed': 0},
+        'synthetic_data': {'seed': 1, 'bars': bars}
+    }
+    backtester = Backtester(config, _strategies())
+    started = time.perf_counter()
+    results = backtester.run()
+    conn.send({'elapsed_sec': time.perf_counter() - started, 'total_trades': results['total_trades']})
+
+
+def bench_backtester(sizes=(10_000, 100_000, 1_000_000), timeout=600):
+    """
+    Backtester.run on one pair of synthetic candles per size
+
+    Each size runs in its own process so a size that exceeds `timeout`
+    seconds is recorded as timed out instead of stalling the suite.
+    """
+    context = multiprocessing.get_context('spawn')
+    results = {}
+    for bars in sizes:
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=_backtest, args=(bars, sender), daemon=True)
+        process.start()
+        finished = receiver.poll(timeout)
+        if finished:
+            run = receiver.recv()
+            run.update(bars_per_sec=bars / run['elapsed_sec'], primary='elapsed_sec', better='lower')
+        else:
+            process.terminate()
+            run = {'timed_out': True, 'timeout_sec': timeout}
+        process.join()
+        results[f'backtester.run.{bars}'] = run
+    return results
+
+
+# ==================== DATABASE ====================
+
+def _trade(index):
+    return {
+        'id': str(uuid.uuid4()), 'pair': f'PAIR{index % 20}/USDT', 'action': 'buy' if index % 2 else 'sell',
+        'size': 1.0, 'entry_price': 100.0, 'current_price': 100.0, 'stop_loss': 98.0, 'take_profit': 104.0,
+        'strategy': 'bench', 'status': 'open', 'timestamp': datetime.now(), 'pnl': 0.0, 'pnl_percent': 0.0,
+        'fees': 0.1
+    }
+
+
+def bench_db(trades=2000, reads=200):
+    """DatabaseManager write and read throughput on a scratch SQLite file"""
+    from database.db_manager import DatabaseManager
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        db = DatabaseManager({'database': {'type': 'sqlite', 'sqlite_path': str(Path(workdir) / 'bench.db')}})
+        rows = [_trade(index) for index in range(trades)]
+
+        def measure(name, operation, items, unit_count=1):
+            histogram = LatencyHistogram()
+            for item in items:
+                started = time.perf_counter_ns()
+                operation(item)
+                histogram.record(time.perf_counter_ns() - started)
+            results[f'db.{name}'] = _timing(histogram, unit_count)
+
+        measure('save_trade', db.save_trade, rows)
+        marks = [(101.0, 1.0, 1.0, row['id']) for row in rows]
+        measure('update_marks', db.update_marks, [marks] * 20, unit_count=len(marks))
+        measure('get_all_open_positions', lambda _: db.get_all_open_positions(), range(reads // 10 or 1))
+        measure('get_performance_stats', lambda _: db.get_performance_stats(), range(reads))
+
+        for row in rows[: trades // 2]:
+            row.update(status='closed', exit_price=101.0, close_timestamp=datetime.now(), close_reason='bench')
+        measure('update_trade', db.update_trade, rows[: trades // 2])
+        measure('get_trade_history', lambda _: db.get_trade_history(limit=100), range(reads))
+    return results
+
+
+# ==================== API ====================
+
+def _serve_api(database_path, conn):
+    os.environ['DATABASE_PATH'] = database_path
+    # A daemon process cannot start the hasher's process pool
+    os.environ['PASSWORD_HASH_EXECUTOR'] = 'thread'
+    logging.disable(logging.CRITICAL)
+    from werkzeug.serving import make_server
+    import api_server
+
+    server = make_server('127.0.0.1', 0, api_server.app, threaded=True)
+    conn.send(server.server_port)
+    server.serve_forever()
+
+
+def _request(host, port, path, token):
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    headers = {'Authorization': f'Bearer {token}'} if token else {}
+    started = time.perf_counter_ns()
+    connection.request('GET', path, headers=headers)
+    response = connection.getresponse()
+    response.read()
+    elapsed = time.perf_counter_ns() - started
+    connection.close()
+    return elapsed, response.status
+
+
+def _post(host, port, path, body):
+    connection = http.client.HTTPConnection(host, port, timeout=60)
+    connection.request('POST', path, body=json.dumps(body), headers={'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    payload = json.loads(response.read() or b'{}')
+    connection.close()
+    return response.status, payload
+
+
+def _bench_user(host, port, database_path, trades=200):
+    """Register and log in a user on the scratch server, give it trades, and return its access token"""
+    from database.db_manager import DatabaseManager
+
+    name = f'bench{uuid.uuid4().hex[:8]}'
+    credentials = {'username': name, 'email': f'{name}@example.com', 'password': 'bench-password'}
+    _post(host, port, '/api/auth/register', credentials)
+    status, result = _post(host, port, '/api/auth/login', credentials)
+    if status != 200:
+        raise RuntimeError(f"benchmark user login failed ({status}): {result.get('message')}")
+
+    db = DatabaseManager({'database': {'type': 'sqlite', 'sqlite_path': database_path}})
+    rows = [dict(_trade(index), user_id=result['user']['id']) for index in range(trades)]
+    for row in rows:
+        db.save_trade(row)
+    for row in rows[: trades // 2]:
+        row.update(status='closed', exit_price=101.0, close_timestamp=datetime.now(), close_reason='bench')
+        db.update_trade(row)
+    return result['access_token']
+
+
+def bench_api(paths=API_PATHS, concurrency=(1, 8, 32), requests=500, url=None, token=None):
+    """
+    api_server request latency under concurrent clients
+
+    Starts api_server in a separate process on a scratch database unless
+    `url` points at a running server. On the scratch server a user with
+    some trades is registered and logged in for the routes behind
+    @jwt_required; against `url` those need `token` (an access token from
+    /api/auth/login on that server).
+    """
+    server = None
+    if url is None:
+        workdir = tempfile.mkdtemp()
+        database_path = str(Path(workdir) / 'api.db')
+        context = multiprocessing.get_context('spawn')
+        receiver, sender = context.Pipe(duplex=False)
+        server = context.Process(target=_serve_api, args=(database_path, sender), daemon=True)
+        server.start()
+        if not receiver.poll(60):
+            server.terminate()
+            raise RuntimeError('api_server did not start')
+        host, port = '127.0.0.1', receiver.recv()
+    else:
+        host, _, port = url.replace('http://', '').rstrip('/').partition(':')
+        port = int(port or 80)
+
+    results = {}
+    try:
+        if server is not None and token is None:
+            token = _bench_user(host, port, database_path)
+        for path in paths:
+            for clients in concurrency:
+                histogram = LatencyHistogram()
+                errors = 0
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=clients) as pool:
+                    for elapsed, status in pool.map(lambda _: _request(host, port, path, token), range(requests)):
+                        histogram.record(elapsed)
+                        errors += status >= 400
+                wall = time.perf_counter() - started
+
+                timing = _timing(histogram)
+                timing.update(requests_per_sec=requests / wall, errors=errors, primary='p99_ms')
+                results[f'api.GET {path}.c{clients}'] = timing
+    finally:
+        if server is not None:
+            server.terminate()
+            server.join()
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+# ==================== RESULTS ====================
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=Path(__file__).parent).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(groups=GROUPS, quick=False, backtest_sizes=None, backtest_timeout=600, api_url=None, api_token=None,
+        api_paths=None):
+    """
+    Run the selected benchmark groups
+
+    Returns:
+        dict: {'meta': {...}, 'results': {benchmark name: metrics}}
+    """
+    results = {}
+    if 'strategies' in groups:
+        results.update(bench_strategies(bars=300 if quick else 2000))
+    if 'backtester' in groups:
+        sizes = backtest_sizes or ((1_000, 10_000) if quick else (10_000, 100_000, 1_000_000))
+        results.update(bench_backtester(sizes, backtest_timeout))
+    if 'db' in groups:
+        results.update(bench_db(trades=300 if quick else 2000, reads=50 if quick else 200))
+    if 'api' in groups:
+        results.update(bench_api(paths=api_paths or API_PATHS, concurrency=(1, 8) if quick else (1, 8, 32),
+                                 requests=100 if quick else 500, url=api_url, token=api_token))
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'quick': quick,
+            'groups': list(groups)
+        },
+        'results': results
+    }
+
+
+def save(report, path=None):
+    """Write a report to `path` (default data/benchmarks/<time>-<commit>.json)"""
+    if path is None:
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        path = RESULTS_ROOT / f"{stamp}-{report['meta']['commit'] or 'nogit'}.json"
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2))
+    return path
+
+
+def compare(old, new, threshold=0.1):
+    """
+    Compare each benchmark's primary metric between two reports
+
+    Returns:
+        tuple: (rows of (name, metric, old, new, change), names that regressed by more than `threshold`)
+    """
+    rows, regressions = [], []
+    for name, current in new['results'].items():
+        previous = old['results'].get(name)
+        metric = current.get('primary')
+        if not previous or metric is None or metric not in previous or metric not in current:
+            continue
+
+        before, after = previous[metric], current[metric]
+        change = (after - before) / before if before else 0.0
+        worse = change > threshold if current.get('better', 'lower') == 'lower' else change < -threshold
+        rows.append((name, metric, before, after, change))
+        if worse:
+            regressions.append(name)
+    return rows, regressions
+
+
+def format_comparison(rows, regressions):
+    lines = [f"{'benchmark':<44}{'metric':>14}{'old':>14}{'new':>14}{'change':>10}"]
+    for name, metric, before, after, change in rows:
+        flag = '  REGRESSION' if name in regressions else ''
+        lines.append(f"{name:<44}{metric:>14}{before:>14.4f}{after:>14.4f}{change:>+10.1%}{flag}")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark strategies, backtester, database and API')
+    parser.add_argument('--only', nargs='+', choices=GROUPS, default=list(GROUPS))
+    parser.add_argument('--quick', action='store_true', help='smaller sizes for a fast check')
+    parser.add_argument('--backtest-sizes', type=int, nargs='+')
+    parser.add_argument('--backtest-timeout', type=float, default=600, help='seconds per backtest size')
+    parser.add_argument('--api-url', help='benchmark a running server instead of starting one')
+    parser.add_argument('--api-token', help='bearer token for authenticated paths')
+    parser.add_argument('--api-paths', nargs='+')
+    parser.add_argument('--output', help='results file (default data/benchmarks/<time>-<commit>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='diff two saved results and exit')
+    parser.add_argument('--threshold', type=float, default=0.1, help='relative change flagged as a regression')
+    args = parser.parse_args()
+
+    if args.compare:
+        old, new = (json.loads(Path(path).read_text()) for path in args.compare)
+        rows, regressions = compare(old, new, args.threshold)
+        print(format_comparison(rows, regressions))
+        return 1 if regressions else 0
+
+    logging.basicConfig(level=logging.CRITICAL)
+    report = run(args.only, args.quick, args.backtest_sizes, args.backtest_timeout, args.api_url, args.api_token,
+                 args.api_paths)
+    path = save(report, args.output)
+    print(json.dumps(report, indent=2))
+    print(f"Results saved to {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
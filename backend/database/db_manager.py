@@ -3,12 +3,26 @@ Database Manager
 Handle trade storage and retrieval
 """
 
+import enum
 import logging
 import sqlite3
 import json
 from datetime import datetime
 from pathlib import Path
 
+from sqlalchemy import inspect
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.orm import configure_mappers
+from sqlalchemy.schema import CreateTable
+
+from models.user import User, UserSession
+from utils import metrics
+
+DB_WRITE_SECONDS = metrics.histogram('tradingbot_db_write_seconds', 'Database write latency', ['operation'])
+
+# User columns written only by the trading engine (update_user skips them)
+ENGINE_COLUMNS = ('paper_balance',)
+
 
 class DatabaseManager:
     """Manage trade database operations"""
@@ -53,10 +67,20 @@ class DatabaseManager:
                 close_timestamp TEXT,
                 pnl REAL,
                 pnl_percent REAL,
-                close_reason TEXT
+                close_reason TEXT,
+                fees REAL DEFAULT 0,
+                user_id INTEGER
             )
         ''')
         
+        # Databases created before fees were simulated or trades were per user
+        columns = {row[1] for row in cursor.execute('PRAGMA table_info(trades)')}
+        if 'fees' not in columns:
+            cursor.execute('ALTER TABLE trades ADD COLUMN fees REAL DEFAULT 0')
+        if 'user_id' not in columns:
+            cursor.execute('ALTER TABLE trades ADD COLUMN user_id INTEGER')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_trades_user_status ON trades (user_id, status)')
+        
         # Create performance table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS performance (
@@ -70,11 +94,51 @@ class DatabaseManager:
             )
         ''')
         
+        # Create equity history table (sampled account equity for charts)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS equity_history (
+                timestamp TEXT NOT NULL,
+                equity REAL NOT NULL,
+                balance REAL NOT NULL,
+                unrealized_pnl REAL NOT NULL
+            )
+        ''')
+        cursor.execute(
+            'CREATE INDEX IF NOT EXISTS idx_equity_history_timestamp ON equity_history (timestamp)'
+        )
+        
+        # Create users and user_sessions tables (schema from the models)
+        for model in (User, UserSession):
+            table = model.__table__
+            cursor.execute(str(CreateTable(table, if_not_exists=True).compile(dialect=sqlite.dialect())))
+            
+            # Tables created before later model columns (e.g. alert settings)
+            columns = {row[1] for row in cursor.execute(f'PRAGMA table_info({table.name})')}
+            for column in table.columns:
+                if column.key not in columns:
+                    column_type = column.type.compile(dialect=sqlite.dialect())
+                    cursor.execute(f'ALTER TABLE {table.name} ADD COLUMN {column.key} {column_type}')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_user_sessions_user ON user_sessions (user_id)')
+        
+        # Create payments table (one row per provider payment, for revenue)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS payments (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                amount REAL NOT NULL,
+                currency TEXT,
+                provider TEXT NOT NULL,
+                reference TEXT UNIQUE,
+                timestamp TEXT NOT NULL
+            )
+        ''')
+        
         conn.commit()
         conn.close()
         
         self.logger.info(f"✓ Database initialized: {self.db_path}")
     
+    @DB_WRITE_SECONDS.labels('save_trade').time()
     def save_trade(self, trade):
         """Save a trade to database"""
         try:
@@ -84,8 +148,8 @@ class DatabaseManager:
             cursor.execute('''
                 INSERT INTO trades (
                     id, pair, action, size, entry_price, current_price,
-                    stop_loss, take_profit, strategy, status, timestamp, pnl, pnl_percent
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    stop_loss, take_profit, strategy, status, timestamp, pnl, pnl_percent, fees, user_id
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 trade['id'],
                 trade['pair'],
@@ -99,7 +163,9 @@ class DatabaseManager:
                 trade['status'],
                 trade['timestamp'].isoformat(),
                 trade.get('pnl', 0),
-                trade.get('pnl_percent', 0)
+                trade.get('pnl_percent', 0),
+                trade.get('fees', 0),
+                trade.get('user_id')
             ))
             
             conn.commit()
@@ -108,6 +174,7 @@ class DatabaseManager:
         except Exception as e:
             self.logger.error(f"Error saving trade: {e}", exc_info=True)
     
+    @DB_WRITE_SECONDS.labels('update_trade').time()
     def update_trade(self, trade):
         """Update an existing trade"""
         try:
@@ -116,15 +183,18 @@ class DatabaseManager:
             
             cursor.execute('''
                 UPDATE trades SET
+                    size = ?,
                     exit_price = ?,
                     current_price = ?,
                     status = ?,
                     close_timestamp = ?,
                     pnl = ?,
                     pnl_percent = ?,
-                    close_reason = ?
+                    close_reason = ?,
+                    fees = ?
                 WHERE id = ?
             ''', (
+                trade['size'],
                 trade.get('exit_price'),
                 trade.get('current_price'),
                 trade['status'],
@@ -132,6 +202,7 @@ class DatabaseManager:
                 trade.get('pnl', 0),
                 trade.get('pnl_percent', 0),
                 trade.get('close_reason'),
+                trade.get('fees', 0),
                 trade['id']
             ))
             
@@ -141,17 +212,44 @@ class DatabaseManager:
         except Exception as e:
             self.logger.error(f"Error updating trade: {e}", exc_info=True)
     
-    def get_open_positions(self, pair=None):
-        """Get all open positions, optionally filtered by pair"""
+    @DB_WRITE_SECONDS.labels('update_marks').time()
+    def update_marks(self, marks):
+        """
+        Persist mark-to-market values for many open positions in one transaction
+        
+        Args:
+            marks: Iterable of (current_price, pnl, pnl_percent, trade_id)
+        """
+        try:
+            conn = sqlite3.connect(str(self.db_path))
+            cursor = conn.cursor()
+            
+            cursor.executemany(
+                "UPDATE trades SET current_price = ?, pnl = ?, pnl_percent = ? WHERE id = ? AND status = 'open'",
+                marks
+            )
+            
+            conn.commit()
+            conn.close()
+            
+        except Exception as e:
+            self.logger.error(f"Error updating position marks: {e}", exc_info=True)
+    
+    def get_open_positions(self, pair=None, user_id=None):
+        """Get all open positions, optionally filtered by pair and/or user"""
         try:
             conn = sqlite3.connect(str(self.db_path))
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
+            query, params = 'SELECT * FROM trades WHERE status = ?', ['open']
             if pair:
-                cursor.execute('SELECT * FROM trades WHERE status = ? AND pair = ?', ('open', pair))
-            else:
-                cursor.execute('SELECT * FROM trades WHERE status = ?', ('open',))
+                query += ' AND pair = ?'
+                params.append(pair)
+            if user_id is not None:
+                query += ' AND user_id = ?'
+                params.append(int(user_id))
+            cursor.execute(query, params)
             
             rows = cursor.fetchall()
             conn.close()
@@ -170,17 +268,23 @@ class DatabaseManager:
         """Get all open positions"""
         return self.get_open_positions()
     
-    def get_trade_history(self, limit=100):
-        """Get trade history"""
+    def get_trade_history(self, limit=100, user_id=None):
+        """Get trade history, optionally for one user"""
         try:
             conn = sqlite3.connect(str(self.db_path))
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
-            cursor.execute(
-                'SELECT * FROM trades ORDER BY timestamp DESC LIMIT ?',
-                (limit,)
-            )
+            if user_id is not None:
+                cursor.execute(
+                    'SELECT * FROM trades WHERE user_id = ? ORDER BY timestamp DESC LIMIT ?',
+                    (int(user_id), limit)
+                )
+            else:
+                cursor.execute(
+                    'SELECT * FROM trades ORDER BY timestamp DESC LIMIT ?',
+                    (limit,)
+                )
             
             rows = cursor.fetchall()
             conn.close()
@@ -195,14 +299,14 @@ class DatabaseManager:
             self.logger.error(f"Error fetching trade history: {e}")
             return []
     
-    def get_performance_stats(self):
-        """Get overall performance statistics"""
+    def get_performance_stats(self, user_id=None):
+        """Get overall performance statistics, optionally for one user"""
         try:
             conn = sqlite3.connect(str(self.db_path))
             cursor = conn.cursor()
             
             # Get total stats
-            cursor.execute('''
+            query = '''
                 SELECT 
                     COUNT(*) as total_trades,
                     SUM(CASE WHEN pnl > 0 THEN 1 ELSE 0 END) as winning_trades,
@@ -211,7 +315,11 @@ class DatabaseManager:
                     AVG(CASE WHEN pnl < 0 THEN pnl ELSE NULL END) as avg_loss
                 FROM trades
                 WHERE status = 'closed'
-            ''')
+            '''
+            if user_id is not None:
+                cursor.execute(query + ' AND user_id = ?', (int(user_id),))
+            else:
+                cursor.execute(query)
             
             row = cursor.fetchone()
             conn.close()
@@ -238,6 +346,316 @@ class DatabaseManager:
             self.logger.error(f"Error fetching performance stats: {e}")
             return {}
     
+    def get_realized_pnl_since(self, since):
+        """Sum of P&L of trades closed at or after `since`"""
+        try:
+            conn = sqlite3.connect(str(self.db_path))
+            cursor = conn.cursor()
+            
+            cursor.execute(
+                "SELECT SUM(pnl) FROM trades WHERE status = 'closed' AND close_timestamp >= ?",
+                (since.isoformat(),)
+            )
+            
+            row = cursor.fetchone()
+            conn.close()
+            
+            return row[0] or 0.0
+            
+        except Exception as e:
+            self.logger.error(f"Error fetching realized P&L: {e}")
+            return 0.0
+    
+    @DB_WRITE_SECONDS.labels('save_equity_point').time()
+    def save_equity_point(self, timestamp, equity, balance, unrealized_pnl=0):
+        """Record one sample of account equity"""
+        try:
+            conn = sqlite3.connect(str(self.db_path))
+            cursor = conn.cursor()
+            
+            cursor.execute(
+                'INSERT INTO equity_history (timestamp, equity, balance, unrealized_pnl) VALUES (?, ?, ?, ?)',
+                (timestamp.isoformat(), equity, balance, unrealized_pnl)
+            )
+            
+            conn.commit()
+            conn.close()
+            
+        except Exception as e:
+            self.logger.error(f"Error saving equity point: {e}")
+    
+    def get_equity_history(self, since=None):
+        """
+        Get the stored equity series in time order
+        
+        Args:
+            since: Optional datetime; only samples at or after it
+            
+        Returns:
+            tuple: (timestamps, equity) lists of ISO strings and floats
+        """
+        try:
+            conn = sqlite3.connect(str(self.db_path))
+            cursor = conn.cursor()
+            
+            if since:
+                cursor.execute(
+                    'SELECT timestamp, equity FROM equity_history WHERE timestamp >= ? ORDER BY timestamp',
+                    (since.isoformat(),)
+                )
+            else:
+                cursor.execute('SELECT timestamp, equity FROM equity_history ORDER BY timestamp')
+            
+            rows = cursor.fetchall()
+            conn.close()
+            
+            if not rows:
+                return [], []
+            timestamps, equity = zip(*rows)
+            return list(timestamps), list(equity)
+            
+        except Exception as e:
+            self.logger.error(f"Error fetching equity history: {e}")
+            return [], []
+    
+    # ==================== USERS ====================
+    
+    def create_user(self, user):
+        """Insert a new user and set its id"""
+        values = _model_values(user, fill_defaults=True)
+        values.pop('id', None)
+        
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"INSERT INTO users ({', '.join(values)}) VALUES ({', '.join('?' * len(values))})",
+                list(values.values())
+            )
+            conn.commit()
+            user.id = cursor.lastrowid
+        finally:
+            conn.close()
+        
+        return user
+    
+    def _get_user_where(self, column, value):
+        try:
+            conn = sqlite3.connect(str(self.db_path))
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            
+            cursor.execute(f'SELECT * FROM users WHERE {column} = ?', (value,))
+            row = cursor.fetchone()
+            conn.close()
+            
+            return _row_to_model(row) if row else None
+            
+        except Exception as e:
+            self.logger.error(f"Error fetching user by {column}: {e}")
+            return None
+    
+    def get_user_by_id(self, user_id):
+        """Get a user by id (None if missing)"""
+        return self._get_user_where('id', int(user_id))
+    
+    def get_user_by_username(self, username):
+        """Get a user by username (None if missing)"""
+        return self._get_user_where('username', username)
+    
+    def get_user_by_email(self, email):
+        """Get a user by email (None if missing)"""
+        return self._get_user_where('email', email)
+    
+    def get_all_users(self):
+        """Get every user, oldest first"""
+        try:
+            conn = sqlite3.connect(str(self.db_path))
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            
+            cursor.execute('SELECT * FROM users ORDER BY id')
+            rows = cursor.fetchall()
+            conn.close()
+            
+            return [_row_to_model(row) for row in rows]
+            
+        except Exception as e:
+            self.logger.error(f"Error fetching users: {e}")
+            return []
+    
+    @DB_WRITE_SECONDS.labels('update_user').time()
+    def update_user(self, user):
+        """
+        Write the columns of an existing user (raises on failure so callers can react)
+        
+        Columns the trading engine maintains are left alone, so a stale copy
+        from an API cache can't roll them back.
+        """
+        user.updated_at = datetime.utcnow()
+        values = _model_values(user)
+        user_id = values.pop('id')
+        for column in ENGINE_COLUMNS:
+            values.pop(column, None)
+        
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            conn.execute(
+                f"UPDATE users SET {', '.join(f'{column} = ?' for column in values)} WHERE id = ?",
+                list(values.values()) + [user_id]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    
+    @DB_WRITE_SECONDS.labels('update_paper_balance').time()
+    def update_paper_balance(self, user_id, balance):
+        """Store a user's paper balance (owned by the trading engine, see ENGINE_COLUMNS)"""
+        try:
+            conn = sqlite3.connect(str(self.db_path))
+            conn.execute('UPDATE users SET paper_balance = ? WHERE id = ?', (balance, user_id))
+            conn.commit()
+            conn.close()
+            
+        except Exception as e:
+            self.logger.error(f"Error updating paper balance: {e}")
+    
+    def update_user_last_login(self, user_id):
+        """Stamp a user's last login time"""
+        try:
+            conn = sqlite3.connect(str(self.db_path))
+            conn.execute('UPDATE users SET last_login = ? WHERE id = ?', (datetime.utcnow().isoformat(), user_id))
+            conn.commit()
+            conn.close()
+            
+        except Exception as e:
+            self.logger.error(f"Error updating last login: {e}")
+    
+    # ==================== SESSIONS ====================
+    
+    def create_session(self, session):
+        """Insert a login session and set its id"""
+        values = _model_values(session, fill_defaults=True)
+        values.pop('id', None)
+        
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"INSERT INTO user_sessions ({', '.join(values)}) VALUES ({', '.join('?' * len(values))})",
+                list(values.values())
+            )
+            conn.commit()
+            session.id = cursor.lastrowid
+        finally:
+            conn.close()
+        
+        return session
+    
+    def get_session_by_token(self, token):
+        """Get a session by its access token (None if missing)"""
+        try:
+            conn = sqlite3.connect(str(self.db_path))
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            
+            cursor.execute('SELECT * FROM user_sessions WHERE token = ?', (token,))
+            row = cursor.fetchone()
+            conn.close()
+            
+            return _row_to_model(row, UserSession) if row else None
+            
+        except Exception as e:
+            self.logger.error(f"Error fetching session: {e}")
+            return None
+    
+    def invalidate_session(self, session_id):
+        """Mark one session inactive"""
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            conn.execute('UPDATE user_sessions SET is_active = 0 WHERE id = ?', (int(session_id),))
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def invalidate_all_user_sessions(self, user_id):
+        """Mark every session of a user inactive (e.g. after a password change)"""
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            conn.execute('UPDATE user_sessions SET is_active = 0 WHERE user_id = ?', (int(user_id),))
+            conn.commit()
+        finally:
+            conn.close()
+    
+    # ==================== PLATFORM AGGREGATES ====================
+    
+    def _scalar(self, query, params=()):
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            row = conn.execute(query, params).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+    
+    def get_total_users(self):
+        """Number of registered users"""
+        return self._scalar('SELECT COUNT(*) FROM users') or 0
+    
+    def get_active_traders_count(self):
+        """Number of users with auto trading switched on"""
+        return self._scalar('SELECT COUNT(*) FROM users WHERE auto_trading_enabled = 1') or 0
+    
+    def get_trades_count_today(self, user_id=None):
+        """Number of trades opened since midnight (trade timestamps are local time)"""
+        midnight = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        if user_id is not None:
+            return self._scalar(
+                'SELECT COUNT(*) FROM trades WHERE timestamp >= ? AND user_id = ?', (midnight.isoformat(), int(user_id))
+            ) or 0
+        return self._scalar('SELECT COUNT(*) FROM trades WHERE timestamp >= ?', (midnight.isoformat(),)) or 0
+    
+    def get_total_revenue(self):
+        """Sum of all recorded payments"""
+        return self._scalar('SELECT SUM(amount) FROM payments') or 0.0
+    
+    def get_subscription_breakdown(self):
+        """Users per subscription tier, e.g. {'free': 10, 'pro': 2}"""
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            rows = conn.execute(
+                "SELECT COALESCE(subscription_tier, 'free'), COUNT(*) FROM users GROUP BY 1"
+            ).fetchall()
+        finally:
+            conn.close()
+        return {tier: count for tier, count in rows}
+    
+    @DB_WRITE_SECONDS.labels('record_payment').time()
+    def record_payment(self, amount, provider, reference=None, currency=None, user_id=None):
+        """
+        Record a received payment
+        
+        Returns:
+            bool: False when `reference` was already recorded (e.g. a retried webhook)
+        """
+        try:
+            conn = sqlite3.connect(str(self.db_path))
+            cursor = conn.cursor()
+            
+            cursor.execute(
+                'INSERT OR IGNORE INTO payments (user_id, amount, currency, provider, reference, timestamp) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (user_id, amount, currency, provider, reference, datetime.utcnow().isoformat())
+            )
+            inserted = cursor.rowcount > 0
+            
+            conn.commit()
+            conn.close()
+            return inserted
+            
+        except Exception as e:
+            self.logger.error(f"Error recording payment: {e}")
+            return False
+    
     def clear_database(self):
         """Clear all trades (use with caution!)"""
         try:
@@ -246,6 +664,7 @@ class DatabaseManager:
             
             cursor.execute('DELETE FROM trades')
             cursor.execute('DELETE FROM performance')
+            cursor.execute('DELETE FROM equity_history')
             
             conn.commit()
             conn.close()
@@ -254,3 +673,41 @@ class DatabaseManager:
             
         except Exception as e:
             self.logger.error(f"Error clearing database: {e}")
+
+
+# ==================== MODEL ROWS ====================
+
+def _model_values(instance, fill_defaults=False):
+    """Column -> SQLite value for a User or UserSession (enums by value, datetimes as ISO strings)"""
+    values = {}
+    for column in type(instance).__table__.columns:
+        value = getattr(instance, column.key, None)
+        if value is None and fill_defaults and column.default is not None:
+            default = column.default
+            value = default.arg(None) if default.is_callable else default.arg
+        if isinstance(value, enum.Enum):
+            value = value.value
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        values[column.key] = value
+    return values
+
+
+def _row_to_model(row, model=User):
+    """Detached model instance (a User by default) from a table row"""
+    configure_mappers()
+    instance = inspect(model).class_manager.new_instance()
+    data = {}
+    for column in model.__table__.columns:
+        value = row[column.key] if column.key in row.keys() else None
+        if value is not None:
+            enum_class = getattr(column.type, 'enum_class', None)
+            if enum_class is not None:
+                value = enum_class(value)
+            elif column.type.python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif column.type.python_type is bool:
+                value = bool(value)
+        data[column.key] = value
+    instance.__dict__.update(data)
+    return instance
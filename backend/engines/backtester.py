@@ -8,6 +8,8 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
+from engines.fill_model import create_fill_model
+
 
 class Backtester:
     """Backtest trading strategies on historical data"""
@@ -22,6 +24,14 @@ class Backtester:
         self.start_date = bt_config['start_date']
         self.end_date = bt_config['end_date']
         self.initial_balance = bt_config['initial_balance']
+        self.data_source = bt_config.get('data_source', 'feed')
+        
+        # Seeded so repeated runs produce the same trades
+        self.rng = np.random.default_rng(bt_config.get('seed', 0))
+        self._synthetic = None
+        
+        # Same execution cost model as paper trading
+        self.fill_model = create_fill_model(config)
         
         # Results tracking
         self.trades = []
@@ -74,14 +84,17 @@ class Backtester:
                 signal = strategy.generate_signal(data_window)
                 
                 if signal['action'] != 'hold':
-                    self._execute_backtest_trade(
-                        pair,
-                        signal,
-                        historical_data.iloc[i]['close']
-                    )
+                    exit_candle = historical_data.iloc[i + 1] if i + 1 < len(historical_data) else None
+                    order = self._size_backtest_trade(pair, signal, historical_data.iloc[i], exit_candle)
+                    if order:
+                        # Settle before the next signal so it is sized from the updated balance
+                        self._settle_backtest_trades([order])
     
     def _fetch_historical_data(self, pair):
         """Fetch or generate historical data"""
+        if self.data_source == 'synthetic':
+            return self._synthetic_data(pair)
+        
         # In production, fetch from data feed
         # For demo, generate sample data
         from engines.data_feed import DataFeed
@@ -91,9 +104,20 @@ class Backtester:
         
         return data
     
-    def _execute_backtest_trade(self, pair, signal, price):
-        """Execute a trade in backtest"""
-        # Simple backtesting logic
+    def _synthetic_data(self, pair):
+        """Offline, seeded candles for every pair from the 'synthetic_data' config section"""
+        if self._synthetic is None:
+            from engines.synthetic_data import create_market
+            
+            synthetic_config = self.config.get('synthetic_data', {})
+            market = create_market(self.config)
+            self._synthetic = market.frames(synthetic_config.get('bars', 500))
+        
+        return self._synthetic.get(pair)
+    
+    def _size_backtest_trade(self, pair, signal, candle, exit_candle=None):
+        """Size a signal into an order from the current balance"""
+        price = candle['close']
         risk_per_trade = self.balance * 0.01  # 1% risk
         
         # Calculate position size
@@ -108,41 +132,76 @@ class Backtester:
         position_size = min(position_size, max_position_value / price)
         
         if position_size <= 0:
-            return
+            return None
         
-        # Record trade
-        trade = {
+        return {
             'pair': pair,
             'action': signal['action'],
             'strategy': signal['strategy'],
-            'entry_price': price,
+            'price': price,
+            'volume': candle.get('volume', np.nan),
+            'exit_volume': exit_candle.get('volume', np.nan) if exit_candle is not None else np.nan,
             'size': position_size,
             'stop_loss': signal.get('stop_loss'),
             'take_profit': signal.get('take_profit'),
             'timestamp': datetime.now()
         }
-        
-        # Simulate exit (simplified)
-        if signal.get('take_profit'):
-            exit_price = signal['take_profit']
-        elif signal.get('stop_loss'):
-            # Random exit between stop and take profit
-            exit_price = price * np.random.uniform(0.99, 1.03)
-        else:
-            exit_price = price * 1.02  # Default 2% profit
-        
-        # Calculate P&L
-        if signal['action'] == 'buy':
-            pnl = (exit_price - price) * position_size
-        else:
-            pnl = (price - exit_price) * position_size
-        
-        trade['exit_price'] = exit_price
-        trade['pnl'] = pnl
-        
-        self.balance += pnl
-        self.trades.append(trade)
-        self.equity_curve.append(self.balance)
+    
+    def _settle_backtest_trades(self, orders):
+        """Apply entry and exit fills to an array of orders and record the trades"""
+        prices = np.array([o['price'] for o in orders], dtype=float)
+        sizes = np.array([o['size'] for o in orders], dtype=float)
+        volumes = np.array([o['volume'] for o in orders], dtype=float)
+        exit_volumes = np.array([o['exit_volume'] for o in orders], dtype=float)
+        sides = np.array([1.0 if o['action'] == 'buy' else -1.0 for o in orders])
+        take_profit = np.array([o['take_profit'] or np.nan for o in orders], dtype=float)
+        has_stop = np.array([bool(o['stop_loss']) for o in orders])
+        
+        entry_fill = self.fill_model.fill_many(sides, sizes, prices, volumes)
+        
+        # Simulate exit (simplified): take profit, else random between stop and target, else +2%
+        exit_reference = np.where(
+            np.isfinite(take_profit),
+            take_profit,
+            np.where(has_stop, prices * self.rng.uniform(0.99, 1.03, len(orders)), prices * 1.02)
+        )
+        # Exits are bounded by the next bar's volume; whatever it can't absorb
+        # leaves on later bars, paying the spread but no further impact
+        exit_fill = self.fill_model.fill_many(-sides, entry_fill.filled_size, exit_reference, exit_volumes)
+        rest = entry_fill.filled_size - exit_fill.filled_size
+        rest_fill = self.fill_model.fill_many(-sides, rest, exit_reference)
+        exit_price = np.divide(
+            exit_fill.fill_price * exit_fill.filled_size + rest_fill.fill_price * rest,
+            entry_fill.filled_size,
+            out=exit_fill.fill_price.copy(),
+            where=entry_fill.filled_size > 0
+        )
+        exit_fee = exit_fill.fee + rest_fill.fee
+        exit_slippage = exit_fill.slippage + rest_fill.slippage
+        
+        # Calculate P&L net of fees
+        pnl = (exit_price - entry_fill.fill_price) * entry_fill.filled_size * sides - entry_fill.fee - exit_fee
+        
+        for index in np.flatnonzero(entry_fill.filled_size > 0):
+            order = orders[index]
+            trade = {
+                'pair': order['pair'],
+                'action': order['action'],
+                'strategy': order['strategy'],
+                'entry_price': float(entry_fill.fill_price[index]),
+                'size': float(entry_fill.filled_size[index]),
+                'stop_loss': order['stop_loss'],
+                'take_profit': order['take_profit'],
+                'timestamp': order['timestamp'],
+                'exit_price': float(exit_price[index]),
+                'fees': float(entry_fill.fee[index] + exit_fee[index]),
+                'slippage': float(entry_fill.slippage[index] + exit_slippage[index]),
+                'pnl': float(pnl[index])
+            }
+            
+            self.balance += trade['pnl']
+            self.trades.append(trade)
+            self.equity_curve.append(self.balance)
     
     def _calculate_results(self):
         """Calculate backtest performance metrics"""
@@ -182,6 +241,8 @@ class Backtester:
             'return_percent': ((self.balance - self.initial_balance) / self.initial_balance) * 100,
             'max_drawdown': max_drawdown,
             'sharpe_ratio': sharpe_ratio,
+            'total_fees': sum(t['fees'] for t in self.trades),
+            'total_slippage': sum(t['slippage'] for t in self.trades),
             'avg_win': np.mean([t['pnl'] for t in self.trades if t['pnl'] > 0]) if winning_trades > 0 else 0,
             'avg_loss': np.mean([t['pnl'] for t in self.trades if t['pnl'] < 0]) if (total_trades - winning_trades) > 0 else 0
         }
@@ -0,0 +1,367 @@
+"""
+Bracket Manager
+Stop-loss / take-profit exits as native exchange orders or tick-driven internal triggers
+"""
+
+import hashlib
+import heapq
+import itertools
+import logging
+import threading
+
+from utils.event_bus import TRADE_UPDATE, ORDER_UPDATE
+
+# Client order id prefixes of native legs (ids are derived from the position, see _leg_id)
+LEG_PREFIXES = {'stop_loss': 'tbsl', 'take_profit': 'tbtp'}
+
+
+def _leg_stem(position_id, reason):
+    """Same for the same position and leg in every run, so a restart finds legs it already placed"""
+    digest = hashlib.sha1(f"{position_id}:{reason}".encode()).hexdigest()
+    return LEG_PREFIXES[reason] + digest[:26]
+
+
+def _leg_id(position_id, reason, placement):
+    # Two digits count re-placements, so a leg placed again never reuses a tracked id
+    return f"{_leg_stem(position_id, reason)}{placement % 100:02d}"
+
+
+class TriggerBook:
+    """
+    Price-ordered stop and target levels per pair
+
+    Levels that fire when price falls (long stops, short targets) sit in a
+    max-heap, levels that fire when price rises in a min-heap, so checking a
+    price only touches levels that actually trigger. Both legs of a bracket
+    are one-cancels-other: when either fires the position's entries are
+    dropped (lazily, when they reach the top of their heap).
+    """
+
+    def __init__(self):
+        self.below = {}     # pair -> [(-level, token, position_id, reason)]
+        self.above = {}     # pair -> [(level, token, position_id, reason)]
+        self.active = {}    # position_id -> (pair, token, armed bar); stale heap entries have older tokens
+        self._tokens = itertools.count()
+
+    def add(self, position_id, pair, action, stop_loss=None, take_profit=None, armed_bar=None):
+        """
+        Arm a bracket; `action` is the entry side ('buy' = long)
+
+        `armed_bar` is the open time of the candle in progress when the
+        position opened; bar checks skip that candle and earlier ones.
+        """
+        self.remove(position_id)
+        if not stop_loss and not take_profit:
+            return
+
+        token = next(self._tokens)
+        below = self.below.setdefault(pair, [])
+        above = self.above.setdefault(pair, [])
+        falling, rising = ('stop_loss', 'take_profit') if action == 'buy' else ('take_profit', 'stop_loss')
+        levels = {'stop_loss': stop_loss, 'take_profit': take_profit}
+
+        if levels[falling]:
+            heapq.heappush(below, (-levels[falling], token, position_id, falling))
+        if levels[rising]:
+            heapq.heappush(above, (levels[rising], token, position_id, rising))
+        self.active[position_id] = (pair, token, armed_bar)
+
+    def remove(self, position_id):
+        entry = self.active.pop(position_id, None)
+        if entry is None:
+            return
+
+        # Drop dead entries once they dominate a pair's heaps
+        pair = entry[0]
+        live = sum(1 for other_pair, _, _ in self.active.values() if other_pair == pair)
+        for heaps in (self.below, self.above):
+            heap = heaps.get(pair, [])
+            if len(heap) > 4 * live + 64:
+                heaps[pair] = [item for item in heap if self._live(item)]
+                heapq.heapify(heaps[pair])
+
+    def _live(self, item):
+        _, token, position_id, _ = item
+        entry = self.active.get(position_id)
+        return entry is not None and entry[1] == token
+
+    def __len__(self):
+        return len(self.active)
+
+    def pairs(self):
+        return {pair for pair, _, _ in self.active.values()}
+
+    def _armed_before(self, item, bar_opened):
+        armed_bar = self.active[item[2]][2]
+        return bar_opened is None or armed_bar is None or armed_bar < bar_opened
+
+    def check(self, pair, low, high=None, bar_opened=None):
+        """
+        Fire brackets touched by a price (or a bar's low/high range)
+
+        Args:
+            bar_opened: Open time of the bar whose range is checked; brackets
+                armed during or after that bar are left alone
+
+        Returns:
+            list: (position_id, reason, level) for each fired bracket; if a bar
+            reaches both legs of one bracket the stop is assumed to fill first
+        """
+        high = low if high is None else high
+        fired = {}
+        deferred = []
+
+        below = self.below.get(pair, [])
+        while below and -below[0][0] >= low:
+            item = heapq.heappop(below)
+            if not self._live(item):
+                continue
+            if not self._armed_before(item, bar_opened):
+                deferred.append((below, item))
+            elif item[2] not in fired:
+                fired[item[2]] = (item[3], -item[0])
+
+        above = self.above.get(pair, [])
+        while above and above[0][0] <= high:
+            item = heapq.heappop(above)
+            if not self._live(item):
+                continue
+            if not self._armed_before(item, bar_opened):
+                deferred.append((above, item))
+            elif item[2] not in fired or item[3] == 'stop_loss':
+                fired[item[2]] = (item[3], item[0])
+
+        for heap, item in deferred:
+            heapq.heappush(heap, item)
+        for position_id in fired:
+            self.active.pop(position_id, None)
+        return [(position_id, reason, level) for position_id, (reason, level) in fired.items()]
+
+
+class BracketManager:
+    """
+    Keeps every open position's stop-loss and take-profit armed
+
+    In live mode on an exchange with native stop-loss and take-profit
+    orders, both legs are placed on the exchange and linked here: when one
+    fills the other is cancelled and the position is closed at the fill
+    price. Otherwise (paper mode or no native support) brackets go into a
+    TriggerBook checked on every streamed price and on each candle's
+    high/low, so exits happen within one price tick instead of on the next
+    trading loop.
+    """
+
+    def __init__(self, config, order_executor, data_feed=None, event_bus=None):
+        """
+        Args:
+            config: Bot configuration; reads the optional 'brackets' section
+            order_executor: OrderExecutor owning the positions (and live pipeline)
+            data_feed: Price source for the internal trigger stream
+            event_bus: EventBus carrying TRADE_UPDATE / ORDER_UPDATE
+        """
+        bracket_config = config.get('brackets', {})
+        self.logger = logging.getLogger(__name__)
+        self.executor = order_executor
+        self.data_feed = data_feed
+        self.tick_interval = bracket_config.get('tick_interval', 1.0)
+
+        pipeline = order_executor.pipeline
+        has = getattr(pipeline.exchange, 'has', {}) if pipeline else {}
+        self.native = bool(
+            bracket_config.get('native', True) and pipeline
+            and has.get('createStopLossOrder') and has.get('createTakeProfitOrder')
+        )
+
+        self.triggers = TriggerBook()
+        self.current_bar = {}       # pair -> open time of the latest candle seen
+        self.native_legs = {}       # client order id -> (position_id, 'stop_loss' | 'take_profit')
+        self.position_legs = {}     # position_id -> [LiveOrder]
+        self.placements = {}        # position_id -> native leg placements so far
+        self.resting_legs = {}      # leg stem -> exchange order left by an earlier run
+        self._lock = threading.RLock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        positions = order_executor.get_open_positions()
+        if self.native:
+            crypto_pairs = config.get('markets', {}).get('crypto', {}).get('pairs', [])
+            self._find_resting_legs(positions, set(crypto_pairs) | {position['pair'] for position in positions})
+        for position in positions:
+            self.attach(position)
+        self.resting_legs.clear()
+
+        if event_bus is not None:
+            event_bus.subscribe(TRADE_UPDATE, self._on_trade)
+            event_bus.subscribe(ORDER_UPDATE, self._on_order)
+
+    # ==================== ARMING ====================
+
+    def _on_trade(self, event_type, payload):
+        if payload.get('status') == 'open':
+            position = self._find(payload['pair'], payload['id'])
+            if position is not None:
+                self.attach(position)
+        elif payload.get('status') == 'closed':
+            self.detach(payload['id'])
+
+    def attach(self, position):
+        """Arm the position's stop-loss and take-profit"""
+        if not position.get('stop_loss') and not position.get('take_profit'):
+            return
+        with self._lock:
+            if self.native:
+                self._place_native(position)
+            else:
+                self.triggers.add(position['id'], position['pair'], position['action'],
+                                  position.get('stop_loss'), position.get('take_profit'),
+                                  armed_bar=self.current_bar.get(position['pair']))
+
+    def detach(self, position_id):
+        """Disarm a position closed by other means"""
+        with self._lock:
+            self.triggers.remove(position_id)
+            self.placements.pop(position_id, None)
+            for leg in self.position_legs.pop(position_id, []):
+                self.native_legs.pop(leg.client_order_id, None)
+                if not leg.done:
+                    self.executor.pipeline.cancel(leg)
+
+    def _find_resting_legs(self, positions, pairs):
+        """
+        Collect legs still on the exchange from an earlier run, before any are placed
+
+        Legs of these positions are adopted instead of placed again; legs in
+        `pairs` whose position has since closed are cancelled.
+        """
+        pipeline = self.executor.pipeline
+        expected = {_leg_stem(position['id'], reason)
+                    for position in positions for reason in LEG_PREFIXES if position.get(reason)}
+        for pair in pairs:
+            try:
+                open_orders = pipeline.open_orders(pair)
+            except Exception as e:
+                # Legs are placed anyway: an unprotected position is worse than a duplicate leg
+                self.logger.error(f"Could not fetch open orders for {pair}, placing its legs again: {e}")
+                continue
+            for result in open_orders:
+                client_order_id = result.get('clientOrderId') or ''
+                if client_order_id[:-2] in expected:
+                    self.resting_legs[client_order_id[:-2]] = result
+                elif client_order_id.startswith(tuple(LEG_PREFIXES.values())):
+                    self.logger.info(f"Cancelling leg {client_order_id} of a position closed while stopped")
+                    pipeline.cancel(pipeline.adopt(result))
+
+    def _place_native(self, position):
+        if any(not leg.done for leg in self.position_legs.get(position['id'], [])):
+            return
+        pipeline = self.executor.pipeline
+        exit_side = 'sell' if position['action'] == 'buy' else 'buy'
+        placement = self.placements.get(position['id'], 0)
+        self.placements[position['id']] = placement + 1
+        legs = []
+        for reason, trigger_param in (('stop_loss', 'stopLossPrice'), ('take_profit', 'takeProfitPrice')):
+            if position.get(reason):
+                params = {trigger_param: position[reason], 'reduceOnly': True}
+                client_order_id = _leg_id(position['id'], reason, placement)
+                resting = self.resting_legs.pop(_leg_stem(position['id'], reason), None)
+                if resting is not None:
+                    leg = pipeline.adopt(resting, params)
+                else:
+                    leg = pipeline.submit(position['pair'], exit_side, position['size'], params=params,
+                                          client_order_id=client_order_id)
+                self.native_legs[leg.client_order_id] = (position['id'], reason)
+                legs.append(leg)
+        self.position_legs[position['id']] = legs
+
+    def _on_order(self, event_type, payload):
+        if payload['state'] != 'filled':
+            return
+        with self._lock:
+            link = self.native_legs.pop(payload['client_order_id'], None)
+            if link is None:
+                return
+            position_id, reason = link
+
+            # One fill cancels the other leg
+            for leg in self.position_legs.pop(position_id, []):
+                if leg.client_order_id != payload['client_order_id']:
+                    self.native_legs.pop(leg.client_order_id, None)
+                    self.executor.pipeline.cancel(leg)
+
+        position = self._find(payload['pair'], position_id)
+        if position is not None:
+            self.executor.close_position(position, payload['average'] or position['current_price'], reason,
+                                         submit=False)
+
+    # ==================== INTERNAL TRIGGERS ====================
+
+    def on_price(self, pair, price):
+        """A streamed price; exits fill at that price"""
+        self._fire(pair, price, price, at_level=False)
+
+    def on_candle(self, pair, high, low, opened=None):
+        """
+        A candle's range; exits fill at their trigger level
+
+        With the candle's open time, brackets armed while it was in progress
+        are not checked against it: its high and low may predate the entry.
+        """
+        with self._lock:
+            if opened is not None:
+                self.current_bar[pair] = opened
+        self._fire(pair, low, high, at_level=True, bar_opened=opened)
+
+    def _fire(self, pair, low, high, at_level, bar_opened=None):
+        with self._lock:
+            fired = self.triggers.check(pair, low, high, bar_opened)
+
+        for position_id, reason, level in fired:
+            position = self._find(pair, position_id)
+            if position is None:
+                continue
+            exit_price = level if at_level else low
+            closed = self.executor.close_position(position, exit_price, reason)
+            if position.get('exit_order'):
+                # Live exit sent: the position closes when it fills, and the executor
+                # republishes it as open (re-arming it here) if it doesn't
+                closed = position
+            elif position.get('status') == 'open':
+                # Exit not filled or only partly filled: keep the rest armed
+                self.attach(position)
+            if closed is None:
+                continue
+            icon = '🛑' if reason == 'stop_loss' else '💰'
+            self.logger.info(f"{icon} {reason.replace('_', '-').title()} triggered for {pair} @ ${exit_price:.2f}")
+
+    def _find(self, pair, position_id):
+        for position in self.executor.get_open_positions(pair):
+            if position['id'] == position_id:
+                return position
+        return None
+
+    def start(self):
+        """Stream prices for pairs with armed brackets"""
+        if self.native or self.data_feed is None:
+            return
+
+        def loop():
+            while not self._stopped.wait(self.tick_interval):
+                with self._lock:
+                    pairs = self.triggers.pairs()
+                for pair in pairs:
+                    # One failing pair or tick must not stop stop-loss checks for good
+                    try:
+                        price = self.data_feed.get_current_price(pair)
+                        if price:
+                            self.on_price(pair, price)
+                    except Exception as e:
+                        self.logger.error(f"Bracket price check for {pair} failed: {e}", exc_info=True)
+
+        self._thread = threading.Thread(target=loop, name='bracket-triggers', daemon=True)
+        self._thread.start()
+        self.logger.info(f"✓ Bracket triggers streaming every {self.tick_interval}s")
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(self.tick_interval * 2)
@@ -6,6 +6,8 @@ Handles real-time and historical market data from multiple sources
 import ccxt
 import pandas as pd
 import logging
+import time
+import zlib
 from datetime import datetime, timedelta
 
 try:
@@ -23,6 +25,8 @@ class DataFeed:
         self.logger = logging.getLogger(__name__)
         self.exchanges = {}
         self.mt5_initialized = False
+        self._sample_data = {}
+        self.exhausted = False  # live feeds never run out; see ReplayDataFeed
         
         # Initialize crypto exchanges
         if config['markets']['crypto']['enabled']:
@@ -123,7 +127,7 @@ class DataFeed:
         else:
             # Fallback: Generate sample data for demo purposes
             self.logger.warning(f"Using sample data for {symbol} (forex broker not connected)")
-            return self._generate_sample_data(limit)
+            return self._generate_sample_data(symbol, timeframe, limit)
     
     def _get_mt5_data(self, symbol, timeframe, limit):
         """Fetch data from MetaTrader5"""
@@ -160,27 +164,44 @@ class DataFeed:
             self.logger.error(f"Error fetching MT5 data: {e}")
             return None
     
-    def _generate_sample_data(self, limit):
-        """Generate sample OHLCV data for testing"""
-        import numpy as np
+    def _generate_sample_data(self, symbol, timeframe, limit):
+        """Seeded sample OHLCV data for testing (its last bar is the current one)"""
+        from engines.synthetic_data import _pandas_freq
         
-        # Generate realistic-looking price data
-        dates = pd.date_range(end=datetime.now(), periods=limit, freq='1H')
-        base_price = 100
+        key = (symbol, timeframe)
+        freq = pd.Timedelta(_pandas_freq(timeframe))
+        now = pd.Timestamp.now().floor(freq)
+        window = max(limit, self.config.get('synthetic_data', {}).get('bars', 1000))
+        cached = self._sample_data.get(key)
         
-        # Random walk
-        returns = np.random.normal(0, 0.02, limit)
-        prices = base_price * np.exp(np.cumsum(returns))
+        if cached is None or len(cached) < limit or now - cached.index[-1] >= window * freq:
+            cached = self._sample_bars(symbol, timeframe, now - (window - 1) * freq, window)
+        elif cached.index[-1] < now:
+            # Extend in place from the last close; earlier bars keep their values
+            # and bars older than the window are dropped
+            start = cached.index[-1] + freq
+            bars = int((now - start) / freq) + 1
+            extension = self._sample_bars(symbol, timeframe, start, bars, cached['close'].iloc[-1])
+            cached = pd.concat([cached, extension]).iloc[-window:]
+        self._sample_data[key] = cached
         
-        df = pd.DataFrame({
-            'open': prices * (1 + np.random.uniform(-0.01, 0.01, limit)),
-            'high': prices * (1 + np.random.uniform(0, 0.02, limit)),
-            'low': prices * (1 + np.random.uniform(-0.02, 0, limit)),
-            'close': prices,
-            'volume': np.random.uniform(1000, 10000, limit)
-        }, index=dates)
+        return cached.iloc[-limit:]
+    
+    def _sample_bars(self, symbol, timeframe, start, bars, base_price=None):
+        """`bars` seeded sample bars of one symbol from `start` (seeded by symbol and start)"""
+        from engines.synthetic_data import create_market
         
-        return df
+        market_config = dict(self.config.get('synthetic_data', {}))
+        market_config['seed'] = market_config.get('seed', 0) + zlib.crc32(symbol.encode()) + int(start.timestamp())
+        market_config['timeframe'] = timeframe
+        market_config['start'] = start
+        if base_price is not None:
+            market_config['base_price'] = base_price
+        return create_market({'synthetic_data': market_config}, [symbol]).frames(bars)[symbol]
+    
+    def sleep(self, seconds):
+        """Wait between trading loops"""
+        time.sleep(seconds)
     
     def get_current_price(self, symbol):
         """Get current market price"""
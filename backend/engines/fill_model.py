@@ -0,0 +1,128 @@
+"""
+Fill Models
+Simulated execution costs for paper trading and backtests
+"""
+
+import numpy as np
+
+
+class FillResult:
+    """Vectorized fill outcome; every attribute is an array aligned with the orders"""
+
+    def __init__(self, filled_size, fill_price, fee, slippage):
+        self.filled_size = filled_size
+        self.fill_price = fill_price
+        self.fee = fee
+        self.slippage = slippage
+
+    def __len__(self):
+        return len(self.filled_size)
+
+    def row(self, index):
+        return {
+            'filled_size': float(self.filled_size[index]),
+            'fill_price': float(self.fill_price[index]),
+            'fee': float(self.fee[index]),
+            'slippage': float(self.slippage[index])
+        }
+
+
+class PerfectFillModel:
+    """Fills everything at the quoted price with no cost (the default)"""
+
+    def __init__(self, **_):
+        pass
+
+    def fill_many(self, sides, sizes, prices, volumes=None):
+        """
+        Fill arrays of orders
+
+        Args:
+            sides: +1 for buy, -1 for sell
+            sizes: Requested sizes in base currency
+            prices: Reference prices (candle close)
+            volumes: Candle volumes in base currency (None = unknown)
+
+        Returns:
+            FillResult
+        """
+        sizes = np.asarray(sizes, dtype=float)
+        prices = np.asarray(prices, dtype=float)
+        zeros = np.zeros_like(sizes)
+        return FillResult(sizes.copy(), prices.copy(), zeros, zeros.copy())
+
+    def fill(self, side, size, price, volume=None):
+        """Fill one order; `side` is 'buy' or 'sell'"""
+        result = self.fill_many([1 if side == 'buy' else -1], [size], [price], None if volume is None else [volume])
+        return result.row(0)
+
+
+class CostFillModel(PerfectFillModel):
+    """
+    Fees, half-spread, volume-based slippage and partial fills
+
+    Price impact follows the square-root law: the fill moves against the
+    order by `impact * sqrt(size / candle volume)` (as a fraction of price)
+    on top of half the quoted spread. An order can take at most
+    `max_participation` of the candle's volume; the rest is left unfilled.
+    Fees are charged on filled notional.
+    """
+
+    def __init__(self, fee_percent=0.1, spread_percent=0.02, impact=0.1, max_participation=0.1):
+        """
+        Args:
+            fee_percent: Taker fee, percent of notional
+            spread_percent: Full bid/ask spread, percent of price
+            impact: Square-root impact coefficient
+            max_participation: Largest fraction of candle volume one order can fill
+        """
+        self.fee_rate = fee_percent / 100
+        self.half_spread = spread_percent / 200
+        self.impact = impact
+        self.max_participation = max_participation
+
+    def fill_many(self, sides, sizes, prices, volumes=None):
+        sides = np.asarray(sides, dtype=float)
+        sizes = np.asarray(sizes, dtype=float)
+        prices = np.asarray(prices, dtype=float)
+
+        if volumes is None:
+            filled = sizes.copy()
+            impact = np.zeros_like(sizes)
+        else:
+            volumes = np.asarray(volumes, dtype=float)
+            known = np.isfinite(volumes) & (volumes > 0)
+            capacity = np.where(known, volumes * self.max_participation, np.inf)
+            filled = np.minimum(sizes, capacity)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                impact = np.where(known, self.impact * np.sqrt(filled / volumes), 0.0)
+
+        cost_fraction = self.half_spread + impact
+        fill_price = prices * (1 + sides * cost_fraction)
+        slippage = filled * prices * cost_fraction
+        fee = filled * fill_price * self.fee_rate
+        return FillResult(filled, fill_price, fee, slippage)
+
+
+FILL_MODELS = {
+    'perfect': PerfectFillModel,
+    'cost': CostFillModel,
+}
+
+
+def create_fill_model(config):
+    """
+    Build the fill model from the optional 'fill_model' config section
+
+    Without the section fills are perfect, as they always were; opt in
+    to simulated costs with:
+        fill_model:
+          type: cost            # default: perfect
+          fee_percent: 0.1
+          spread_percent: 0.02
+          impact: 0.1
+          max_participation: 0.1
+    """
+    fill_config = dict(config.get('fill_model', {}))
+    model_class = FILL_MODELS[fill_config.pop('type', 'perfect')]
+    return model_class(**fill_config)
@@ -0,0 +1,497 @@
+"""
+Multi-Tenant Trading Engine
+One process evaluating every auto-trading user's bot against shared market state
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+
+from engines.risk_manager import RiskManager
+from models import entitlements
+from strategies.rsi_strategy import RSIStrategy
+from strategies.macd_strategy import MACDStrategy
+from strategies.bollinger_strategy import BollingerStrategy
+from strategies.ma_crossover import MACrossoverStrategy
+from utils.event_bus import TRADE_UPDATE, PNL_UPDATE, TRADING_TOGGLED, SUBSCRIPTION_CHANGED
+
+
+STRATEGY_CLASSES = {
+    'RSI_Mean_Reversion': RSIStrategy,
+    'MACD_Trend_Following': MACDStrategy,
+    'Bollinger_Bands': BollingerStrategy,
+    'MA_Crossover': MACrossoverStrategy
+}
+
+
+def _split(value):
+    """Parse a comma-separated user setting"""
+    return [item.strip() for item in value.split(',') if item.strip()] if value else []
+
+
+def _capped(items, limit):
+    return items if limit == entitlements.UNLIMITED else items[:limit]
+
+
+def user_version(user):
+    """
+    Changes whenever a tenant built from `user` would differ: the row was
+    saved (updated_at) or the subscription lapsed. None if unknown.
+    """
+    updated_at = getattr(user, 'updated_at', None)
+    if updated_at is None:
+        return None
+    return updated_at, entitlements.is_subscription_active(user)
+
+
+class Tenant:
+    """One user's paper account: selections, risk limits and open positions"""
+
+    def __init__(self, user, default_pairs, default_strategies, risk_config):
+        self.user_id = user.id
+        self.balance = user.paper_balance or 0.0
+        self.positions = {}
+        self.trades_today = 0
+        self.risk = None
+        self.refresh(user, default_pairs, default_strategies, risk_config)
+
+    def refresh(self, user, default_pairs, default_strategies, risk_config):
+        """Re-read settings and tier limits (positions, balance and daily risk state are kept)"""
+        self.version = user_version(user)
+        limits = entitlements.effective_limits(user)
+        self.pairs = _capped(_split(user.trading_pairs) or default_pairs, limits['max_pairs'])
+        self.strategies = _capped(
+            [name for name in _split(user.enabled_strategies) or default_strategies if name in default_strategies],
+            limits['max_strategies']
+        )
+        self.max_daily_trades = entitlements.max_daily_trades(user)
+
+        settings = dict(
+            risk_config,
+            max_position_size=user.max_position_size or risk_config['max_position_size'],
+            max_positions=entitlements.max_positions(user),
+            max_daily_loss=self.balance * (user.daily_loss_limit or 5.0) / 100
+        )
+        if self.risk is None:
+            self.risk = RiskManager({'risk_management': settings})
+        else:
+            self.risk.max_position_size = settings['max_position_size']
+            self.risk.max_positions = settings['max_positions']
+            self.risk.max_daily_loss = settings['max_daily_loss']
+
+    def can_trade_today(self):
+        return self.max_daily_trades == entitlements.UNLIMITED or self.trades_today < self.max_daily_trades
+
+
+class MultiTenantEngine:
+    """
+    Runs many users' bots in one process
+
+    Market data is fetched and each strategy evaluated once per (pair,
+    timeframe); the resulting signal is then applied only to the users
+    subscribed to that pair and strategy, so per-cycle cost grows with
+    unique pairs plus the users a signal actually concerns, not with
+    users x pairs. Open positions are indexed by pair so each price
+    update touches only that pair's positions. All accounts are paper
+    accounts.
+
+    With a db_manager, trades (tagged with user_id), marks and balances
+    are stored as they change, and a user's open positions and trade
+    count are restored when the user is added.
+    """
+
+    def __init__(self, config, data_feed=None, event_bus=None, get_user=None, db_manager=None):
+        """
+        Args:
+            config: Bot configuration (strategies, risk_management, markets)
+            data_feed: Object with get_market_data(pair, timeframe, limit)
+            event_bus: Optional EventBus; trade/PnL events carry user_id
+            get_user: Optional Callable(user_id) used to react to trading toggles
+            db_manager: Optional DatabaseManager holding users and their trades
+        """
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+        self.data_feed = data_feed
+        self.event_bus = event_bus
+        self.get_user = get_user
+        self.db_manager = db_manager
+
+        self.risk_config = config['risk_management']
+        self.strategies = self._initialize_strategies()
+        self.default_strategies = list(self.strategies)
+        self.default_pairs = []
+        for market in ('crypto', 'forex'):
+            if config['markets'][market]['enabled']:
+                self.default_pairs.extend(config['markets'][market]['pairs'])
+
+        self.tenants = {}
+        self.subscribers = defaultdict(set)    # (pair, strategy) -> user ids
+        self.open_by_pair = defaultdict(dict)  # pair -> {position id: (tenant, position)}
+        self.last_prices = {}
+        self.position_timeframe = config.get('position_timeframe', '1h')
+        self.current_date = datetime.now().date()
+        self._marks = {}                       # position id -> (price, pnl, pnl_percent, id) to store
+
+        self._lock = threading.RLock()
+        self._stopped = threading.Event()
+        self.stats = defaultdict(int)
+
+        if event_bus is not None and get_user is not None:
+            event_bus.subscribe(TRADING_TOGGLED, self._on_user_changed)
+            event_bus.subscribe(SUBSCRIPTION_CHANGED, self._on_user_changed)
+
+    def _initialize_strategies(self):
+        """One shared instance per enabled strategy"""
+        strategies = {}
+        for strategy_config in self.config['strategies']:
+            strategy_class = STRATEGY_CLASSES.get(strategy_config['name'])
+            if strategy_config.get('enabled', False) and strategy_class:
+                strategies[strategy_config['name']] = strategy_class(strategy_config)
+        return strategies
+
+    # ==================== TENANTS ====================
+
+    def load_users(self, users):
+        """Add every auto-trading user"""
+        for user in users:
+            self.add_user(user)
+        self.logger.info(f"✓ Multi-tenant engine serving {len(self.tenants)} users")
+
+    def sync_users(self, users):
+        """Add or refresh every given user and drop tenants whose user is gone"""
+        users = list(users)
+        present = {user.id for user in users}
+        for user in users:
+            self.add_user(user)
+        for user_id in [user_id for user_id in self.tenants if user_id not in present]:
+            self.remove_user(user_id)
+
+    def add_user(self, user):
+        """
+        Start a user's bot, or refresh it if the user changed since (see user_version);
+        users without auto trading are removed
+        """
+        if not user.is_active or not user.auto_trading_enabled:
+            self.remove_user(user.id)
+            return
+
+        with self._lock:
+            tenant = self.tenants.get(user.id)
+            if tenant is None:
+                tenant = Tenant(user, self.default_pairs, self.default_strategies, self.risk_config)
+                self.tenants[user.id] = tenant
+                self._restore(tenant)
+            else:
+                version = user_version(user)
+                if version is not None and version == tenant.version:
+                    return
+                self._unindex(tenant)
+                tenant.refresh(user, self.default_pairs, self.default_strategies, self.risk_config)
+
+            for pair in tenant.pairs:
+                for name in tenant.strategies:
+                    self.subscribers[(pair, name)].add(tenant.user_id)
+
+    def remove_user(self, user_id):
+        """Stop a user's bot, closing its positions at the last seen price"""
+        with self._lock:
+            tenant = self.tenants.pop(user_id, None)
+            if tenant is None:
+                return
+            self._unindex(tenant)
+            for position in list(tenant.positions.values()):
+                price = self.last_prices.get(position['pair'], position['current_price'])
+                self._close(tenant, position, price, 'disabled')
+
+    def _restore(self, tenant):
+        """Reattach a new tenant's stored open positions and today's trade count"""
+        if self.db_manager is None:
+            return
+
+        strategy_keys = {strategy.name: key for key, strategy in self.strategies.items()}
+        for row in self.db_manager.get_open_positions(user_id=tenant.user_id):
+            position = dict(
+                row,
+                strategy_key=strategy_keys.get(row['strategy'], row['strategy']),
+                timestamp=datetime.fromisoformat(row['timestamp']),
+                pnl=row['pnl'] or 0,
+                pnl_percent=row['pnl_percent'] or 0
+            )
+            tenant.positions[position['id']] = position
+            tenant.risk.increment_positions()
+            self.open_by_pair[position['pair']][position['id']] = (tenant, position)
+        tenant.trades_today = self.db_manager.get_trades_count_today(user_id=tenant.user_id)
+
+    def export_tenant(self, user_id):
+        """
+        Detach a tenant with its open positions intact (for moving it to another engine)
+
+        Returns:
+            Tenant or None
+        """
+        with self._lock:
+            tenant = self.tenants.pop(user_id, None)
+            if tenant is None:
+                return None
+            self._unindex(tenant)
+            for position in tenant.positions.values():
+                self.open_by_pair[position['pair']].pop(position['id'], None)
+            return tenant
+
+    def import_tenant(self, tenant):
+        """Attach a tenant exported from another engine"""
+        with self._lock:
+            self.tenants[tenant.user_id] = tenant
+            for pair in tenant.pairs:
+                for name in tenant.strategies:
+                    self.subscribers[(pair, name)].add(tenant.user_id)
+            for position in tenant.positions.values():
+                self.open_by_pair[position['pair']][position['id']] = (tenant, position)
+
+    def _unindex(self, tenant):
+        for pair in tenant.pairs:
+            for name in tenant.strategies:
+                users = self.subscribers.get((pair, name))
+                if users is not None:
+                    users.discard(tenant.user_id)
+                    if not users:
+                        del self.subscribers[(pair, name)]
+
+    def _on_user_changed(self, event_type, payload):
+        user_id = payload.get('user_id')
+        if user_id is None:
+            return
+        user = self.get_user(user_id)
+        if user is None:
+            self.remove_user(user_id)
+        else:
+            self.add_user(user)
+
+    # ==================== MARKET DATA ====================
+
+    def feeds(self):
+        """(pair, timeframe) combinations some user needs"""
+        with self._lock:
+            feeds = {(pair, self.strategies[name].timeframe) for pair, name in self.subscribers}
+
+            # Positions left in pairs nobody subscribes to any more still need prices
+            subscribed_pairs = {pair for pair, _ in feeds}
+            for pair, positions in self.open_by_pair.items():
+                if positions and pair not in subscribed_pairs:
+                    feeds.add((pair, self.position_timeframe))
+
+        return sorted(feeds)
+
+    def run_cycle(self):
+        """Fetch each needed (pair, timeframe) once and process it"""
+        started = time.perf_counter()
+        self.stats.clear()
+
+        for pair, timeframe in self.feeds():
+            market_data = self.data_feed.get_market_data(pair, timeframe)
+            if market_data is None or len(market_data) == 0:
+                continue
+            self.on_market_data(pair, timeframe, market_data)
+        self.flush_marks()
+
+        self.stats['cycle_ms'] = (time.perf_counter() - started) * 1000
+        return dict(self.stats)
+
+    def on_market_data(self, pair, timeframe, market_data):
+        """
+        Process one candle set for every subscribed user
+
+        Args:
+            pair: Trading pair
+            timeframe: Candle timeframe of market_data
+            market_data: OHLCV DataFrame
+        """
+        price = float(market_data['close'].iloc[-1])
+        self.stats['feeds'] += 1
+
+        with self._lock:
+            self._roll_date()
+
+            # Several timeframes of one pair share the latest price; mark once
+            if self.last_prices.get(pair) != price:
+                self.last_prices[pair] = price
+                self.mark_to_market(pair, price)
+
+            for name, strategy in self.strategies.items():
+                if strategy.timeframe != timeframe:
+                    continue
+                user_ids = self.subscribers.get((pair, name))
+                if not user_ids:
+                    continue
+
+                # Indicators and signal computed once for all subscribers
+                signal = strategy.generate_signal(market_data)
+                self.stats['signals_evaluated'] += 1
+                if signal['action'] == 'hold':
+                    continue
+
+                for user_id in list(user_ids):
+                    self._apply_signal(self.tenants[user_id], pair, name, signal, price)
+
+    def flush_marks(self):
+        """Store the latest marks of open positions in one batch"""
+        with self._lock:
+            marks, self._marks = list(self._marks.values()), {}
+        if marks and self.db_manager is not None:
+            self.db_manager.update_marks(marks)
+
+    def _roll_date(self):
+        # Local date, matching the trade timestamps the day's count is restored from
+        today = datetime.now().date()
+        if today != self.current_date:
+            self.current_date = today
+            for tenant in self.tenants.values():
+                tenant.trades_today = 0
+                tenant.risk.reset_daily_stats()
+
+    # ==================== PER-USER DECISIONS ====================
+
+    def _apply_signal(self, tenant, pair, strategy_name, signal, price):
+        self.stats['user_decisions'] += 1
+
+        # One position per user, pair and strategy
+        for position in tenant.positions.values():
+            if position['pair'] == pair and position['strategy_key'] == strategy_name:
+                return
+
+        if not tenant.can_trade_today():
+            return
+
+        stop_loss = signal.get('stop_loss', price * 0.98)
+        size = tenant.risk.calculate_position_size(price, stop_loss, tenant.balance)
+        if size <= 0 or not tenant.risk.check_risk_limits(pair, signal['action'], size):
+            return
+
+        position = {
+            'id': str(uuid.uuid4()),
+            'user_id': tenant.user_id,
+            'pair': pair,
+            'action': signal['action'],
+            'size': size,
+            'entry_price': price,
+            'current_price': price,
+            'stop_loss': stop_loss,
+            'take_profit': signal.get('take_profit'),
+            'strategy': signal['strategy'],
+            'strategy_key': strategy_name,
+            'status': 'open',
+            'timestamp': datetime.now(),
+            'pnl': 0,
+            'pnl_percent': 0
+        }
+        if self.db_manager is not None:
+            self.db_manager.save_trade(position)
+        tenant.positions[position['id']] = position
+        tenant.trades_today += 1
+        tenant.risk.increment_positions()
+        self.open_by_pair[pair][position['id']] = (tenant, position)
+
+        self.stats['opened'] += 1
+        self._publish(TRADE_UPDATE, position)
+
+    def mark_to_market(self, pair, price):
+        """Update PnL and apply stop-loss/take-profit for every open position in a pair"""
+        positions = self.open_by_pair.get(pair)
+        if not positions:
+            return
+
+        unrealized_by_user = defaultdict(float)
+        for tenant, position in list(positions.values()):
+            direction = 1 if position['action'] == 'buy' else -1
+            position['current_price'] = price
+            position['pnl'] = (price - position['entry_price']) * position['size'] * direction
+            position['pnl_percent'] = (price - position['entry_price']) / position['entry_price'] * 100 * direction
+
+            stop_loss, take_profit = position['stop_loss'], position['take_profit']
+            if stop_loss and (price - stop_loss) * direction <= 0:
+                self._close(tenant, position, price, 'stop_loss')
+            elif take_profit and (price - take_profit) * direction >= 0:
+                self._close(tenant, position, price, 'take_profit')
+            else:
+                unrealized_by_user[tenant.user_id] += position['pnl']
+                if self.db_manager is not None:
+                    self._marks[position['id']] = (price, position['pnl'], position['pnl_percent'], position['id'])
+
+        if self.event_bus is not None:
+            for user_id, unrealized in unrealized_by_user.items():
+                self.event_bus.publish(PNL_UPDATE, {
+                    'user_id': user_id, 'pair': pair, 'price': price, 'unrealized_pnl': unrealized
+                })
+
+    def _close(self, tenant, position, price, reason):
+        direction = 1 if position['action'] == 'buy' else -1
+        pnl = (price - position['entry_price']) * position['size'] * direction
+
+        position.update(
+            status='closed',
+            exit_price=price,
+            current_price=price,
+            close_timestamp=datetime.now(),
+            pnl=pnl,
+            pnl_percent=(price - position['entry_price']) / position['entry_price'] * 100 * direction,
+            close_reason=reason
+        )
+        tenant.positions.pop(position['id'], None)
+        self.open_by_pair[position['pair']].pop(position['id'], None)
+        tenant.balance += pnl
+        tenant.risk.update_daily_pnl(pnl)
+        tenant.risk.decrement_positions()
+        self._marks.pop(position['id'], None)
+        if self.db_manager is not None:
+            self.db_manager.update_trade(position)
+            self.db_manager.update_paper_balance(tenant.user_id, tenant.balance)
+
+        self.stats['closed'] += 1
+        self._publish(TRADE_UPDATE, position)
+
+    def _publish(self, event_type, data):
+        if self.event_bus is not None:
+            self.event_bus.publish(event_type, {
+                key: value.isoformat() if isinstance(value, datetime) else value
+                for key, value in data.items()
+            })
+
+    # ==================== LIFECYCLE ====================
+
+    def run(self, interval=60, load_users=None):
+        """
+        Run cycles until stop() is called
+
+        Args:
+            interval: Seconds between cycles
+            load_users: Optional Callable returning every user; synced before each
+                cycle so settings changed by another process take effect (only
+                changed users are refreshed)
+        """
+        self.logger.info(f"🔴 Multi-tenant engine running ({len(self.tenants)} users)")
+        while not self._stopped.is_set():
+            try:
+                if load_users is not None:
+                    self.sync_users(load_users())
+                stats = self.run_cycle()
+                self.logger.debug(f"Cycle: {stats}")
+            except Exception as e:
+                self.logger.error(f"Error in multi-tenant cycle: {e}", exc_info=True)
+            self._stopped.wait(interval)
+
+    def stop(self):
+        """Stop the run loop"""
+        self._stopped.set()
+
+    def get_summary(self):
+        """Engine-wide counters"""
+        with self._lock:
+            return {
+                'users': len(self.tenants),
+                'subscriptions': sum(len(users) for users in self.subscribers.values()),
+                'open_positions': sum(len(positions) for positions in self.open_by_pair.values()),
+                'pairs': len({pair for pair, _ in self.subscribers})
+            }
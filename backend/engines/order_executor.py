@@ -4,20 +4,126 @@ Handles trade execution and position management
 """
 
 import logging
+import threading
+import time
 import uuid
 from datetime import datetime
+from functools import partial
+from engines.fill_model import create_fill_model
+from engines.position_book import PositionBook
+from utils.event_bus import EventBus, TRADE_UPDATE, POSITION_UPDATE, PNL_UPDATE, ORDER_UPDATE
+from utils import metrics
+
+ORDERS = metrics.counter('tradingbot_orders', 'Orders sent (entries and exits)', ['mode', 'side'])
+FILLS = metrics.counter('tradingbot_fills', 'Orders filled, fully or partly', ['mode', 'side'])
+
+# Seconds between repeats of the "exit still unresolved" warning for one exit
+UNRESOLVED_WARNING_INTERVAL = 60
 
 
 class OrderExecutor:
     """Execute and manage trading orders"""
     
-    def __init__(self, config, db_manager):
+    def __init__(self, config, db_manager, event_bus=None):
         self.config = config
         self.db_manager = db_manager
+        self.event_bus = event_bus
         self.logger = logging.getLogger(__name__)
         self.trading_mode = config['trading_mode']
+        self.user_id = config.get('user_id')
+        
+        # Simulated execution costs for paper fills
+        self.fill_model = create_fill_model(config)
+        self.last_volumes = {}      # pair -> latest candle volume, bounds paper exits
+        
+        # Open positions marked in memory, persisted in batches
+        self.positions = PositionBook(
+            db_manager,
+            persist_interval=config.get('execution', {}).get('mark_persist_interval', 5.0)
+        )
+        
+        # Live orders go through the asynchronous submission pipeline; positions
+        # open and close from their ORDER_UPDATE events, not by waiting on them
+        self.pipeline = None
+        self.ack_timeout = config.get('execution', {}).get('ack_timeout', 10)
+        self.live_orders = {}       # client order id -> callback(payload) once the order finishes
+        self.exit_warnings = {}     # client order id of a pending exit -> last warning time
+        self._live_lock = threading.Lock()
+        if self.trading_mode == 'live':
+            self.pipeline = self._initialize_pipeline()
+    
+    def _initialize_pipeline(self):
+        """Start the live order pipeline on the configured exchange"""
+        from engines.order_pipeline import OrderPipeline, create_exchange
+        
+        try:
+            exchange = create_exchange(self.config)
+            if exchange is None:
+                return None
+            
+            execution_config = self.config.get('execution', {})
+            order_events = self.event_bus or EventBus()
+            pipeline = OrderPipeline(
+                exchange,
+                event_bus=order_events,
+                max_in_flight=execution_config.get('max_in_flight', 8),
+                batch_size=execution_config.get('batch_size', 10),
+                batch_window=execution_config.get('batch_window', 0.02),
+                max_retries=execution_config.get('max_retries', 3),
+                poll_interval=execution_config.get('poll_interval', 1.0),
+                ack_timeout=self.ack_timeout
+            )
+            order_events.subscribe(ORDER_UPDATE, self._on_order_update)
+            pipeline.start()
+            return pipeline
+            
+        except Exception as e:
+            self.logger.error(f"Failed to start live order pipeline: {e}", exc_info=True)
+            return None
+    
+    def _submit_live(self, pair, side, size, on_done, client_order_id=None):
+        """
+        Queue a market order without waiting for the exchange
+        
+        `on_done(payload)` is called with the order's final ORDER_UPDATE
+        (filled, canceled, rejected or failed); it books whatever filled.
+        
+        Returns:
+            LiveOrder
+        """
+        from engines.order_pipeline import new_client_order_id
+        
+        client_order_id = client_order_id or new_client_order_id()
+        with self._live_lock:
+            self.live_orders[client_order_id] = on_done
+        ORDERS.labels('live', side).inc()
+        return self.pipeline.submit(pair, side, size, client_order_id=client_order_id)
+    
+    def _on_order_update(self, event_type, payload):
+        from engines.order_pipeline import TERMINAL_STATES
+        
+        if payload['state'] not in TERMINAL_STATES:
+            return
+        with self._live_lock:
+            on_done = self.live_orders.pop(payload['client_order_id'], None)
+        if on_done is not None:
+            if payload['filled']:
+                FILLS.labels('live', payload['side']).inc()
+            on_done(payload)
+    
+    def _publish(self, event_type, data):
+        """Publish a trade/position event for real-time dashboards"""
+        if self.event_bus is None:
+            return
+        
+        payload = {
+            key: value.isoformat() if isinstance(value, datetime) else value
+            for key, value in data.items()
+        }
+        payload['user_id'] = self.user_id
+        self.event_bus.publish(event_type, payload)
     
-    def execute_order(self, pair, action, size, price, strategy, stop_loss=None, take_profit=None):
+    def execute_order(self, pair, action, size, price, strategy, stop_loss=None, take_profit=None, volume=None):
         """
         Execute a trading order
         
@@ -29,9 +135,11 @@ class OrderExecutor:
             strategy: Strategy name
             stop_loss: Stop loss price
             take_profit: Take profit price
+            volume: Latest candle volume (bounds paper fills and slippage)
             
         Returns:
-            Order object or None
+            Order object (paper), the queued LiveOrder (live: the position opens
+            once it fills, at the filled size), or None
         """
         try:
             order = {
@@ -47,19 +155,37 @@ class OrderExecutor:
                 'status': 'open',
                 'timestamp': datetime.now(),
                 'pnl': 0,
-                'pnl_percent': 0
+                'pnl_percent': 0,
+                'fees': 0
             }
             
             if self.trading_mode == 'paper':
-                # Paper trading - simulate order
+                # Paper trading - simulate the fill with costs
+                fill = self.fill_model.fill(action, size, price, volume)
+                ORDERS.labels('paper', action).inc()
+                if fill['filled_size'] <= 0:
+                    self.logger.warning(f"Paper order for {pair} not filled (no volume)")
+                    return None
+                
+                FILLS.labels('paper', action).inc()
+                order['size'] = fill['filled_size']
+                order['entry_price'] = fill['fill_price']
+                order['fees'] = fill['fee']
                 self.db_manager.save_trade(order)
-                self.logger.info(f"📝 Paper trade executed: {action.upper()} {size:.4f} {pair} @ ${price:.2f}")
+                self.logger.info(
+                    f"📝 Paper trade executed: {action.upper()} {order['size']:.4f} {pair} "
+                    f"@ ${order['entry_price']:.2f} (fee ${order['fees']:.2f})"
+                )
                 
             elif self.trading_mode == 'live':
-                # Live trading - execute real order
-                # TODO: Implement actual order execution via exchange API
-                self.logger.warning("Live trading not yet implemented - using paper mode")
-                self.db_manager.save_trade(order)
+                if self.pipeline is None:
+                    self.logger.error("Live order pipeline unavailable - order not placed")
+                    return None
+                
+                return self._submit_live(pair, action, size, partial(self._entry_done, order))
+            
+            self.positions.add(order)
+            self._publish(TRADE_UPDATE, order)
             
             return order
             
@@ -67,7 +193,80 @@ class OrderExecutor:
             self.logger.error(f"Error executing order: {e}", exc_info=True)
             return None
     
-    def close_position(self, position, exit_price, reason='manual'):
+    def _entry_done(self, order, payload):
+        """A live entry finished: open a position of the size that filled"""
+        if not payload['filled']:
+            self.logger.error(
+                f"Live order {order['action'].upper()} {order['pair']} {payload['state']}: {payload['error']}"
+            )
+            return
+        
+        order['client_order_id'] = payload['client_order_id']
+        order['size'] = payload['filled']
+        order['entry_price'] = order['current_price'] = payload['average'] or order['entry_price']
+        order['timestamp'] = datetime.now()
+        self.db_manager.save_trade(order)
+        self.positions.add(order)
+        self._publish(TRADE_UPDATE, order)
+        self.logger.info(
+            f"📤 Live order filled: {order['action'].upper()} {order['size']:.4f} {order['pair']} "
+            f"@ ${order['entry_price']:.2f} ({payload['state']})"
+        )
+    
+    def _warn_unresolved(self, position):
+        """Warn about a pending exit at most once per UNRESOLVED_WARNING_INTERVAL, however often it is retried"""
+        now = time.monotonic()
+        last = self.exit_warnings.get(position['exit_order'])
+        if last is None or now - last >= UNRESOLVED_WARNING_INTERVAL:
+            self.exit_warnings[position['exit_order']] = now
+            self.logger.warning(f"Exit {position['exit_order']} for {position['pair']} still unresolved")
+    
+    def _exit_done(self, position, exit_price, reason, payload):
+        """A live exit finished: close what filled; anything unfilled stays open"""
+        self.exit_warnings.pop(payload['client_order_id'], None)
+        position.pop('exit_order', None)
+        if position.get('status') != 'open':
+            return
+        
+        filled = payload['filled'] or 0.0
+        if filled < position['size']:
+            self.logger.warning(
+                f"Exit {payload['client_order_id']} for {position['pair']} {payload['state']} with "
+                f"{filled:.4f} of {position['size']:.4f} filled; the rest stays open"
+            )
+            if filled <= 0:
+                # Still open: let brackets re-arm
+                self._publish(TRADE_UPDATE, position)
+                return
+            part = self._split(position, filled)
+            self._publish(TRADE_UPDATE, position)
+            position = part
+        
+        self.close_position(position, payload['average'] or exit_price, reason, submit=False)
+    
+    def _split(self, position, size):
+        """Carve a partly filled exit off a position; returns the exited part, the rest stays open"""
+        fraction = size / position['size']
+        part = dict(
+            position,
+            id=str(uuid.uuid4()),
+            size=size,
+            fees=(position.get('fees') or 0) * fraction,
+            pnl=(position.get('pnl') or 0) * fraction
+        )
+        
+        self.positions.remove(position)
+        position['size'] -= size
+        position['fees'] = (position.get('fees') or 0) - part['fees']
+        position['pnl'] = (position.get('pnl') or 0) - part['pnl']
+        self.positions.add(position)
+        
+        self.db_manager.update_trade(position)
+        self.db_manager.save_trade(part)
+        self._publish(POSITION_UPDATE, position)
+        return part
+    
+    def close_position(self, position, exit_price, reason='manual', submit=True, volume=None):
         """
         Close an open position
         
@@ -75,15 +274,62 @@ class OrderExecutor:
             position: Position object
             exit_price: Exit price
             reason: Closure reason (manual, stop_loss, take_profit)
+            submit: Send an exit order in live mode (False when the exchange already filled one)
+            volume: Candle volume bounding a paper exit (default: the pair's latest)
+            
+        Returns:
+            The closed trade (only the filled part if an exit partly filled), or None;
+            always None when a live exit is sent (the position closes when it fills)
         """
+        if position.get('status') != 'open':
+            return None
+        
         try:
-            # Calculate P&L
+            if self.trading_mode == 'live' and submit:
+                if self.pipeline is None:
+                    self.logger.error("Live order pipeline unavailable - position not closed")
+                    return None
+                if position.get('exit_order'):
+                    self._warn_unresolved(position)
+                    return None
+                
+                # Closed by _exit_done once the exchange reports the fill
+                from engines.order_pipeline import new_client_order_id
+                exit_side = 'sell' if position['action'] == 'buy' else 'buy'
+                position['exit_order'] = new_client_order_id()
+                self._submit_live(
+                    position['pair'], exit_side, position['size'],
+                    partial(self._exit_done, position, exit_price, reason),
+                    client_order_id=position['exit_order']
+                )
+                return None
+            elif self.trading_mode == 'paper':
+                exit_side = 'sell' if position['action'] == 'buy' else 'buy'
+                if volume is None:
+                    volume = self.last_volumes.get(position['pair'])
+                fill = self.fill_model.fill(exit_side, position['size'], exit_price, volume)
+                ORDERS.labels('paper', exit_side).inc()
+                if fill['filled_size'] <= 0:
+                    self.logger.warning(f"Paper exit for {position['pair']} not filled (no volume)")
+                    return None
+                
+                FILLS.labels('paper', exit_side).inc()
+                if fill['filled_size'] < position['size']:
+                    self.logger.info(
+                        f"Paper exit for {position['pair']} filled {fill['filled_size']:.4f} "
+                        f"of {position['size']:.4f}; the rest stays open"
+                    )
+                    position = self._split(position, fill['filled_size'])
+                exit_price = fill['fill_price']
+                position['fees'] = (position.get('fees') or 0) + fill['fee']
+            
+            # Calculate P&L (net of fees)
             if position['action'] == 'buy':
                 pnl = (exit_price - position['entry_price']) * position['size']
-                pnl_percent = ((exit_price - position['entry_price']) / position['entry_price']) * 100
             else:  # sell
                 pnl = (position['entry_price'] - exit_price) * position['size']
-                pnl_percent = ((position['entry_price'] - exit_price) / position['entry_price']) * 100
+            pnl -= position.get('fees') or 0
+            pnl_percent = pnl / (position['entry_price'] * position['size']) * 100
             
             # Update position
             position['status'] = 'closed'
@@ -93,7 +339,17 @@ class OrderExecutor:
             position['pnl_percent'] = pnl_percent
             position['close_reason'] = reason
             
+            self.positions.remove(position)
             self.db_manager.update_trade(position)
+            self._publish(TRADE_UPDATE, position)
+            if not self.positions.get_open_positions(position['pair']):
+                # Book emptied: no unrealized P&L left on this pair
+                self._publish(PNL_UPDATE, {
+                    'pair': position['pair'],
+                    'price': exit_price,
+                    'unrealized_pnl': 0.0,
+                    'open_positions': 0
+                })
             
             self.logger.info(
                 f"✅ Position closed: {position['pair']} | "
@@ -107,9 +363,19 @@ class OrderExecutor:
             self.logger.error(f"Error closing position: {e}", exc_info=True)
             return None
     
+    def get_open_positions(self, pair=None):
+        """Open positions from the in-memory book"""
+        return self.positions.get_open_positions(pair)
+    
+    def close(self):
+        """Persist pending marks and stop the live order pipeline"""
+        self.positions.persist()
+        if self.pipeline is not None:
+            self.pipeline.stop()
+    
     def close_all_positions(self):
         """Close all open positions"""
-        open_positions = self.db_manager.get_all_open_positions()
+        open_positions = self.positions.get_open_positions()
         
         for position in open_positions:
             # Use current price as exit price
@@ -119,21 +385,19 @@ class OrderExecutor:
         
         self.logger.info(f"Closed {len(open_positions)} open positions")
     
-    def update_position_prices(self, pair, current_price):
-        """Update current prices for open positions"""
-        positions = self.db_manager.get_open_positions(pair)
+    def update_position_prices(self, pair, current_price, volume=None):
+        """Mark open positions to market (persisted in batches, not per tick)"""
+        if volume is not None:
+            self.last_volumes[pair] = volume
+        positions, unrealized_pnl = self.positions.mark(pair, current_price)
         
         for position in positions:
-            # Calculate unrealized P&L
-            if position['action'] == 'buy':
-                pnl = (current_price - position['entry_price']) * position['size']
-                pnl_percent = ((current_price - position['entry_price']) / position['entry_price']) * 100
-            else:
-                pnl = (position['entry_price'] - current_price) * position['size']
-                pnl_percent = ((position['entry_price'] - current_price) / position['entry_price']) * 100
-            
-            position['current_price'] = current_price
-            position['pnl'] = pnl
-            position['pnl_percent'] = pnl_percent
-            
-            self.db_manager.update_trade(position)
+            self._publish(POSITION_UPDATE, position)
+        
+        if positions:
+            self._publish(PNL_UPDATE, {
+                'pair': pair,
+                'price': current_price,
+                'unrealized_pnl': unrealized_pnl,
+                'open_positions': len(positions)
+            })
@@ -0,0 +1,587 @@
+"""
+Live Order Pipeline
+Queued, concurrent and idempotent order submission with an in-memory order state machine
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import uuid
+
+from utils.event_bus import ORDER_UPDATE
+
+try:
+    import ccxt.async_support as ccxt_async
+    from ccxt.base.errors import (
+        ExchangeError, NetworkError, InvalidOrder, InsufficientFunds, DuplicateOrderId, OrderNotFound
+    )
+    CCXT_AVAILABLE = True
+except ImportError:
+    ccxt_async = None
+    CCXT_AVAILABLE = False
+
+    # Same hierarchy as ccxt so fakes and callers can rely on it either way
+    class ExchangeError(Exception):
+        pass
+
+    class NetworkError(Exception):
+        pass
+
+    class InvalidOrder(ExchangeError):
+        pass
+
+    class InsufficientFunds(ExchangeError):
+        pass
+
+    class DuplicateOrderId(InvalidOrder):
+        pass
+
+    class OrderNotFound(InvalidOrder):
+        pass
+
+
+# Order states
+NEW = 'new'
+SUBMITTED = 'submitted'
+OPEN = 'open'
+PARTIALLY_FILLED = 'partially_filled'
+FILLED = 'filled'
+CANCELED = 'canceled'
+REJECTED = 'rejected'
+FAILED = 'failed'
+
+TERMINAL_STATES = {FILLED, CANCELED, REJECTED, FAILED}
+ACKNOWLEDGED_STATES = {OPEN, PARTIALLY_FILLED} | TERMINAL_STATES
+
+TRANSITIONS = {
+    NEW: {SUBMITTED, CANCELED, REJECTED, FAILED},
+    SUBMITTED: {OPEN, PARTIALLY_FILLED, FILLED, CANCELED, REJECTED, FAILED},
+    OPEN: {PARTIALLY_FILLED, FILLED, CANCELED},
+    PARTIALLY_FILLED: {PARTIALLY_FILLED, FILLED, CANCELED},
+}
+
+
+def new_client_order_id():
+    """A fresh client order id (callers that must know the id before submitting take one here)"""
+    return f"tb{uuid.uuid4().hex[:30]}"
+
+
+class LiveOrder:
+    """One order and its lifecycle, keyed by our client order id"""
+
+    def __init__(self, pair, side, amount, price=None, order_type=None, params=None, client_order_id=None):
+        self.client_order_id = client_order_id or new_client_order_id()
+        self.pair = pair
+        self.side = side
+        self.amount = amount
+        self.price = price
+        self.order_type = order_type or ('limit' if price is not None else 'market')
+        self.params = dict(params or {})
+
+        self.state = NEW
+        self.exchange_id = None
+        self.filled = 0.0
+        self.average = None
+        self.error = None
+        self.attempts = 0
+        self.created = time.monotonic()
+        self.acknowledged = None
+        self.history = [(NEW, self.created)]
+        self.cancel_requested = False
+
+        self._changed = threading.Condition()
+        self._callbacks = []
+
+    def transition(self, state):
+        """
+        Move to `state` if the state machine allows it
+
+        Returns:
+            bool: True if the state changed (or a partial fill progressed)
+        """
+        with self._changed:
+            if state == self.state and state != PARTIALLY_FILLED:
+                return False
+            if state not in TRANSITIONS.get(self.state, ()):
+                return False
+            self.state = state
+            now = time.monotonic()
+            self.history.append((state, now))
+            if state in ACKNOWLEDGED_STATES and self.acknowledged is None:
+                self.acknowledged = now
+            self._changed.notify_all()
+            callbacks = []
+            if state in TERMINAL_STATES:
+                callbacks, self._callbacks = self._callbacks, []
+
+        for callback in callbacks:
+            self._run_callback(callback)
+        return True
+
+    def add_done_callback(self, callback):
+        """Call `callback(order)` once the order reaches a terminal state (now, if it has)"""
+        with self._changed:
+            if self.state not in TERMINAL_STATES:
+                self._callbacks.append(callback)
+                return
+        self._run_callback(callback)
+
+    def _run_callback(self, callback):
+        try:
+            callback(self)
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Order {self.client_order_id} callback failed: {e}", exc_info=True)
+
+    def wait(self, states=TERMINAL_STATES, timeout=None):
+        """Block until the order reaches one of `states`; returns True if it did"""
+        with self._changed:
+            return self._changed.wait_for(lambda: self.state in states, timeout)
+
+    @property
+    def done(self):
+        return self.state in TERMINAL_STATES
+
+    @property
+    def finished_at(self):
+        """Monotonic time the order reached a terminal state (None while active)"""
+        return self.history[-1][1] if self.done else None
+
+    def to_dict(self):
+        return {
+            'client_order_id': self.client_order_id,
+            'exchange_id': self.exchange_id,
+            'pair': self.pair,
+            'side': self.side,
+            'type': self.order_type,
+            'amount': self.amount,
+            'price': self.price,
+            'filled': self.filled,
+            'average': self.average,
+            'state': self.state,
+            'error': self.error,
+            'attempts': self.attempts
+        }
+
+
+class OrderPipeline:
+    """
+    Submits orders from a queue on a background asyncio loop
+
+    Orders queued within `batch_window` are sent together through the
+    exchange's createOrders endpoint when it has one, otherwise as
+    concurrent createOrder calls (at most `max_in_flight` at a time).
+    Every order carries a client order id, so a retry after a timeout
+    cannot double-place it: a duplicate-id rejection, or a final network
+    failure, is resolved by looking the order up by that id. Open orders
+    are polled (one fetchOpenOrders per pair where supported) to track
+    acknowledgements and fills; orders not acknowledged within
+    `ack_timeout` seconds are canceled. Finished orders are dropped from
+    `orders` after `retention` seconds.
+    """
+
+    def __init__(self, exchange, event_bus=None, max_in_flight=8, batch_size=10, batch_window=0.02,
+                 max_retries=3, retry_backoff=0.25, poll_interval=1.0, retention=300.0, ack_timeout=None):
+        """
+        Args:
+            exchange: ccxt async_support exchange (or a compatible fake)
+            event_bus: Optional EventBus for ORDER_UPDATE events
+            max_in_flight: Concurrent exchange requests
+            batch_size: Orders per createOrders call
+            batch_window: Seconds to collect a batch
+            max_retries: Submission attempts per order
+            retry_backoff: Base seconds between attempts (doubles each time)
+            poll_interval: Seconds between order status polls
+            retention: Seconds a finished order stays tracked (resubmitting its id returns it)
+            ack_timeout: Seconds an order may wait for the exchange's acknowledgement
+                before it is canceled (None: no limit)
+        """
+        self.exchange = exchange
+        self.event_bus = event_bus
+        self.logger = logging.getLogger(__name__)
+        self.max_in_flight = max_in_flight
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.ack_timeout = ack_timeout
+
+        has = getattr(exchange, 'has', {}) or {}
+        self.batch_supported = bool(has.get('createOrders'))
+        self.open_orders_supported = bool(has.get('fetchOpenOrders'))
+
+        # Written by submitting threads, read by the loop thread
+        self.orders = {}
+        self._orders_lock = threading.Lock()
+        self.stats = {'submitted': 0, 'batches': 0, 'retries': 0, 'reconciled': 0, 'requests': 0}
+
+        self._loop = None
+        self._queue = None
+        self._semaphore = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._stopping = None
+
+    # ==================== LIFECYCLE ====================
+
+    def start(self):
+        """Start the background event loop"""
+        self._thread = threading.Thread(target=self._run, name='order-pipeline', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        self.logger.info(
+            f"✓ Order pipeline started ({'batched' if self.batch_supported else 'concurrent'} submission)"
+        )
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.Queue()
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self._stopping = asyncio.Event()
+        self._ready.set()
+        try:
+            self._loop.run_until_complete(self._main())
+        finally:
+            self._loop.close()
+
+    async def _main(self):
+        batcher = asyncio.ensure_future(self._batcher())
+        poller = asyncio.ensure_future(self._poller())
+        await self._stopping.wait()
+
+        batcher.cancel()
+        poller.cancel()
+        pending = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        close = getattr(self.exchange, 'close', None)
+        if close is not None:
+            try:
+                await close()
+            except Exception as e:
+                self.logger.error(f"Error closing exchange: {e}")
+
+    def stop(self, timeout=10):
+        """Stop after in-flight requests finish (open orders stay open on the exchange)"""
+        if self._loop is None or self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._stopping.set)
+        self._thread.join(timeout)
+
+    # ==================== SUBMISSION ====================
+
+    def submit(self, pair, side, amount, price=None, order_type=None, params=None, client_order_id=None):
+        """
+        Queue an order (thread-safe, returns immediately)
+
+        Returns:
+            LiveOrder: Track it with .state or .wait()
+        """
+        order = LiveOrder(pair, side, amount, price, order_type, params, client_order_id)
+        with self._orders_lock:
+            existing = self.orders.setdefault(order.client_order_id, order)
+        if existing is not order:
+            return existing
+
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, order)
+        return order
+
+    async def _batcher(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # Orders canceled while queued are never sent
+            batch = [order for order in batch if not order.done]
+            if not batch:
+                continue
+            for order in batch:
+                self._transition(order, SUBMITTED)
+
+            if self.batch_supported and len(batch) > 1:
+                asyncio.ensure_future(self._submit_batch(batch))
+            else:
+                for order in batch:
+                    asyncio.ensure_future(self._submit_one(order))
+
+    async def _request(self, method, *args, **kwargs):
+        async with self._semaphore:
+            self.stats['requests'] += 1
+            return await getattr(self.exchange, method)(*args, **kwargs)
+
+    def _order_args(self, order):
+        return {
+            'symbol': order.pair,
+            'type': order.order_type,
+            'side': order.side,
+            'amount': order.amount,
+            'price': order.price,
+            'params': dict(order.params, clientOrderId=order.client_order_id)
+        }
+
+    async def _submit_batch(self, batch):
+        for order in batch:
+            order.attempts += 1
+        self.stats['batches'] += 1
+        try:
+            results = await self._request('create_orders', [self._order_args(order) for order in batch])
+        except NetworkError as e:
+            # Some may have been placed: per-order retries reconcile by client id
+            self.logger.warning(f"Batch of {len(batch)} orders failed ({e}); retrying individually")
+            await asyncio.gather(*(self._retry(order, e) for order in batch))
+            return
+        except ExchangeError as e:
+            for order in batch:
+                self._reject(order, e)
+            return
+
+        for order, result in zip(batch, results):
+            self.stats['submitted'] += 1
+            self._apply(order, result)
+
+    async def _submit_one(self, order):
+        order.attempts += 1
+        try:
+            result = await self._request('create_order', **self._order_args(order))
+        except DuplicateOrderId:
+            # An earlier attempt got through
+            await self._reconcile(order)
+            return
+        except NetworkError as e:
+            await self._retry(order, e)
+            return
+        except ExchangeError as e:
+            self._reject(order, e)
+            return
+
+        self.stats['submitted'] += 1
+        self._apply(order, result)
+
+    async def _retry(self, order, error):
+        if order.attempts >= self.max_retries:
+            # The last attempt may still have reached the exchange
+            await self._reconcile(order, resubmit=False)
+            return
+        self.stats['retries'] += 1
+        await asyncio.sleep(self.retry_backoff * 2 ** (order.attempts - 1))
+        await self._submit_one(order)
+
+    async def _reconcile(self, order, resubmit=True):
+        """Find the order on the exchange by client order id"""
+        try:
+            result = await self._request('fetch_order', None, order.pair, {'clientOrderId': order.client_order_id})
+        except OrderNotFound:
+            if resubmit and order.attempts < self.max_retries:
+                await self._submit_one(order)
+            else:
+                self._fail(order, 'not found on exchange after retries')
+            return
+        except Exception as e:
+            self._fail(order, f'could not reconcile: {e}')
+            return
+
+        self.stats['reconciled'] += 1
+        self._apply(order, result)
+
+    # ==================== STATE ====================
+
+    def _transition(self, order, state):
+        if order.transition(state) and self.event_bus is not None:
+            self.event_bus.publish(ORDER_UPDATE, order.to_dict())
+
+    def _reject(self, order, error):
+        order.error = str(error)
+        self.logger.error(f"Order {order.client_order_id} rejected: {error}")
+        self._transition(order, REJECTED)
+
+    def _fail(self, order, reason):
+        order.error = reason
+        self.logger.error(f"Order {order.client_order_id} failed: {reason}")
+        self._transition(order, FAILED)
+
+    def _apply(self, order, result):
+        """Update an order from a ccxt order structure"""
+        if not result:
+            return
+        previous_state, previous_filled = order.state, order.filled
+        order.exchange_id = result.get('id') or order.exchange_id
+        order.filled = float(result.get('filled') or order.filled or 0)
+        order.average = result.get('average') or order.average
+
+        status = result.get('status')
+        if status == 'closed':
+            state = FILLED
+        elif status in ('canceled', 'cancelled', 'expired'):
+            state = CANCELED
+        elif status == 'rejected':
+            order.error = order.error or 'rejected by exchange'
+            state = REJECTED
+        elif order.filled > 0:
+            state = PARTIALLY_FILLED
+        else:
+            state = OPEN
+
+        if state != order.state or order.filled != previous_filled:
+            self._transition(order, state)
+
+        # Cancellation requested while the order was in flight
+        if order.cancel_requested and previous_state == SUBMITTED and order.state in (OPEN, PARTIALLY_FILLED):
+            asyncio.ensure_future(self._cancel(order))
+
+    # ==================== TRACKING ====================
+
+    async def _poller(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self._poll()
+            except Exception as e:
+                self.logger.error(f"Order status poll failed: {e}")
+
+    async def _poll(self):
+        self._evict()
+        self._expire()
+        with self._orders_lock:
+            live = [order for order in self.orders.values() if order.state in (OPEN, PARTIALLY_FILLED)]
+        if not live:
+            return
+
+        if not self.open_orders_supported:
+            await asyncio.gather(*(self._refresh(order) for order in live))
+            return
+
+        by_pair = {}
+        for order in live:
+            by_pair.setdefault(order.pair, []).append(order)
+
+        async def poll_pair(pair, orders):
+            open_orders = await self._request('fetch_open_orders', pair)
+            reported = {result.get('clientOrderId'): result for result in open_orders}
+            for order in orders:
+                if order.client_order_id in reported:
+                    self._apply(order, reported[order.client_order_id])
+                else:
+                    # No longer open: one lookup for its final state
+                    await self._refresh(order)
+
+        await asyncio.gather(*(poll_pair(pair, orders) for pair, orders in by_pair.items()))
+
+    async def _refresh(self, order):
+        try:
+            result = await self._request('fetch_order', order.exchange_id, order.pair,
+                                         {'clientOrderId': order.client_order_id})
+            self._apply(order, result)
+        except Exception as e:
+            self.logger.debug(f"Status refresh for {order.client_order_id} failed: {e}")
+
+    def _evict(self):
+        """Forget orders that finished more than `retention` seconds ago"""
+        cutoff = time.monotonic() - self.retention
+        with self._orders_lock:
+            expired = [client_id for client_id, order in self.orders.items()
+                       if order.done and order.finished_at < cutoff]
+            for client_id in expired:
+                del self.orders[client_id]
+
+    def _expire(self):
+        """Cancel orders still unacknowledged after `ack_timeout` (they may yet fill before the cancel lands)"""
+        if self.ack_timeout is None:
+            return
+        cutoff = time.monotonic() - self.ack_timeout
+        with self._orders_lock:
+            stale = [order for order in self.orders.values()
+                     if order.state in (NEW, SUBMITTED) and not order.cancel_requested and order.created < cutoff]
+        for order in stale:
+            self.logger.error(
+                f"Order {order.client_order_id} not acknowledged within {self.ack_timeout}s - canceling"
+            )
+            asyncio.ensure_future(self._cancel(order))
+
+    def cancel(self, order):
+        """
+        Request cancellation of an order (thread-safe)
+
+        A queued order is dropped before it is sent; one still in flight is
+        canceled as soon as the exchange acknowledges it.
+        """
+        return asyncio.run_coroutine_threadsafe(self._cancel(order), self._loop)
+
+    async def _cancel(self, order):
+        order.cancel_requested = True
+        if order.state == NEW:
+            self._transition(order, CANCELED)
+            return
+        if order.state not in (OPEN, PARTIALLY_FILLED):
+            return
+        try:
+            result = await self._request('cancel_order', order.exchange_id, order.pair,
+                                         {'clientOrderId': order.client_order_id})
+            self._apply(order, result or {'status': 'canceled'})
+        except Exception as e:
+            self.logger.error(f"Cancel {order.client_order_id} failed: {e}")
+
+    def open_orders(self, pair, timeout=30):
+        """Orders open on the exchange for a pair, as ccxt structures (blocking; not from the loop thread)"""
+        future = asyncio.run_coroutine_threadsafe(self._request('fetch_open_orders', pair), self._loop)
+        return future.result(timeout)
+
+    def adopt(self, result, params=None):
+        """
+        Track an order that is already on the exchange (e.g. placed before a restart)
+
+        Returns:
+            LiveOrder
+        """
+        order = LiveOrder(result['symbol'], result['side'], result['amount'], result.get('price'),
+                          result.get('type'), params, result['clientOrderId'])
+        with self._orders_lock:
+            existing = self.orders.setdefault(order.client_order_id, order)
+        if existing is not order:
+            return existing
+        order.transition(SUBMITTED)
+        self._apply(order, result)
+        return order
+
+    def pending(self):
+        """Orders queued for submission, not yet sent to the exchange"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def get_stats(self):
+        """Submission counters and orders per state"""
+        states = {}
+        with self._orders_lock:
+            orders = list(self.orders.values())
+        for order in orders:
+            states[order.state] = states.get(order.state, 0) + 1
+        return dict(self.stats, states=states)
+
+
+def create_exchange(config):
+    """
+    Build the async ccxt exchange for live crypto trading
+
+    Returns:
+        Exchange instance, or None if ccxt is unavailable
+    """
+    if not CCXT_AVAILABLE:
+        logging.getLogger(__name__).error("ccxt is not installed; live order pipeline unavailable")
+        return None
+
+    crypto_config = config['markets']['crypto']
+    exchange_class = getattr(ccxt_async, crypto_config['exchange'])
+    return exchange_class({
+        'apiKey': crypto_config.get('api_key', ''),
+        'secret': crypto_config.get('api_secret', ''),
+        'enableRateLimit': True,
+    })
@@ -0,0 +1,185 @@
+"""
+Portfolio State
+Incrementally maintained balance, exposure and daily P&L from position events
+"""
+
+import logging
+import threading
+from collections import defaultdict
+from datetime import date, datetime
+
+from utils.event_bus import TRADE_UPDATE, POSITION_UPDATE
+
+
+def _side(action):
+    return 1.0 if action == 'buy' else -1.0
+
+
+class PortfolioState:
+    """
+    Live account numbers the risk manager reads
+
+    Seeded from the database once, then updated from TRADE_UPDATE (fills
+    and closes) and POSITION_UPDATE (marks) events by applying each
+    position's change, so every read is O(1) and always reflects the
+    latest fill or price tick.
+    """
+
+    def __init__(self, config, db_manager=None, event_bus=None):
+        self.logger = logging.getLogger(__name__)
+        self.initial_balance = config.get('backtesting', {}).get('initial_balance', 10000)
+
+        # position id -> (pair, signed notional, unrealized pnl)
+        self._positions = {}
+        self.pair_net = defaultdict(float)
+        self.pair_gross = defaultdict(float)
+        self.gross_exposure = 0.0
+        self.net_exposure = 0.0
+        self.unrealized_pnl = 0.0
+        self.realized_pnl = 0.0
+        self.realized_today = 0.0
+        self.day = date.today()
+
+        # Bumped on every exposure change so dependents can cache derived values
+        self.version = 0
+
+        self._lock = threading.Lock()
+
+        if db_manager is not None:
+            self._load(db_manager)
+        if event_bus is not None:
+            event_bus.subscribe(TRADE_UPDATE, self._on_trade)
+            event_bus.subscribe(POSITION_UPDATE, self._on_position)
+
+    def _load(self, db_manager):
+        """Seed from stored trades"""
+        self.realized_pnl = db_manager.get_performance_stats().get('total_pnl', 0) or 0.0
+        self.realized_today = db_manager.get_realized_pnl_since(
+            datetime.combine(self.day, datetime.min.time())
+        )
+        for position in db_manager.get_all_open_positions():
+            self._apply(position)
+
+    # ==================== UPDATES ====================
+
+    def _on_trade(self, event_type, payload):
+        if payload.get('status') == 'open':
+            self.on_fill(payload)
+        elif payload.get('status') == 'closed':
+            self.on_close(payload)
+
+    def _on_position(self, event_type, payload):
+        if payload.get('status', 'open') == 'open':
+            self.on_mark(payload)
+
+    def on_fill(self, position):
+        """A position was opened"""
+        with self._lock:
+            self._roll_day()
+            self._apply(position)
+
+    def on_mark(self, position):
+        """A position's price or P&L changed (ignored unless the position is open here)"""
+        with self._lock:
+            # A mark can arrive after the position's close; re-applying it would revive its exposure
+            if position['id'] in self._positions:
+                self._apply(position)
+
+    def on_close(self, position):
+        """A position was closed; its P&L becomes realized"""
+        pnl = position.get('pnl', 0) or 0.0
+        with self._lock:
+            self._roll_day()
+            self._remove(position['id'])
+            self.realized_pnl += pnl
+            self.realized_today += pnl
+
+    def _apply(self, position):
+        """Replace a position's contribution with its current one (caller holds the lock)"""
+        self._remove(position['id'])
+
+        price = position.get('current_price') or position['entry_price']
+        notional = _side(position['action']) * position['size'] * price
+        pnl = position.get('pnl', 0) or 0.0
+        pair = position['pair']
+
+        self._positions[position['id']] = (pair, notional, pnl)
+        self.pair_net[pair] += notional
+        self.pair_gross[pair] += abs(notional)
+        self.net_exposure += notional
+        self.gross_exposure += abs(notional)
+        self.unrealized_pnl += pnl
+        self.version += 1
+
+    def _remove(self, position_id):
+        entry = self._positions.pop(position_id, None)
+        if entry is None:
+            return
+        pair, notional, pnl = entry
+        self.pair_net[pair] -= notional
+        self.pair_gross[pair] -= abs(notional)
+        self.net_exposure -= notional
+        self.gross_exposure -= abs(notional)
+        self.unrealized_pnl -= pnl
+        self.version += 1
+        if self.pair_gross[pair] <= 1e-9:
+            del self.pair_net[pair]
+            del self.pair_gross[pair]
+
+    def _roll_day(self):
+        today = date.today()
+        if today != self.day:
+            self.day = today
+            self.realized_today = 0.0
+
+    def reset_day(self):
+        """Start a new trading day"""
+        with self._lock:
+            self.day = date.today()
+            self.realized_today = 0.0
+
+    # ==================== READS ====================
+
+    @property
+    def open_positions(self):
+        return len(self._positions)
+
+    @property
+    def balance(self):
+        """Cash balance: starting balance plus all realized P&L"""
+        return self.initial_balance + self.realized_pnl
+
+    @property
+    def equity(self):
+        return self.balance + self.unrealized_pnl
+
+    @property
+    def daily_pnl(self):
+        """Today's realized P&L plus open positions' unrealized P&L"""
+        with self._lock:
+            self._roll_day()
+            return self.realized_today + self.unrealized_pnl
+
+    def exposure(self, pair):
+        """Signed net notional in a pair"""
+        return self.pair_net.get(pair, 0.0)
+
+    def exposures(self):
+        """(version, {pair: signed net notional}), copied together under the lock"""
+        with self._lock:
+            return self.version, dict(self.pair_net)
+
+    def get_summary(self):
+        """Snapshot of all portfolio numbers"""
+        with self._lock:
+            return {
+                'balance': self.balance,
+                'equity': self.equity,
+                'open_positions': self.open_positions,
+                'gross_exposure': self.gross_exposure,
+                'net_exposure': self.net_exposure,
+                'pair_exposure': dict(self.pair_net),
+                'realized_pnl_today': self.realized_today,
+                'unrealized_pnl': self.unrealized_pnl,
+                'daily_pnl': self.realized_today + self.unrealized_pnl
+            }
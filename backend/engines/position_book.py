@@ -0,0 +1,133 @@
+"""
+Position Book
+In-memory open positions with vectorized mark-to-market and batched persistence
+"""
+
+import logging
+import threading
+import time
+
+import numpy as np
+
+
+class _PairPositions:
+    """Open positions of one pair plus column arrays for marking them together"""
+
+    def __init__(self):
+        self.positions = {}
+        self._arrays = None
+
+    def add(self, position):
+        self.positions[position['id']] = position
+        self._arrays = None
+
+    def remove(self, position_id):
+        self._arrays = None
+        return self.positions.pop(position_id, None)
+
+    def arrays(self):
+        # Rebuilt only after an open or close, not per tick
+        if self._arrays is None:
+            positions = list(self.positions.values())
+            self._arrays = (
+                positions,
+                np.array([p['entry_price'] for p in positions], dtype=float),
+                np.array([p['size'] for p in positions], dtype=float),
+                np.array([1.0 if p['action'] == 'buy' else -1.0 for p in positions]),
+                np.array([p.get('fees') or 0.0 for p in positions], dtype=float)
+            )
+        return self._arrays
+
+
+class PositionBook:
+    """
+    Source of truth for open positions while the bot runs
+
+    Loaded from the database once. Each price update marks every open
+    position in the pair with a handful of array operations; the new marks
+    stay in memory and are written back as one executemany UPDATE at most
+    every `persist_interval` seconds, however often prices tick.
+    """
+
+    def __init__(self, db_manager, persist_interval=5.0):
+        """
+        Args:
+            db_manager: DatabaseManager for loading and persisting marks
+            persist_interval: Minimum seconds between mark writes
+        """
+        self.db = db_manager
+        self.logger = logging.getLogger(__name__)
+        self.persist_interval = persist_interval
+
+        self.pairs = {}
+        self._dirty = set()
+        self._last_persist = time.monotonic()
+        self._lock = threading.RLock()
+
+        for position in db_manager.get_all_open_positions():
+            self.add(position)
+
+    def add(self, position):
+        with self._lock:
+            self.pairs.setdefault(position['pair'], _PairPositions()).add(position)
+
+    def remove(self, position):
+        with self._lock:
+            book = self.pairs.get(position['pair'])
+            if book is not None:
+                book.remove(position['id'])
+            self._dirty.discard(position['id'])
+
+    def get_open_positions(self, pair=None):
+        """Open positions, optionally for one pair (the dicts themselves, not copies)"""
+        with self._lock:
+            if pair is not None:
+                book = self.pairs.get(pair)
+                return list(book.positions.values()) if book else []
+            return [position for book in self.pairs.values() for position in book.positions.values()]
+
+    def mark(self, pair, price):
+        """
+        Mark all open positions in a pair to `price`
+
+        Returns:
+            tuple: (marked positions, total unrealized P&L)
+        """
+        with self._lock:
+            book = self.pairs.get(pair)
+            if book is None or not book.positions:
+                return [], 0.0
+
+            positions, entry, size, direction, fees = book.arrays()
+            pnl = (price - entry) * size * direction - fees
+            pnl_percent = pnl / (entry * size) * 100
+
+            for position, position_pnl, position_percent in zip(positions, pnl.tolist(), pnl_percent.tolist()):
+                position['current_price'] = price
+                position['pnl'] = position_pnl
+                position['pnl_percent'] = position_percent
+                self._dirty.add(position['id'])
+
+        self.maybe_persist()
+        return positions, float(pnl.sum())
+
+    def maybe_persist(self):
+        """Write pending marks if the persist interval has elapsed"""
+        if time.monotonic() - self._last_persist >= self.persist_interval:
+            self.persist()
+
+    def persist(self):
+        """Write all pending marks in one batch"""
+        with self._lock:
+            self._last_persist = time.monotonic()
+            if not self._dirty:
+                return 0
+            rows = []
+            for book in self.pairs.values():
+                for position_id in self._dirty.intersection(book.positions):
+                    position = book.positions[position_id]
+                    rows.append((position['current_price'], position['pnl'], position['pnl_percent'], position_id))
+            self._dirty.clear()
+
+        self.db.update_marks(rows)
+        return len(rows)
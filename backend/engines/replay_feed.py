@@ -0,0 +1,253 @@
+"""
+Replay Data Feed
+Replays stored candles or ticks through the DataFeed interface on a simulated clock
+"""
+
+import logging
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from engines.synthetic_data import OHLCV, _pandas_freq, create_market, load_market
+
+
+class _Series:
+    """
+    One symbol's stored rows as column arrays
+
+    Rows are candles (open time + `duration`) or ticks (duration 0, all four
+    prices equal). Timestamps are int64 nanoseconds, either an array or a
+    regular grid (`start`, `step`) so memory-mapped datasets need no index.
+    """
+
+    def __init__(self, columns, duration, timestamps=None, start=None, step=None):
+        self.open, self.high, self.low, self.close, self.volume = columns
+        self.duration = duration
+        self.timestamps = timestamps
+        self.start = start
+        self.step = step
+        self.rows = len(self.close)
+
+    @property
+    def first(self):
+        return int(self.timestamps[0]) if self.timestamps is not None else self.start
+
+    @property
+    def last(self):
+        return int(self.timestamps[-1]) if self.timestamps is not None else self.start + (self.rows - 1) * self.step
+
+    def before(self, times):
+        """Number of rows opened strictly before each time"""
+        times = np.asarray(times, dtype=np.int64)
+        if self.timestamps is not None:
+            return np.searchsorted(self.timestamps, times, side='left')
+        return np.clip(-((self.start - times) // self.step), 0, self.rows)
+
+    def available(self, now):
+        """Number of rows complete at `now`"""
+        return int(self.before(now - self.duration + 1))
+
+    def bars(self, edges, available):
+        """
+        Aggregate rows into bars between consecutive `edges`
+
+        Returns:
+            tuple: (bar open times, ohlcv array shaped (bars, 5)); empty bars are skipped
+        """
+        bounds = np.minimum(self.before(edges), available)
+        filled = bounds[:-1] < bounds[1:]
+        if not filled.any():
+            return edges[:0], np.empty((0, 5))
+
+        lo, hi = int(bounds[0]), int(bounds[-1])
+        offsets = bounds[:-1][filled] - lo
+        ends = bounds[1:][filled] - 1
+        ohlcv = np.column_stack([
+            np.asarray(self.open[bounds[:-1][filled]], dtype=float),
+            np.maximum.reduceat(np.asarray(self.high[lo:hi], dtype=float), offsets),
+            np.minimum.reduceat(np.asarray(self.low[lo:hi], dtype=float), offsets),
+            np.asarray(self.close[ends], dtype=float),
+            np.add.reduceat(np.asarray(self.volume[lo:hi], dtype=float), offsets)
+        ])
+        return edges[:-1][filled], ohlcv
+
+
+class ReplayDataFeed:
+    """
+    Drop-in DataFeed that replays stored market data
+
+    The feed keeps a market clock. With `speed` > 0 it runs at that multiple
+    of real time (60 = one market minute per second) and `sleep()` waits in
+    real time; with `speed` 0 it only moves when the trading loop calls
+    `sleep()`, so the loop runs as fast as it can process data. Candles are
+    built on request for any timeframe at or above the stored one, and only
+    bars complete at the current market time are returned.
+    """
+
+    def __init__(self, config):
+        """
+        Args:
+            config: Bot configuration; reads the 'replay' section
+
+        Example:
+            replay:
+              enabled: true
+              source: data/synthetic   # dataset from engines.synthetic_data, a CSV directory, or omit to generate
+              speed: 0                 # 0 = as fast as possible
+              warmup_bars: 250         # stored bars already visible at start
+        """
+        replay_config = config.get('replay', {})
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+        self.speed = float(replay_config.get('speed', 0))
+        self.exhausted = False
+
+        self.series = self._load(replay_config.get('source'))
+        if not self.series:
+            raise ValueError("Replay source contains no data")
+
+        # Start once every symbol has its warm-up history
+        warmup = replay_config.get('warmup_bars', 250)
+        starts = []
+        for series in self.series.values():
+            step = series.step or (series.duration or int(np.median(np.diff(series.timestamps[:1000]))))
+            starts.append(series.first + warmup * step)
+        self.start_time = max(starts)
+        if replay_config.get('start'):
+            self.start_time = max(self.start_time, pd.Timestamp(replay_config['start']).value)
+        self.end_time = max(series.last + series.duration for series in self.series.values())
+
+        self._market_anchor = self.start_time
+        self._wall_anchor = time.monotonic()
+        self._wall_started = self._wall_anchor
+        self._lock = threading.Lock()
+        self._cache = {}
+        self.requests = 0
+
+        self.logger.info(
+            f"✓ Replaying {len(self.series)} symbols from {pd.Timestamp(self.start_time)} "
+            f"to {pd.Timestamp(self.end_time)} at {'max' if not self.speed else f'{self.speed:g}x'} speed"
+        )
+
+    # ==================== SOURCES ====================
+
+    def _load(self, source):
+        if source is None:
+            return self._from_market(create_market(self.config))
+
+        path = Path(source)
+        if not path.is_absolute():
+            path = Path(__file__).parent.parent.parent / path
+        if path.with_suffix('.npy').exists():
+            return self._from_dataset(path)
+        if path.is_dir():
+            return self._from_csv(path)
+        raise FileNotFoundError(f"Replay source not found: {path}")
+
+    def _from_market(self, market):
+        bars = self.config.get('synthetic_data', {}).get('bars', 5000)
+        frames = market.frames(bars)
+        return {symbol: self._from_frame(frame) for symbol, frame in frames.items()}
+
+    def _from_dataset(self, path):
+        data, meta = load_market(path)
+        step = pd.Timedelta(_pandas_freq(meta['timeframe'])).value
+        start = pd.Timestamp(meta['start']).value
+        return {
+            symbol: _Series([data[:, column, field] for field in range(5)], step, start=start, step=step)
+            for column, symbol in enumerate(meta['symbols'])
+        }
+
+    def _from_csv(self, directory):
+        """One file per symbol, e.g. BTC_USDT.csv: timestamp + OHLCV columns (candles) or price[, volume] (ticks)"""
+        series = {}
+        for path in sorted(directory.glob('*.csv')):
+            symbol = path.stem.replace('_', '/')
+            frame = pd.read_csv(path)
+            timestamps = pd.to_datetime(frame['timestamp'], unit='ms' if np.issubdtype(frame['timestamp'].dtype, np.number) else None)
+            frame.index = timestamps
+            series[symbol] = self._from_frame(frame.sort_index())
+        return series
+
+    def _from_frame(self, frame):
+        timestamps = frame.index.values.astype('datetime64[ns]').astype(np.int64)
+        if 'price' in frame.columns:
+            price = frame['price'].to_numpy(dtype=float)
+            volume = frame['volume'].to_numpy(dtype=float) if 'volume' in frame.columns else np.zeros(len(frame))
+            return _Series([price, price, price, price, volume], 0, timestamps=timestamps)
+
+        duration = int(np.median(np.diff(timestamps))) if len(timestamps) > 1 else 0
+        return _Series([frame[column].to_numpy(dtype=float) for column in OHLCV], duration, timestamps=timestamps)
+
+    # ==================== CLOCK ====================
+
+    @property
+    def now(self):
+        """Current market time (ns)"""
+        with self._lock:
+            if not self.speed:
+                return self._market_anchor
+            return self._market_anchor + int((time.monotonic() - self._wall_anchor) * self.speed * 1e9)
+
+    def sleep(self, seconds):
+        """Wait `seconds` of market time between trading loops"""
+        if self.speed:
+            time.sleep(seconds / self.speed)
+        else:
+            with self._lock:
+                self._market_anchor += int(seconds * 1e9)
+        if self.now >= self.end_time:
+            self.exhausted = True
+
+    # ==================== DATAFEED INTERFACE ====================
+
+    def get_market_data(self, symbol, timeframe='1h', limit=100):
+        """Last `limit` complete bars at the current market time, as DataFrame with OHLCV data"""
+        series = self.series.get(symbol)
+        if series is None:
+            self.logger.error(f"No replay data for {symbol}")
+            return None
+
+        self.requests += 1
+        now = self.now
+        bar = max(pd.Timedelta(_pandas_freq(timeframe)).value, series.duration)
+        end = now - now % bar
+        key = (symbol, timeframe, limit)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == end:
+            return cached[1]
+
+        edges = end - bar * np.arange(limit, -1, -1, dtype=np.int64)
+        opened, ohlcv = series.bars(edges, series.available(now))
+        if not len(opened):
+            return None
+
+        frame = pd.DataFrame(ohlcv, index=pd.DatetimeIndex(opened.astype('datetime64[ns]'), name='timestamp'),
+                             columns=OHLCV)
+        self._cache[key] = (end, frame)
+        return frame
+
+    def get_current_price(self, symbol):
+        """Last traded price (latest tick or last complete candle's close)"""
+        series = self.series.get(symbol)
+        if series is None:
+            return None
+        available = series.available(self.now)
+        return float(series.close[available - 1]) if available else None
+
+    def get_stats(self):
+        """Replay progress: market time covered versus wall time"""
+        wall = time.monotonic() - self._wall_started
+        market = (self.now - self.start_time) / 1e9
+        return {
+            'symbols': len(self.series),
+            'market_time': str(pd.Timestamp(self.now)),
+            'market_seconds': market,
+            'wall_seconds': wall,
+            'speedup': market / wall if wall > 0 else 0.0,
+            'requests': self.requests,
+            'exhausted': self.exhausted
+        }
@@ -22,22 +22,58 @@ class RiskManager:
         self.risk_per_trade_percent = risk_config['risk_per_trade_percent']
         self.max_daily_loss = risk_config['max_daily_loss']
         
-        # Track daily statistics
+        # Optional notional limits (0 disables)
+        self.max_pair_exposure = risk_config.get('max_pair_exposure', 0)
+        self.max_gross_exposure = risk_config.get('max_gross_exposure', 0)
+        self.max_correlated_exposure = risk_config.get('max_correlated_exposure', 0)
+        self.max_var = risk_config.get('max_var', 0)
+        
+        # Track daily statistics (used when no portfolio state is attached)
         self.daily_pnl = 0
         self.open_positions_count = 0
+        self.portfolio = None
+        self.risk_model = None
+    
+    def attach_portfolio(self, portfolio):
+        """
+        Read balance, position count, exposure and daily P&L from a live PortfolioState
+        
+        Args:
+            portfolio: PortfolioState kept current from position events
+        """
+        self.portfolio = portfolio
+    
+    def attach_risk_model(self, risk_model):
+        """
+        Enable correlation and VaR limits
+        
+        Args:
+            risk_model: PortfolioRiskModel fed with candle closes
+        """
+        self.risk_model = risk_model
     
-    def calculate_position_size(self, entry_price, stop_loss_price, account_balance=10000):
+    def _open_positions(self):
+        return self.portfolio.open_positions if self.portfolio else self.open_positions_count
+    
+    def _daily_pnl(self):
+        return self.portfolio.daily_pnl if self.portfolio else self.daily_pnl
+    
+    def calculate_position_size(self, entry_price, stop_loss_price, account_balance=None):
         """
         Calculate position size based on risk parameters
         
         Args:
             entry_price: Entry price
             stop_loss_price: Stop loss price
-            account_balance: Account balance (for percentage-based sizing)
+            account_balance: Account balance (for percentage-based sizing);
+                defaults to the portfolio balance, or 10000 without one
             
         Returns:
             Position size in base currency
         """
+        if account_balance is None:
+            account_balance = self.portfolio.balance if self.portfolio else 10000
+        
         # Calculate risk per trade in dollars
         risk_amount = account_balance * (self.risk_per_trade_percent / 100)
         
@@ -59,18 +95,20 @@ class RiskManager:
     
     def can_open_position(self):
         """Check if we can open a new position"""
-        if self.open_positions_count >= self.max_positions:
-            self.logger.debug(f"Max positions reached: {self.open_positions_count}/{self.max_positions}")
+        open_positions = self._open_positions()
+        if open_positions >= self.max_positions:
+            self.logger.debug(f"Max positions reached: {open_positions}/{self.max_positions}")
             return False
         
         # Check daily loss limit
-        if abs(self.daily_pnl) >= self.max_daily_loss:
-            self.logger.warning(f"Daily loss limit reached: ${self.daily_pnl:.2f}")
+        daily_pnl = self._daily_pnl()
+        if daily_pnl <= -self.max_daily_loss:
+            self.logger.warning(f"Daily loss limit reached: ${daily_pnl:.2f}")
             return False
         
         return True
     
-    def check_risk_limits(self, pair, action, size):
+    def check_risk_limits(self, pair, action, size, price=None):
         """
         Verify trade meets risk requirements
         
@@ -78,6 +116,7 @@ class RiskManager:
             pair: Trading pair
             action: buy/sell
             size: Position size
+            price: Entry price (needed for exposure limits)
             
         Returns:
             bool: True if trade is allowed
@@ -86,14 +125,42 @@ class RiskManager:
         if not self.can_open_position():
             return False
         
-        # Add more risk checks as needed
+        if self.portfolio is None or price is None:
+            return True
+        
+        notional = size * price
+        
+        # Exposure limits against the live portfolio
+        if self.max_pair_exposure:
+            pair_exposure = self.portfolio.exposure(pair) + (notional if action == 'buy' else -notional)
+            if abs(pair_exposure) > self.max_pair_exposure:
+                self.logger.warning(f"Pair exposure limit for {pair}: ${abs(pair_exposure):.2f}")
+                return False
+        
+        if self.max_gross_exposure and self.portfolio.gross_exposure + notional > self.max_gross_exposure:
+            self.logger.warning(f"Gross exposure limit reached: ${self.portfolio.gross_exposure:.2f}")
+            return False
+        
+        # Correlation-adjusted exposure and value at risk with the trade added
+        if self.risk_model and (self.max_correlated_exposure or self.max_var):
+            risk = self.risk_model.evaluate(pair, notional if action == 'buy' else -notional)
+            
+            if self.max_correlated_exposure and risk['correlated_exposure'] > self.max_correlated_exposure:
+                self.logger.warning(f"Correlated exposure limit: ${risk['correlated_exposure']:.2f}")
+                return False
+            
+            var = max(risk['parametric_var'], risk['historical_var'])
+            if self.max_var and var > self.max_var:
+                self.logger.warning(f"VaR limit: ${var:.2f} > ${self.max_var:.2f}")
+                return False
+        
         return True
     
     def update_daily_pnl(self, pnl):
         """Update daily P&L tracking"""
         self.daily_pnl += pnl
         
-        if abs(self.daily_pnl) >= self.max_daily_loss:
+        if self.daily_pnl <= -self.max_daily_loss:
             self.logger.critical(f"⚠️  DAILY LOSS LIMIT REACHED: ${self.daily_pnl:.2f}")
     
     def increment_positions(self):
@@ -107,14 +174,22 @@ class RiskManager:
     def reset_daily_stats(self):
         """Reset daily statistics (call at start of each trading day)"""
         self.daily_pnl = 0
+        if self.portfolio:
+            self.portfolio.reset_day()
         self.logger.info("Daily statistics reset")
     
     def get_risk_summary(self):
         """Get current risk metrics"""
-        return {
-            'daily_pnl': self.daily_pnl,
-            'open_positions': self.open_positions_count,
+        daily_pnl = self._daily_pnl()
+        summary = {
+            'daily_pnl': daily_pnl,
+            'open_positions': self._open_positions(),
             'max_positions': self.max_positions,
-            'remaining_daily_loss': self.max_daily_loss - abs(self.daily_pnl),
+            'remaining_daily_loss': self.max_daily_loss + min(daily_pnl, 0),
             'max_position_size': self.max_position_size
         }
+        if self.portfolio:
+            summary.update(self.portfolio.get_summary())
+        if self.risk_model:
+            summary.update(self.risk_model.get_summary())
+        return summary
@@ -0,0 +1,219 @@
+"""
+Portfolio Risk Metrics
+Rolling return covariance, correlation-adjusted exposure and VaR for pre-trade checks
+"""
+
+import logging
+import math
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+
+class RollingCovariance:
+    """
+    Covariance of per-candle returns over a fixed window, updated in O(n²) per candle
+
+    Keeps a ring buffer of the last `window` return rows together with
+    running sums and cross-product sums; each new candle adds its row and
+    subtracts the one leaving the window instead of recomputing.
+    """
+
+    def __init__(self, pairs, window=250):
+        self.pairs = list(pairs)
+        self.index = {pair: i for i, pair in enumerate(self.pairs)}
+        self.window = window
+
+        n = len(self.pairs)
+        self.returns = np.zeros((window, n))
+        self.sums = np.zeros(n)
+        self.cross = np.zeros((n, n))
+        self.count = 0
+        self._head = 0
+
+        self.last_close = np.full(n, np.nan)
+        self.last_timestamp = None
+
+    def on_candle(self, timestamp, closes):
+        """
+        Add one candle of closes for all pairs
+
+        Args:
+            timestamp: Candle timestamp; repeats of the last one are ignored
+            closes: {pair: close}; missing pairs are carried forward (zero return)
+
+        Returns:
+            bool: True if a new row was added
+        """
+        if timestamp is not None and timestamp == self.last_timestamp:
+            return False
+
+        current = self.last_close.copy()
+        for pair, close in closes.items():
+            i = self.index.get(pair)
+            if i is not None and close and close > 0:
+                current[i] = close
+
+        first = self.last_timestamp is None
+        self.last_timestamp = timestamp
+        previous, self.last_close = self.last_close, current
+        if first:
+            return False
+
+        row = np.log(current / previous)
+        row[~np.isfinite(row)] = 0.0
+        self.push(row)
+        return True
+
+    def push(self, row):
+        """Add one row of returns, dropping the oldest once the window is full"""
+        if self.count == self.window:
+            old = self.returns[self._head]
+            self.sums -= old
+            self.cross -= np.outer(old, old)
+        else:
+            self.count += 1
+
+        self.returns[self._head] = row
+        self.sums += row
+        self.cross += np.outer(row, row)
+        self._head = (self._head + 1) % self.window
+
+        # Re-sum once per full window so subtraction error cannot accumulate
+        if self._head == 0:
+            self.sums = self.returns.sum(axis=0)
+            self.cross = self.returns.T @ self.returns
+
+    def covariance(self):
+        """Sample covariance matrix of returns in the window"""
+        if self.count < 2:
+            return np.zeros_like(self.cross)
+        mean = self.sums / self.count
+        return (self.cross - self.count * np.outer(mean, mean)) / (self.count - 1)
+
+    def window_returns(self):
+        """Return rows currently in the window (order does not matter for quantiles)"""
+        return self.returns[:self.count]
+
+
+class PortfolioRiskModel:
+    """
+    Pre-trade correlation and VaR checks against the live portfolio
+
+    Covariance-derived matrices are refreshed once per candle and the
+    portfolio-dependent products (Σw, Cw, Rw) once per portfolio change.
+    A pre-trade check then only adjusts those cached products for the one
+    pair being traded, which keeps it to a few microseconds plus a
+    partition over the return window for historical VaR.
+    """
+
+    def __init__(self, pairs, portfolio, window=250, confidence=0.99):
+        """
+        Args:
+            pairs: Every traded pair
+            portfolio: PortfolioState providing per-pair net exposure
+            window: Candles of returns kept
+            confidence: VaR confidence level
+        """
+        self.logger = logging.getLogger(__name__)
+        self.portfolio = portfolio
+        self.confidence = confidence
+        self.z = NormalDist().inv_cdf(confidence)
+        self.rolling = RollingCovariance(pairs, window)
+
+        n = len(self.rolling.pairs)
+        self.cov = np.zeros((n, n))
+        self.corr = np.eye(n)
+        self._std = np.zeros(n)
+
+        self._cache_key = None
+        self._weights = np.zeros(n)
+
+    def update(self, history):
+        """
+        Feed the latest candles of every pair
+
+        The first call seeds the window from the candle history; later calls
+        add only the newest candle.
+
+        Args:
+            history: {pair: close price Series indexed by candle time}
+        """
+        if self.rolling.last_timestamp is None:
+            closes = pd.DataFrame(history).sort_index().ffill().iloc[-(self.rolling.window + 1):]
+            for timestamp, row in closes.iterrows():
+                self.rolling.on_candle(timestamp, row.dropna().to_dict())
+            self._recompute()
+            return
+
+        timestamp = max(series.index[-1] for series in history.values())
+        if self.rolling.on_candle(timestamp, {pair: float(series.iloc[-1]) for pair, series in history.items()}):
+            self._recompute()
+
+    def _recompute(self):
+        """Refresh covariance-derived matrices (once per candle)"""
+        self.cov = self.rolling.covariance()
+        self._std = np.sqrt(np.clip(np.diag(self.cov), 0, None))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = self.cov / np.outer(self._std, self._std)
+        corr[~np.isfinite(corr)] = 0.0
+        np.fill_diagonal(corr, 1.0)
+        self.corr = corr
+        self._cache_key = None
+
+    def _refresh(self):
+        """Recompute portfolio products when exposure or matrices changed"""
+        # A copy: event-bus and bracket threads change the portfolio while this runs
+        version, exposures = self.portfolio.exposures()
+        key = (version, self.rolling.count, self.rolling._head)
+        if key == self._cache_key:
+            return
+        self._cache_key = key
+
+        weights = np.zeros(len(self.rolling.pairs))
+        for pair, exposure in exposures.items():
+            i = self.rolling.index.get(pair)
+            if i is not None:
+                weights[i] = exposure
+        self._weights = weights
+        self._cov_w = self.cov @ weights
+        self._corr_w = self.corr @ weights
+        self._variance = float(weights @ self._cov_w)
+        self._correlated = float(weights @ self._corr_w)
+        self._pnl = self.rolling.window_returns() @ weights
+
+    def evaluate(self, pair=None, delta=0.0):
+        """
+        Risk of the current portfolio, optionally with a trade added
+
+        Args:
+            pair: Pair of the proposed trade
+            delta: Signed notional change (+ buy, - sell)
+
+        Returns:
+            dict: correlated_exposure, parametric_var, historical_var (dollars per candle)
+        """
+        self._refresh()
+        variance, correlated, pnl = self._variance, self._correlated, self._pnl
+
+        i = self.rolling.index.get(pair)
+        if i is not None and delta:
+            variance += 2 * delta * self._cov_w[i] + delta * delta * self.cov[i, i]
+            correlated += 2 * delta * self._corr_w[i] + delta * delta
+            pnl = pnl + delta * self.rolling.returns[:self.rolling.count, i]
+
+        historical = 0.0
+        if len(pnl) >= 20:
+            k = int((1 - self.confidence) * len(pnl))
+            historical = max(0.0, -float(np.partition(pnl, k)[k]))
+
+        return {
+            'correlated_exposure': math.sqrt(max(correlated, 0.0)),
+            'parametric_var': self.z * math.sqrt(max(variance, 0.0)),
+            'historical_var': historical
+        }
+
+    def get_summary(self):
+        """Current portfolio risk and return history depth"""
+        return dict(self.evaluate(), returns_window=self.rolling.count)
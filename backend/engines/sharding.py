@@ -0,0 +1,482 @@
+"""
+Sharded Trading Workers
+Spread multi-tenant trading across processes by consistent hashing on user id
+"""
+
+import bisect
+import hashlib
+import logging
+import multiprocessing as mp
+import threading
+import time
+from collections import defaultdict
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from database.db_manager import DatabaseManager
+from engines.multi_tenant_engine import MultiTenantEngine, user_version
+from utils.event_bus import EventBus
+
+
+CANDLE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+# User attributes a worker needs to run the user's bot
+USER_FIELDS = (
+    'id', 'is_active', 'auto_trading_enabled', 'subscription_tier', 'subscription_end',
+    'paper_balance', 'max_position_size', 'max_positions', 'daily_loss_limit',
+    'enabled_strategies', 'trading_pairs', 'updated_at'
+)
+
+
+def snapshot_user(user):
+    """Picklable copy of the user fields the engine reads"""
+    return {field: getattr(user, field, None) for field in USER_FIELDS}
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.blake2b(str(key).encode(), digest_size=8).digest(), 'big')
+
+
+class ConsistentHashRing:
+    """Hash ring with virtual nodes; adding or removing a node moves ~1/N of the keys"""
+
+    def __init__(self, vnodes=128):
+        self.vnodes = vnodes
+        self._hashes = []
+        self._owners = {}
+
+    def add_node(self, node):
+        for replica in range(self.vnodes):
+            point = _hash(f'{node}#{replica}')
+            bisect.insort(self._hashes, point)
+            self._owners[point] = node
+
+    def remove_node(self, node):
+        points = {point for point, owner in self._owners.items() if owner == node}
+        self._hashes = [point for point in self._hashes if point not in points]
+        for point in points:
+            del self._owners[point]
+
+    def get_node(self, key):
+        """Node owning a key (None if the ring is empty)"""
+        if not self._hashes:
+            return None
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[self._hashes[index]]
+
+    @property
+    def nodes(self):
+        return set(self._owners.values())
+
+
+class CandleBroadcast:
+    """
+    Candle arrays for every feed in one shared memory segment
+
+    The coordinator writes each (pair, timeframe) once per cycle; every
+    worker reads the same pages instead of receiving its own copy.
+    """
+
+    def __init__(self, max_feeds=256, max_candles=300):
+        self.max_feeds = max_feeds
+        self.max_candles = max_candles
+        size = max_feeds * max_candles * len(CANDLE_COLUMNS) * 8
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.array = np.ndarray((max_feeds, max_candles, len(CANDLE_COLUMNS)), dtype=np.float64, buffer=self.shm.buf)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def publish(self, frames):
+        """
+        Write candle frames into the segment
+
+        Args:
+            frames: {(pair, timeframe): OHLCV DataFrame}
+
+        Returns:
+            dict: {(pair, timeframe): (row, length)} layout for readers
+        """
+        if len(frames) > self.max_feeds:
+            raise ValueError(f"{len(frames)} feeds exceed broadcast capacity of {self.max_feeds}")
+
+        layout = {}
+        for row, (key, frame) in enumerate(frames.items()):
+            values = frame[list(CANDLE_COLUMNS)].to_numpy(dtype=np.float64)[-self.max_candles:]
+            self.array[row, :len(values)] = values
+            layout[key] = (row, len(values))
+        return layout
+
+    def close(self):
+        del self.array
+        self.shm.close()
+        self.shm.unlink()
+
+
+class SharedCandleFeed:
+    """Data feed for a worker, reading the coordinator's broadcast segment"""
+
+    def __init__(self, name, max_feeds, max_candles):
+        # Spawned workers share the coordinator's resource tracker, which unlinks the segment
+        self.shm = shared_memory.SharedMemory(name=name)
+        self.array = np.ndarray((max_feeds, max_candles, len(CANDLE_COLUMNS)), dtype=np.float64, buffer=self.shm.buf)
+        self.layout = {}
+        self._frames = {}
+
+    def update(self, layout):
+        """Switch to a newly published cycle"""
+        self.layout = layout
+        self._frames = {}
+
+    def get_market_data(self, symbol, timeframe='1h', limit=100):
+        key = (symbol, timeframe)
+        frame = self._frames.get(key)
+        if frame is None:
+            entry = self.layout.get(key)
+            if entry is None:
+                return None
+            row, length = entry
+            frame = pd.DataFrame(self.array[row, :length].copy(), columns=CANDLE_COLUMNS)
+            self._frames[key] = frame
+        return frame
+
+
+def _shard_worker(config, connection, segment, max_feeds, max_candles, forward_events, database_path=None):
+    """Worker process: one MultiTenantEngine driven by coordinator commands"""
+    feed = SharedCandleFeed(segment, max_feeds, max_candles)
+    event_bus = None
+    events = []
+    if forward_events:
+        event_bus = EventBus()
+        event_bus.subscribe(EventBus.WILDCARD, lambda event_type, payload: events.append((event_type, payload)))
+    db_manager = None
+    if database_path is not None:
+        db_manager = DatabaseManager({'database': {'type': 'sqlite', 'sqlite_path': database_path}})
+    engine = MultiTenantEngine(config, data_feed=feed, event_bus=event_bus, db_manager=db_manager)
+
+    while True:
+        command, argument = connection.recv()
+
+        if command == 'cycle':
+            feed.update(argument)
+            stats = engine.run_cycle()
+            connection.send((stats, events[:]))
+            events.clear()
+        elif command == 'feeds':
+            connection.send(engine.feeds())
+        elif command == 'add_users':
+            for user in argument:
+                engine.add_user(SimpleNamespace(**user))
+            connection.send(len(engine.tenants))
+        elif command == 'remove_users':
+            for user_id in argument:
+                engine.remove_user(user_id)
+            connection.send(len(engine.tenants))
+        elif command == 'export':
+            connection.send([tenant for tenant in map(engine.export_tenant, argument) if tenant is not None])
+        elif command == 'import':
+            for tenant in argument:
+                engine.import_tenant(tenant)
+            connection.send(len(engine.tenants))
+        elif command == 'summary':
+            connection.send(engine.get_summary())
+        elif command == 'stop':
+            engine.flush_marks()
+            connection.send(True)
+            return
+
+
+class ShardCoordinator:
+    """
+    Owns the hash ring, the market data fetch and the worker processes
+
+    Each cycle the coordinator fetches every (pair, timeframe) some worker
+    needs exactly once, writes the candles to shared memory and lets all
+    workers run their users concurrently. Users are placed by consistent
+    hashing on user id; when a worker joins or leaves only the users whose
+    owner changed are moved, together with their open positions.
+
+    With a database_path every worker opens its own DatabaseManager on that
+    SQLite file, so trades, marks and balances are stored as in the
+    single-process engine and a crashed worker's users get their open
+    positions back on the survivors.
+    """
+
+    def __init__(self, config, data_feed, workers=None, vnodes=128, event_bus=None,
+                 max_feeds=256, max_candles=300, database_path=None):
+        """
+        Args:
+            config: Bot configuration shared by all workers
+            data_feed: Object with get_market_data(pair, timeframe, limit)
+            workers: Initial worker count (defaults to CPU count)
+            vnodes: Virtual nodes per worker on the hash ring
+            event_bus: Optional EventBus; worker trade/PnL events are republished on it
+            max_feeds: Maximum (pair, timeframe) feeds per cycle
+            max_candles: Candles kept per feed
+            database_path: Optional SQLite path (as for DatabaseManager) holding users and their trades
+        """
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+        self.data_feed = data_feed
+        self.initial_workers = workers or mp.cpu_count()
+        self.event_bus = event_bus
+        self.database_path = database_path
+
+        self.ring = ConsistentHashRing(vnodes)
+        self.broadcast = CandleBroadcast(max_feeds, max_candles)
+        self.context = mp.get_context('spawn')
+
+        self.workers = {}       # name -> (process, connection)
+        self.users = {}         # user id -> user snapshot
+        self.assignment = {}    # user id -> worker name
+        self._next_worker = 0
+        self._stopped = threading.Event()
+
+    # ==================== WORKERS ====================
+
+    def start(self):
+        """Start the initial workers"""
+        for _ in range(self.initial_workers):
+            self.add_worker()
+        self.logger.info(f"✓ Shard coordinator started with {len(self.workers)} workers")
+
+    def add_worker(self):
+        """Start a worker and move its share of users to it"""
+        name = f'shard-{self._next_worker}'
+        self._next_worker += 1
+
+        parent, child = self.context.Pipe()
+        process = self.context.Process(
+            target=_shard_worker,
+            args=(self.config, child, self.broadcast.name, self.broadcast.max_feeds,
+                  self.broadcast.max_candles, self.event_bus is not None, self.database_path),
+            name=name,
+            daemon=True
+        )
+        process.start()
+        self.workers[name] = (process, parent)
+        self.ring.add_node(name)
+
+        self._rebalance()
+        self._place_unassigned()
+        return name
+
+    def remove_worker(self, name):
+        """Move a worker's users (with their positions) elsewhere and stop it"""
+        if name not in self.workers:
+            return
+        self.ring.remove_node(name)
+        self._rebalance()
+
+        process, connection = self.workers.pop(name)
+        self._call(connection, 'stop')
+        process.join(5)
+
+    def _rebalance(self):
+        """Move users whose ring owner changed"""
+        moves = defaultdict(list)
+        for user_id, current in self.assignment.items():
+            owner = self.ring.get_node(user_id)
+            if owner != current:
+                moves[(current, owner)].append(user_id)
+
+        moved = 0
+        for (source, target), user_ids in moves.items():
+            tenants = self._call(self.workers[source][1], 'export', user_ids)
+            self._call(self.workers[target][1], 'import', tenants)
+
+            # Users without a tenant on the source (e.g. not trading yet) are simply re-added
+            missing = set(user_ids) - {tenant.user_id for tenant in tenants}
+            if missing:
+                self._call(self.workers[target][1], 'add_users', [self.users[uid] for uid in missing])
+
+            for user_id in user_ids:
+                self.assignment[user_id] = target
+            moved += len(user_ids)
+
+        if moved:
+            self.logger.info(f"Rebalanced {moved} users across {len(self.workers)} workers")
+
+    def _call(self, connection, command, argument=None):
+        connection.send((command, argument))
+        return connection.recv()
+
+    def _broadcast(self, command, argument=None):
+        """
+        Send a command to every worker, then gather replies (workers run concurrently)
+
+        Workers found dead on send or receive are dropped only after every
+        live worker's reply has been read, so recovery never interleaves its
+        own commands with a pending reply.
+        """
+        sent, lost = [], []
+        for name in list(self.workers):
+            try:
+                self.workers[name][1].send((command, argument))
+                sent.append(name)
+            except (EOFError, OSError):
+                lost.append(name)
+
+        replies = {}
+        for name in sent:
+            try:
+                replies[name] = self.workers[name][1].recv()
+            except (EOFError, OSError):
+                lost.append(name)
+
+        if lost:
+            self._workers_lost(lost)
+        return replies
+
+    def _workers_lost(self, names):
+        """
+        Recover from crashed workers: their users restart on the survivors, which
+        reload stored open positions when a database is used
+        """
+        lost = '' if self.database_path is not None else ' (open paper positions are lost)'
+        orphans = []
+        for name in names:
+            self.logger.error(f"Worker {name} died; reassigning its users{lost}")
+            process, connection = self.workers.pop(name)
+            connection.close()
+            process.join(0)
+            self.ring.remove_node(name)
+            orphans.extend(uid for uid, owner in self.assignment.items() if owner == name)
+
+        for user_id in orphans:
+            del self.assignment[user_id]
+        self._place_unassigned()
+
+    def _place_unassigned(self):
+        """Put known users without a worker (e.g. after a crash) on their ring owners"""
+        unassigned = [uid for uid in self.users if uid not in self.assignment]
+        if not unassigned:
+            return
+        if not self.workers:
+            self.logger.error(f"No workers left; {len(unassigned)} users wait for add_worker()")
+            return
+        self.add_users([SimpleNamespace(**self.users[uid]) for uid in unassigned])
+
+    # ==================== USERS ====================
+
+    def add_users(self, users):
+        """Place users on their ring owners"""
+        batches = defaultdict(list)
+        for user in users:
+            snapshot = snapshot_user(user)
+            owner = self.ring.get_node(snapshot['id'])
+            self.users[snapshot['id']] = snapshot
+            self.assignment[snapshot['id']] = owner
+            batches[owner].append(snapshot)
+
+        for owner, snapshots in batches.items():
+            self._call(self.workers[owner][1], 'add_users', snapshots)
+
+    def remove_user(self, user_id):
+        """Stop a user's bot"""
+        owner = self.assignment.pop(user_id, None)
+        self.users.pop(user_id, None)
+        if owner in self.workers:
+            self._call(self.workers[owner][1], 'remove_users', [user_id])
+
+    def sync_users(self, users):
+        """
+        Send new and changed users to their workers and drop users that are gone
+
+        Unchanged users (same user_version) are not sent; their stored
+        snapshot is still updated so a later re-placement starts from it.
+        """
+        users = list(users)
+        present = {user.id for user in users}
+        for user_id in [user_id for user_id in self.users if user_id not in present]:
+            self.remove_user(user_id)
+
+        changed = []
+        for user in users:
+            previous = self.users.get(user.id)
+            version = user_version(user)
+            if previous is None or version is None or version != user_version(SimpleNamespace(**previous)):
+                changed.append(user)
+            else:
+                self.users[user.id] = snapshot_user(user)
+        if changed:
+            self.add_users(changed)
+
+    # ==================== CYCLE ====================
+
+    def run_cycle(self):
+        """
+        Fetch and broadcast market data once, then run every worker
+
+        Returns:
+            dict: Aggregated worker stats plus fetch and cycle timings
+        """
+        started = time.perf_counter()
+
+        feeds = set()
+        for worker_feeds in self._broadcast('feeds').values():
+            feeds.update(worker_feeds)
+
+        frames = {}
+        for pair, timeframe in sorted(feeds):
+            market_data = self.data_feed.get_market_data(pair, timeframe)
+            if market_data is not None and len(market_data) > 0:
+                frames[(pair, timeframe)] = market_data
+        layout = self.broadcast.publish(frames)
+        fetched = time.perf_counter()
+
+        totals = defaultdict(float)
+        for stats, events in self._broadcast('cycle', layout).values():
+            for key, value in stats.items():
+                if key == 'cycle_ms':
+                    totals['slowest_worker_ms'] = max(totals['slowest_worker_ms'], value)
+                else:
+                    totals[key] += value
+            if self.event_bus is not None:
+                for event_type, payload in events:
+                    self.event_bus.publish(event_type, payload)
+
+        totals['fetch_ms'] = (fetched - started) * 1000
+        totals['cycle_ms'] = (time.perf_counter() - started) * 1000
+        return dict(totals)
+
+    def get_summary(self):
+        """Users and positions per worker"""
+        return self._broadcast('summary')
+
+    # ==================== LIFECYCLE ====================
+
+    def run(self, interval=60, load_users=None):
+        """
+        Run cycles until stop() is called
+
+        Args:
+            interval: Seconds between cycles
+            load_users: Optional Callable returning every user; synced before each cycle
+        """
+        self.logger.info(f"🔴 Shard coordinator running ({len(self.users)} users, {len(self.workers)} workers)")
+        while not self._stopped.is_set():
+            try:
+                if load_users is not None:
+                    self.sync_users(load_users())
+                stats = self.run_cycle()
+                self.logger.debug(f"Cycle: {stats}")
+            except Exception as e:
+                self.logger.error(f"Error in sharded cycle: {e}", exc_info=True)
+            self._stopped.wait(interval)
+
+    def stop(self):
+        """Stop the run loop and every worker, and release the shared segment"""
+        self._stopped.set()
+        for name, (process, connection) in list(self.workers.items()):
+            try:
+                self._call(connection, 'stop')
+            except (EOFError, OSError):
+                pass
+            process.join(5)
+        self.workers.clear()
+        self.broadcast.close()
@@ -0,0 +1,329 @@
+"""
+Bot State Snapshot
+Live in-memory bot state shared with the dashboard process through shared memory
+"""
+
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from multiprocessing import shared_memory
+from utils.event_bus import TRADE_UPDATE, POSITION_UPDATE, PNL_UPDATE
+
+
+DEFAULT_SEGMENT = os.getenv('BOT_STATE_SEGMENT', 'tradingbot_state')
+DEFAULT_SIZE = 4 * 1024 * 1024
+
+# Header: sequence number (odd while a write is in progress), payload length
+_HEADER = struct.Struct('<QI')
+
+
+class StateSnapshotWriter:
+    """
+    Single-writer seqlock over a shared memory segment
+
+    The payload is JSON serialized once per publish; readers copy the bytes
+    and retry if the sequence number moved while they were reading.
+    """
+
+    def __init__(self, name=DEFAULT_SEGMENT, size=DEFAULT_SIZE):
+        self.logger = logging.getLogger(__name__)
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a previous run; reuse it
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.capacity = self.shm.size - _HEADER.size
+        self.seq = _HEADER.unpack_from(self.shm.buf, 0)[0] & ~1
+
+    def publish(self, state):
+        """Write a new snapshot"""
+        data = json.dumps(state, default=str, separators=(',', ':')).encode('utf-8')
+        if len(data) > self.capacity:
+            self.logger.error(f"State snapshot too large ({len(data)} bytes), skipped")
+            return
+
+        buf = self.shm.buf
+        _HEADER.pack_into(buf, 0, self.seq + 1, 0)
+        buf[_HEADER.size:_HEADER.size + len(data)] = data
+        self.seq += 2
+        _HEADER.pack_into(buf, 0, self.seq, len(data))
+
+    def close(self, unlink=True):
+        """Release the segment"""
+        self.shm.close()
+        if unlink:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class StateSnapshotReader:
+    """
+    Lock-free reader for snapshots published by StateSnapshotWriter
+
+    While the sequence number stands still the segment is periodically
+    re-opened, so a bot restart (new segment) or exit (segment unlinked)
+    is picked up.
+    """
+
+    def __init__(self, name=DEFAULT_SEGMENT, reattach_interval=2.0):
+        self.name = name
+        self.reattach_interval = reattach_interval
+        self.shm = None
+        self._lock = threading.Lock()
+        self._last_change = 0.0
+        self._raw = (None, None)
+        self._parsed = (None, None)
+
+    def _attach(self):
+        if self.shm is not None:
+            if time.monotonic() - self._last_change < self.reattach_interval:
+                return True
+            self.shm.close()
+            self.shm = None
+
+        self._last_change = time.monotonic()
+        try:
+            self.shm = shared_memory.SharedMemory(name=self.name)
+        except FileNotFoundError:
+            self._raw = (None, None)
+            return False
+
+        # The bot owns the segment; stop this process's tracker from unlinking it
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(self.shm._name, 'shared_memory')
+        except Exception:
+            pass
+        return True
+
+    def read_raw(self):
+        """
+        Read the latest snapshot as JSON bytes
+
+        Returns:
+            tuple: (sequence, bytes) or (None, None) when no bot is publishing
+        """
+        with self._lock:
+            return self._read_raw()
+
+    def _read_raw(self):
+        if not self._attach():
+            return None, None
+
+        buf = self.shm.buf
+        for _ in range(100):
+            seq, length = _HEADER.unpack_from(buf, 0)
+            if seq == 0:
+                return None, None
+            if seq == self._raw[0]:
+                return self._raw
+            if seq & 1:
+                continue
+            data = bytes(buf[_HEADER.size:_HEADER.size + length])
+            if _HEADER.unpack_from(buf, 0)[0] == seq:
+                self._raw = (seq, data)
+                self._last_change = time.monotonic()
+                return self._raw
+
+        return self._raw
+
+    def read(self):
+        """Read the latest snapshot as a dict (None when no bot is publishing)"""
+        seq, data = self.read_raw()
+        if data is None:
+            return None
+        parsed = self._parsed
+        if parsed[0] != seq:
+            parsed = (seq, json.loads(data))
+            self._parsed = parsed
+        return parsed[1]
+
+
+class BotState:
+    """
+    Incrementally maintained view of the bot for the dashboard
+
+    Built from the database once at startup, then kept current from engine
+    events. Snapshots are published at most `max_rate` times per second and
+    account equity is sampled into the database every `equity_interval`
+    seconds for the equity chart.
+    """
+
+    def __init__(self, config, db_manager, event_bus, writer=None, max_rate=10, max_trades=50,
+                 equity_interval=60):
+        self.config = config
+        self.db = db_manager
+        self.logger = logging.getLogger(__name__)
+        self.writer = writer or StateSnapshotWriter()
+        self.interval = 1.0 / max_rate
+        self.equity_interval = equity_interval
+        self._last_equity_sample = 0.0
+
+        self.mode = config['trading_mode']
+        self.running = False
+        self.initial_balance = config.get('backtesting', {}).get('initial_balance', 10000)
+
+        self.positions = {}
+        self.recent_trades = deque(maxlen=max_trades)
+        self.unrealized_by_pair = {}
+        self.strategy_stats = {}
+        self.realized_pnl = 0.0
+        self.total_trades = 0
+        self.winning_trades = 0
+        self.trade_returns = deque(maxlen=500)
+
+        self._lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._stopped = False
+
+        self._load(db_manager)
+
+        for event_type in (TRADE_UPDATE, POSITION_UPDATE, PNL_UPDATE):
+            event_bus.subscribe(event_type, self._on_event)
+
+    def _load(self, db_manager):
+        """Seed state from the database once"""
+        for position in db_manager.get_all_open_positions():
+            self.positions[position['id']] = position
+
+        stats = db_manager.get_performance_stats()
+        self.total_trades = stats.get('total_trades', 0)
+        self.winning_trades = stats.get('winning_trades', 0)
+        self.realized_pnl = stats.get('total_pnl', 0) or 0.0
+
+        for trade in db_manager.get_trade_history(limit=self.recent_trades.maxlen):
+            if trade['status'] == 'closed':
+                self.recent_trades.append(trade)
+
+    def _on_event(self, event_type, payload):
+        with self._lock:
+            if event_type == PNL_UPDATE:
+                # A mark racing a close can arrive after the pair's book emptied
+                if self._has_positions(payload['pair']):
+                    self.unrealized_by_pair[payload['pair']] = payload['unrealized_pnl']
+                else:
+                    self.unrealized_by_pair.pop(payload['pair'], None)
+            elif event_type == POSITION_UPDATE:
+                # Marks only refresh positions still open here, never re-add closed ones
+                if payload.get('status') == 'open' and payload['id'] in self.positions:
+                    self.positions[payload['id']] = payload
+            elif payload.get('status') == 'open':
+                self.positions[payload['id']] = payload
+            else:
+                self._record_close(payload)
+        self._dirty.set()
+
+    def _has_positions(self, pair):
+        return any(position['pair'] == pair for position in self.positions.values())
+
+    def _record_close(self, trade):
+        """Apply a closed trade (caller holds the lock)"""
+        self.positions.pop(trade['id'], None)
+        self.recent_trades.appendleft(trade)
+
+        # Its unrealized P&L is now realized; keep equity from counting it twice
+        if not self._has_positions(trade['pair']):
+            self.unrealized_by_pair.pop(trade['pair'], None)
+
+        pnl = trade.get('pnl', 0) or 0
+        self.realized_pnl += pnl
+        self.total_trades += 1
+        if pnl > 0:
+            self.winning_trades += 1
+        self.trade_returns.append(trade.get('pnl_percent', 0) or 0)
+
+        stats = self.strategy_stats.setdefault(trade['strategy'], {'trades': 0, 'wins': 0, 'pnl': 0.0})
+        stats['trades'] += 1
+        stats['wins'] += 1 if pnl > 0 else 0
+        stats['pnl'] += pnl
+
+    def set_running(self, running):
+        """Update the running flag"""
+        self.running = running
+        self._dirty.set()
+
+    def _build(self):
+        """Assemble the snapshot dict (caller holds the lock)"""
+        unrealized = sum(self.unrealized_by_pair.values())
+        balance = self.initial_balance + self.realized_pnl
+
+        sharpe = 0.0
+        if len(self.trade_returns) > 1:
+            mean = sum(self.trade_returns) / len(self.trade_returns)
+            variance = sum((r - mean) ** 2 for r in self.trade_returns) / (len(self.trade_returns) - 1)
+            sharpe = (mean / variance ** 0.5) * (252 ** 0.5) if variance > 0 else 0.0
+
+        return {
+            'status': {
+                'running': self.running,
+                'mode': self.mode,
+                'balance': balance,
+                'equity': balance + unrealized,
+                'open_positions': len(self.positions)
+            },
+            'performance': {
+                'total_pnl': self.realized_pnl,
+                'unrealized_pnl': unrealized,
+                'win_rate': (self.winning_trades / self.total_trades * 100) if self.total_trades else 0,
+                'winning_trades': self.winning_trades,
+                'total_trades': self.total_trades,
+                'sharpe_ratio': sharpe
+            },
+            'positions': list(self.positions.values()),
+            'trades': list(self.recent_trades),
+            'strategies': self.strategy_stats,
+            'updated_at': datetime.utcnow().isoformat()
+        }
+
+    def publish(self):
+        """Publish a snapshot now"""
+        with self._lock:
+            state = self._build()
+        self.writer.publish(state)
+        return state
+
+    def _sample_equity(self, state):
+        """Store an equity sample if one is due"""
+        now = time.monotonic()
+        if now - self._last_equity_sample < self.equity_interval:
+            return
+        self._last_equity_sample = now
+
+        status = state['status']
+        self.db.save_equity_point(
+            datetime.utcnow(), status['equity'], status['balance'], state['performance']['unrealized_pnl']
+        )
+
+    def start(self):
+        """Publish snapshots whenever state changes, rate limited"""
+        self._sample_equity(self.publish())
+
+        def loop():
+            while not self._stopped:
+                # Wake at least once per equity interval so flat periods are sampled too
+                changed = self._dirty.wait(self.equity_interval)
+                self._dirty.clear()
+                if changed:
+                    state = self.publish()
+                else:
+                    with self._lock:
+                        state = self._build()
+                self._sample_equity(state)
+                time.sleep(self.interval)
+
+        threading.Thread(target=loop, name='bot-state-snapshot', daemon=True).start()
+        self.logger.info("✓ Dashboard state snapshot publishing started")
+
+    def stop(self):
+        """Publish a final snapshot and release shared memory"""
+        self._stopped = True
+        self.running = False
+        self.publish()
+        self.writer.close()
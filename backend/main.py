@@ -18,6 +18,8 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from engines.data_feed import DataFeed
 from engines.order_executor import OrderExecutor
 from engines.risk_manager import RiskManager
+from engines.portfolio_state import PortfolioState
+from engines.risk_metrics import PortfolioRiskModel
 from engines.backtester import Backtester
 from strategies.rsi_strategy import RSIStrategy
 from strategies.macd_strategy import MACDStrategy
@@ -25,8 +27,21 @@ from strategies.bollinger_strategy import BollingerStrategy
 from strategies.ma_crossover import MACrossoverStrategy
 from database.db_manager import DatabaseManager
 from utils.notifications import NotificationManager
+from utils.notification_dispatcher import PRIORITY_HIGH
+from utils.event_bus import EventBus
+from utils.latency import LatencyTracker
+from utils import metrics
 from utils.helpers import setup_logging, load_config
 
+LOOP_SECONDS = metrics.histogram(
+    'tradingbot_loop_duration_seconds', 'Duration of one trading loop over all pairs',
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+FETCH_SECONDS = metrics.histogram('tradingbot_market_data_fetch_seconds', 'Market data fetch latency', ['pair'])
+SIGNALS = metrics.counter('tradingbot_signals', 'Non-hold signals generated', ['strategy', 'action'])
+QUEUE_DEPTH = metrics.gauge('tradingbot_queue_depth', 'Items waiting in internal queues', ['queue'])
+
+
 class TradingBot:
     """Main Trading Bot Controller"""
     
@@ -37,21 +52,64 @@ class TradingBot:
         self.running = False
         
         # Initialize components
+        self.event_bus = EventBus()
         self.db_manager = DatabaseManager(self.config)
         self.risk_manager = RiskManager(self.config)
+        self.portfolio = PortfolioState(self.config, self.db_manager, self.event_bus)
+        self.risk_manager.attach_portfolio(self.portfolio)
+        self.risk_model = self._initialize_risk_model()
         self.notification_manager = NotificationManager(self.config)
-        self.data_feed = DataFeed(self.config)
-        self.order_executor = OrderExecutor(self.config, self.db_manager)
+        self.latency = LatencyTracker(self.config, on_breach=self._on_latency_breach)
+        self.data_feed = self._initialize_data_feed()
+        self.order_executor = OrderExecutor(self.config, self.db_manager, self.event_bus)
         
         # Initialize strategies
         self.strategies = self._initialize_strategies()
         
+        # Forward engine events to the API servers (dashboards, caches, alerts)
+        self.event_forwarder = self._initialize_realtime()
+        
+        # Live state for the web dashboard, published while trading
+        self.bot_state = None
+        self.brackets = None
+        self.platform_engine = None
+        
+        # Prometheus-style /metrics endpoint
+        self.metrics_server = self._initialize_metrics()
+        
         self.logger.info("=" * 60)
         self.logger.info("🚀 TRADING BOT INITIALIZED")
         self.logger.info(f"Mode: {self.config['trading_mode'].upper()}")
         self.logger.info(f"Active Strategies: {len(self.strategies)}")
         self.logger.info("=" * 60)
     
+    def _initialize_metrics(self):
+        """Serve /metrics when enabled and expose queue depths (read at scrape time)"""
+        metrics_config = self.config.get('metrics', {})
+        if not metrics_config.get('enabled', False):
+            return None
+        
+        QUEUE_DEPTH.labels('notifications').set_function(
+            lambda: sum(self.notification_manager.dispatcher.pending().values())
+        )
+        pipeline = self.order_executor.pipeline
+        if pipeline is not None:
+            QUEUE_DEPTH.labels('order_submit').set_function(pipeline.pending)
+        
+        try:
+            return metrics.start_http_server(metrics_config.get('port', 9100), metrics_config.get('host', '0.0.0.0'))
+        except OSError as e:
+            self.logger.error(f"Failed to start metrics server: {e}")
+            return None
+    
+    def _initialize_data_feed(self):
+        """Exchange/broker feed, or stored data replayed for offline load tests"""
+        if self.config.get('replay', {}).get('enabled', False):
+            from engines.replay_feed import ReplayDataFeed
+            return ReplayDataFeed(self.config)
+        
+        return DataFeed(self.config)
+    
     def _initialize_strategies(self):
         """Load and initialize enabled trading strategies"""
         strategies = []
@@ -79,6 +137,52 @@ class TradingBot:
         
         return strategies
     
+    def _on_latency_breach(self, stage, pair, elapsed_ms, budget_ms):
+        """Alert on a signal-to-order latency budget breach"""
+        if self.config.get('latency', {}).get('alert', False):
+            self.notification_manager.send_notification(
+                "⏱️  Latency Budget Exceeded",
+                f"Stage: {stage}\nPair: {pair}\nTook: {elapsed_ms:.2f}ms (budget {budget_ms:.2f}ms)"
+            )
+    
+    def _initialize_risk_model(self):
+        """Rolling covariance over all traded pairs for correlation and VaR limits"""
+        risk_config = self.config['risk_management']
+        risk_model = PortfolioRiskModel(
+            self._all_pairs(),
+            self.portfolio,
+            window=risk_config.get('returns_window', 250),
+            confidence=risk_config.get('var_confidence', 0.99)
+        )
+        self.risk_manager.attach_risk_model(risk_model)
+        return risk_model
+    
+    def _all_pairs(self):
+        """Every enabled trading pair"""
+        all_pairs = []
+        if self.config['markets']['crypto']['enabled']:
+            all_pairs.extend(self.config['markets']['crypto']['pairs'])
+        if self.config['markets']['forex']['enabled']:
+            all_pairs.extend(self.config['markets']['forex']['pairs'])
+        return all_pairs
+    
+    def _initialize_realtime(self):
+        """Forward engine events to the API processes when a message queue is configured"""
+        realtime_config = self.config.get('realtime', {})
+        message_queue = realtime_config.get('message_queue') or os.getenv('SOCKETIO_MESSAGE_QUEUE')
+        
+        if not realtime_config.get('enabled', False) or not message_queue:
+            return None
+        
+        from services.event_bridge import EventForwarder
+        
+        forwarder = EventForwarder(self.event_bus, message_queue)
+        if not forwarder.enabled:
+            return None
+        
+        self.logger.info(f"✓ Engine events forwarded via {message_queue.split('://')[0]} to the API servers")
+        return forwarder
+    
     def run_backtest(self):
         """Run backtesting on historical data"""
         self.logger.info("📊 Starting Backtesting Mode...")
@@ -103,6 +207,21 @@ class TradingBot:
         self.logger.info("🔴 Starting LIVE Trading Mode...")
         self.running = True
         
+        # Share live state with the dashboard process
+        from engines.state_snapshot import BotState
+        self.bot_state = BotState(
+            self.config, self.db_manager, self.event_bus,
+            max_rate=self.config.get('dashboard', {}).get('snapshot_rate', 10),
+            equity_interval=self.config.get('dashboard', {}).get('equity_interval', 60)
+        )
+        self.bot_state.set_running(True)
+        self.bot_state.start()
+        
+        # Stop-loss / take-profit exits between trading loops
+        from engines.bracket_manager import BracketManager
+        self.brackets = BracketManager(self.config, self.order_executor, self.data_feed, self.event_bus)
+        self.brackets.start()
+        
         # Send startup notification
         self.notification_manager.send_notification(
             "🚀 Trading Bot Started",
@@ -113,75 +232,151 @@ class TradingBot:
         try:
             while self.running:
                 self._trading_loop()
-                time.sleep(60)  # Run every minute
+                
+                if self.data_feed.exhausted:
+                    self.logger.info("⏹️  Market data replay finished")
+                    self.shutdown()
+                    break
+                
+                self.data_feed.sleep(self.config.get('loop_interval', 60))  # Every minute by default
                 
         except KeyboardInterrupt:
             self.logger.info("⚠️  Shutdown signal received...")
             self.shutdown()
     
+    def run_platform(self):
+        """
+        Run every subscriber's paper bot
+        
+        Users, their trades and balances live in the API's database
+        (DATABASE_PATH), which is re-read each cycle so settings saved
+        through the API take effect. Events reach the API servers over the
+        realtime bridge when it is enabled. With platform.shard_workers
+        above 1, users are spread over that many worker processes, each
+        with its own connection to the database.
+        """
+        self.logger.info("👥 Starting Multi-Tenant Platform Mode...")
+        self.running = True
+        
+        database_path = os.getenv('DATABASE_PATH', 'data/production.db')
+        platform_db = DatabaseManager({'database': {'type': 'sqlite', 'sqlite_path': database_path}})
+        shard_workers = self.config.get('platform', {}).get('shard_workers', 0)
+        
+        if shard_workers > 1:
+            from engines.sharding import ShardCoordinator
+            
+            self.platform_engine = ShardCoordinator(
+                self.config,
+                self.data_feed,
+                workers=shard_workers,
+                event_bus=self.event_bus,
+                database_path=database_path
+            )
+            self.platform_engine.start()
+        else:
+            from engines.multi_tenant_engine import MultiTenantEngine
+            
+            self.platform_engine = MultiTenantEngine(
+                self.config,
+                data_feed=self.data_feed,
+                event_bus=self.event_bus,
+                get_user=platform_db.get_user_by_id,
+                db_manager=platform_db
+            )
+        self.platform_engine.sync_users(platform_db.get_all_users())
+        
+        try:
+            self.platform_engine.run(self.config.get('loop_interval', 60), load_users=platform_db.get_all_users)
+        except KeyboardInterrupt:
+            self.logger.info("⚠️  Shutdown signal received...")
+        finally:
+            if shard_workers > 1:
+                self.platform_engine.stop()
+            else:
+                self.platform_engine.flush_marks()
+            self.running = False
+    
     def _trading_loop(self):
         """Main trading logic loop"""
+        loop_started = time.perf_counter()
         try:
-            # Get all trading pairs
-            all_pairs = []
-            if self.config['markets']['crypto']['enabled']:
-                all_pairs.extend(self.config['markets']['crypto']['pairs'])
-            if self.config['markets']['forex']['enabled']:
-                all_pairs.extend(self.config['markets']['forex']['pairs'])
+            history = {}
             
-            for pair in all_pairs:
-                # Check if we can open new positions
-                if not self.risk_manager.can_open_position():
-                    self.logger.debug("Max positions reached, skipping new signals")
-                    continue
-                
+            for pair in self._all_pairs():
                 # Get market data
-                market_data = self.data_feed.get_market_data(pair)
+                with FETCH_SECONDS.labels(pair).time():
+                    market_data = self.data_feed.get_market_data(pair)
                 
                 if market_data is None:
                     continue
                 
-                # Run all strategies
-                for strategy in self.strategies:
-                    signal = strategy.generate_signal(market_data)
-                    
-                    if signal['action'] != 'hold':
-                        self._process_signal(pair, signal, market_data)
+                history[pair] = market_data['close']
                 
-                # Check existing positions for stop-loss/take-profit
+                # Check existing positions for stop-loss/take-profit before new
+                # entries, so this candle is only applied to positions it can affect
                 self._manage_positions(pair, market_data)
                 
+                # Run all strategies while new positions are allowed
+                if self.risk_manager.can_open_position():
+                    for strategy in self.strategies:
+                        signal_started = time.perf_counter_ns()
+                        with self.latency.stage('signal', pair):
+                            signal = strategy.generate_signal(market_data)
+                        
+                        if signal['action'] != 'hold':
+                            SIGNALS.labels(signal['strategy'], signal['action']).inc()
+                            self._process_signal(pair, signal, market_data, signal_started)
+                else:
+                    self.logger.debug("Risk limits reached, skipping new signals")
+            
+            # One covariance update per new candle
+            if history:
+                self.risk_model.update(history)
+            
+            self.latency.save_report()
+                
         except Exception as e:
             self.logger.error(f"Error in trading loop: {e}", exc_info=True)
+        
+        LOOP_SECONDS.observe(time.perf_counter() - loop_started)
     
-    def _process_signal(self, pair, signal, market_data):
+    def _process_signal(self, pair, signal, market_data, signal_started=None):
         """Process a trading signal"""
         current_price = market_data['close'].iloc[-1]
         
         # Calculate position size
-        position_size = self.risk_manager.calculate_position_size(
-            current_price,
-            signal.get('stop_loss', current_price * 0.98)
-        )
+        with self.latency.stage('position_size', pair):
+            position_size = self.risk_manager.calculate_position_size(
+                current_price,
+                signal.get('stop_loss', current_price * 0.98)
+            )
         
         if position_size == 0:
             return
         
         # Check risk limits
-        if not self.risk_manager.check_risk_limits(pair, signal['action'], position_size):
+        with self.latency.stage('risk_check', pair):
+            allowed = self.risk_manager.check_risk_limits(pair, signal['action'], position_size, current_price)
+        
+        if not allowed:
             self.logger.warning(f"Risk limits exceeded for {pair}")
             return
         
         # Execute the trade
-        order = self.order_executor.execute_order(
-            pair=pair,
-            action=signal['action'],
-            size=position_size,
-            price=current_price,
-            strategy=signal['strategy'],
-            stop_loss=signal.get('stop_loss'),
-            take_profit=signal.get('take_profit')
-        )
+        with self.latency.stage('execute', pair):
+            order = self.order_executor.execute_order(
+                pair=pair,
+                action=signal['action'],
+                size=position_size,
+                price=current_price,
+                strategy=signal['strategy'],
+                stop_loss=signal.get('stop_loss'),
+                take_profit=signal.get('take_profit'),
+                volume=market_data['volume'].iloc[-1]
+            )
+        
+        if signal_started is not None:
+            self.latency.record('signal_to_order', time.perf_counter_ns() - signal_started, pair)
         
         if order:
             # Log and notify
@@ -200,33 +395,44 @@ class TradingBot:
     
     def _manage_positions(self, pair, market_data):
         """Manage existing positions (stop-loss, take-profit)"""
-        positions = self.db_manager.get_open_positions(pair)
         current_price = market_data['close'].iloc[-1]
         
-        for position in positions:
-            # Check stop-loss
-            if position['stop_loss'] and current_price <= position['stop_loss']:
-                self.order_executor.close_position(position, current_price, 'stop_loss')
-                self.logger.info(f"🛑 Stop-Loss triggered for {pair} @ ${current_price:.2f}")
-                
-            # Check take-profit
-            elif position['take_profit'] and current_price >= position['take_profit']:
-                self.order_executor.close_position(position, current_price, 'take_profit')
-                self.logger.info(f"💰 Take-Profit triggered for {pair} @ ${current_price:.2f}")
+        # Mark open positions to market (publishes position/PnL updates)
+        self.order_executor.update_position_prices(pair, current_price, market_data['volume'].iloc[-1])
+        
+        # Catch stops/targets touched inside the candle that the price stream missed
+        if self.brackets:
+            self.brackets.on_candle(
+                pair, market_data['high'].iloc[-1], market_data['low'].iloc[-1], opened=market_data.index[-1]
+            )
     
     def shutdown(self):
         """Gracefully shutdown the bot"""
         self.running = False
         
+        if self.brackets:
+            self.brackets.stop()
+        
         # Close all positions if in paper mode
         if self.config['trading_mode'] == 'paper':
             self.logger.info("Closing all open positions...")
             self.order_executor.close_all_positions()
         
+        if self.bot_state:
+            self.bot_state.stop()
+        
+        self.latency.save_report()
+        self.order_executor.close()
+        
+        if self.metrics_server:
+            self.metrics_server.shutdown()
+        
         self.notification_manager.send_notification(
             "⏹️  Trading Bot Stopped",
-            "Bot has been shut down gracefully."
+            "Bot has been shut down gracefully.",
+            PRIORITY_HIGH
         )
+        self.notification_manager.close()
         
         self.logger.info("✓ Trading Bot shut down successfully")
 
@@ -253,9 +459,10 @@ def main():
     print("1. 🔴 Live Trading")
     print("2. 📊 Backtesting")
     print("3. 📈 Run Web Dashboard")
+    print("4. 👥 Multi-Tenant Platform (every subscriber's paper bot)")
     
     try:
-        choice = input("\nEnter your choice (1-3): ").strip()
+        choice = input("\nEnter your choice (1-4): ").strip()
         
         if choice == '1':
             confirmation = input(
@@ -276,6 +483,9 @@ def main():
             from web_server import start_dashboard
             start_dashboard(bot.config)
             
+        elif choice == '4':
+            bot.run_platform()
+            
         else:
             print("✗ Invalid choice")
             
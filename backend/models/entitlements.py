@@ -0,0 +1,159 @@
+"""
+Entitlements
+Per-tier subscription limits and the checks shared by the API and trading engine
+"""
+
+import enum
+from datetime import datetime
+from types import MappingProxyType
+
+
+class SubscriptionTier(enum.Enum):
+    FREE = "free"
+    PRO = "pro"
+    ENTERPRISE = "enterprise"
+
+
+UNLIMITED = -1
+
+
+def _freeze(limits):
+    return MappingProxyType(dict(limits))
+
+
+# Built once at import; read-only so callers can share them safely
+TIER_LIMITS = MappingProxyType({
+    SubscriptionTier.FREE: _freeze({
+        'max_strategies': 2,
+        'max_pairs': 3,
+        'max_positions': 2,
+        'max_daily_trades': 10,
+        'backtesting_days': 30,
+        'real_trading': False,
+        'telegram_alerts': False,
+        'priority_support': False
+    }),
+    SubscriptionTier.PRO: _freeze({
+        'max_strategies': 10,
+        'max_pairs': 20,
+        'max_positions': 10,
+        'max_daily_trades': 100,
+        'backtesting_days': 365,
+        'real_trading': True,
+        'telegram_alerts': True,
+        'priority_support': False
+    }),
+    SubscriptionTier.ENTERPRISE: _freeze({
+        'max_strategies': UNLIMITED,
+        'max_pairs': UNLIMITED,
+        'max_positions': UNLIMITED,
+        'max_daily_trades': UNLIMITED,
+        'backtesting_days': UNLIMITED,
+        'real_trading': True,
+        'telegram_alerts': True,
+        'priority_support': True
+    })
+})
+
+
+def get_limits(tier):
+    """Get the read-only limit table for a tier (FREE for unknown tiers)"""
+    return TIER_LIMITS.get(tier, TIER_LIMITS[SubscriptionTier.FREE])
+
+
+def is_subscription_active(user, now=None):
+    """Check if a user's subscription is active"""
+    if user.subscription_tier in (None, SubscriptionTier.FREE):
+        return True
+    if not user.subscription_end:
+        return False
+    return (now or datetime.utcnow()) < user.subscription_end
+
+
+def effective_limits(user, now=None):
+    """Limits the user is entitled to right now; lapsed paid plans fall back to FREE"""
+    if not is_subscription_active(user, now):
+        return TIER_LIMITS[SubscriptionTier.FREE]
+    return get_limits(user.subscription_tier)
+
+
+def _cap(user_value, tier_value):
+    """Apply a tier cap to a user setting, treating UNLIMITED as no cap"""
+    if tier_value == UNLIMITED:
+        return user_value
+    if user_value is None:
+        return tier_value
+    return min(user_value, tier_value)
+
+
+def can_trade(user, now=None):
+    """Check if a user may run real (non-paper) auto trading"""
+    return bool(user.is_active) and effective_limits(user, now)['real_trading']
+
+
+def has_feature(user, feature, now=None):
+    """Check a boolean feature flag such as 'telegram_alerts'"""
+    return bool(effective_limits(user, now).get(feature, False))
+
+
+def max_positions(user, now=None):
+    """Maximum simultaneous open positions for a user"""
+    return _cap(user.max_positions, effective_limits(user, now)['max_positions'])
+
+
+def max_daily_trades(user, now=None):
+    """Maximum trades per day for a user (UNLIMITED for no cap)"""
+    return effective_limits(user, now)['max_daily_trades']
+
+
+def max_pairs(user, now=None):
+    """Maximum number of traded pairs for a user (UNLIMITED for no cap)"""
+    return effective_limits(user, now)['max_pairs']
+
+
+def serialize_users(users, include_sensitive=False):
+    """
+    Serialize a list of users without repeating per-row work
+
+    The clock is read once and each tier's limits are converted to a plain
+    dict once, then shared by every row of that tier.
+
+    Args:
+        users: Iterable of User objects
+        include_sensitive: Include exchange API keys
+
+    Returns:
+        list: User dictionaries matching User.to_dict()
+    """
+    now = datetime.utcnow()
+    limits_json = {tier: dict(limits) for tier, limits in TIER_LIMITS.items()}
+    free_limits = limits_json[SubscriptionTier.FREE]
+
+    rows = []
+    for user in users:
+        tier = user.subscription_tier
+        data = {
+            'id': user.id,
+            'username': user.username,
+            'email': user.email,
+            'full_name': user.full_name,
+            'subscription_tier': tier.value if tier else 'free',
+            'is_active': user.is_active,
+            'is_admin': user.is_admin,
+            'is_verified': user.is_verified,
+            'auto_trading_enabled': user.auto_trading_enabled,
+            'paper_balance': user.paper_balance,
+            'telegram_chat_id': user.telegram_chat_id,
+            'email_alerts': user.email_alerts,
+            'created_at': user.created_at.isoformat() if user.created_at else None,
+            'subscription_active': is_subscription_active(user, now),
+            'limits': limits_json.get(tier, free_limits)
+        }
+
+        if include_sensitive:
+            data['api_key_crypto'] = user.api_key_crypto
+            data['api_key_forex'] = user.api_key_forex
+
+        rows.append(data)
+
+    return rows
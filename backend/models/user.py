@@ -7,17 +7,12 @@ from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, Enum
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime, timedelta
 from werkzeug.security import generate_password_hash, check_password_hash
-import enum
+from models import entitlements
+from models.entitlements import SubscriptionTier
 
 Base = declarative_base()
 
 
-class SubscriptionTier(enum.Enum):
-    FREE = "free"
-    PRO = "pro"
-    ENTERPRISE = "enterprise"
-
-
 class User(Base):
     """User account model"""
     
@@ -63,16 +58,24 @@ class User(Base):
     
     # Trading Status
     auto_trading_enabled = Column(Boolean, default=False)
+    enabled_strategies = Column(String(256))  # Comma-separated strategy names (empty = defaults)
+    trading_pairs = Column(String(512))  # Comma-separated pairs (empty = defaults)
+    
+    # Alerts
+    telegram_chat_id = Column(String(64))
+    email_alerts = Column(Boolean, default=False)
     
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     last_login = Column(DateTime)
     
-    def __init__(self, username, email, password, **kwargs):
+    def __init__(self, username, email, password=None, **kwargs):
         self.username = username
         self.email = email
-        self.set_password(password)
+        # Callers that hash off-thread pass password_hash via kwargs instead
+        if password is not None:
+            self.set_password(password)
         for key, value in kwargs.items():
             setattr(self, key, value)
     
@@ -84,49 +87,13 @@ class User(Base):
         """Verify password"""
         return check_password_hash(self.password_hash, password)
     
-    def is_subscription_active(self):
+    def is_subscription_active(self, now=None):
         """Check if subscription is active"""
-        if self.subscription_tier == SubscriptionTier.FREE:
-            return True
-        if not self.subscription_end:
-            return False
-        return datetime.utcnow() < self.subscription_end
+        return entitlements.is_subscription_active(self, now)
     
     def get_subscription_limits(self):
-        """Get limits based on subscription tier"""
-        limits = {
-            SubscriptionTier.FREE: {
-                'max_strategies': 2,
-                'max_pairs': 3,
-                'max_positions': 2,
-                'max_daily_trades': 10,
-                'backtesting_days': 30,
-                'real_trading': False,
-                'telegram_alerts': False,
-                'priority_support': False
-            },
-            SubscriptionTier.PRO: {
-                'max_strategies': 10,
-                'max_pairs': 20,
-                'max_positions': 10,
-                'max_daily_trades': 100,
-                'backtesting_days': 365,
-                'real_trading': True,
-                'telegram_alerts': True,
-                'priority_support': False
-            },
-            SubscriptionTier.ENTERPRISE: {
-                'max_strategies': -1,  # Unlimited
-                'max_pairs': -1,
-                'max_positions': -1,
-                'max_daily_trades': -1,
-                'backtesting_days': -1,
-                'real_trading': True,
-                'telegram_alerts': True,
-                'priority_support': True
-            }
-        }
-        return limits.get(self.subscription_tier, limits[SubscriptionTier.FREE])
+        """Get limits based on subscription tier (read-only, shared per tier)"""
+        return entitlements.get_limits(self.subscription_tier)
     
     def to_dict(self, include_sensitive=False):
         """Convert to dictionary"""
@@ -141,9 +108,11 @@ class User(Base):
             'is_verified': self.is_verified,
             'auto_trading_enabled': self.auto_trading_enabled,
             'paper_balance': self.paper_balance,
+            'telegram_chat_id': self.telegram_chat_id,
+            'email_alerts': self.email_alerts,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'subscription_active': self.is_subscription_active(),
-            'limits': self.get_subscription_limits()
+            'limits': dict(self.get_subscription_limits())
         }
         
         if include_sensitive:
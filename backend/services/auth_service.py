@@ -6,18 +6,58 @@ Handles user registration, login, JWT tokens
 from flask import jsonify, request
 from flask_jwt_extended import create_access_token, create_refresh_token, get_jwt_identity
 from datetime import timedelta
+from werkzeug.security import generate_password_hash
 import logging
 from models.user import User, UserSession
+from services.password_hasher import HasherBusyError
+from utils.event_bus import USER_REGISTERED
 from database.db_manager import DatabaseManager
 
 
 class AuthService:
     """Authentication and authorization service"""
     
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, user_cache=None, session_validator=None, password_hasher=None,
+                 event_bus=None):
         self.db = db_manager
+        self.event_bus = event_bus
+        self.user_cache = user_cache
+        self.session_validator = session_validator
+        self.password_hasher = password_hasher
         self.logger = logging.getLogger(__name__)
     
+    def _save_user(self, user):
+        """Persist user changes and drop any cached copy"""
+        if self.user_cache:
+            self.user_cache.update_user(user)
+        else:
+            self.db.update_user(user)
+    
+    def _hash_password(self, password):
+        """Hash a password on the worker pool when one is configured"""
+        if self.password_hasher:
+            return self.password_hasher.hash(password)
+        return generate_password_hash(password)
+    
+    def _check_password(self, user, password):
+        """Verify a password on the worker pool when one is configured"""
+        if self.password_hasher:
+            return self.password_hasher.verify(user.password_hash, password)
+        return user.check_password(password)
+    
+    def _rehash_if_needed(self, user, password):
+        """Upgrade a stored hash to the configured method and cost"""
+        if not self.password_hasher or not self.password_hasher.needs_rehash(user.password_hash):
+            return
+        
+        try:
+            user.password_hash = self.password_hasher.hash(password)
+            self._save_user(user)
+            self.logger.info(f"Password rehashed for user: {user.username}")
+        except HasherBusyError:
+            # Best effort; retried on the next successful login
+            pass
+    
     def register_user(self, username, email, password, full_name=None):
         """Register a new user"""
         try:
@@ -32,11 +72,16 @@ class AuthService:
             user = User(
                 username=username,
                 email=email,
-                password=password,
+                password_hash=self._hash_password(password),
                 full_name=full_name
             )
             
             self.db.create_user(user)
+            if self.event_bus:
+                self.event_bus.publish(USER_REGISTERED, {
+                    'user_id': user.id,
+                    'subscription_tier': 'free'
+                })
             
             # Send verification email (TODO: implement)
             
@@ -48,6 +93,8 @@ class AuthService:
                 'user': user.to_dict()
             }
             
+        except HasherBusyError:
+            return {'success': False, 'busy': True, 'message': 'Server busy, please retry'}
         except Exception as e:
             self.logger.error(f"Registration error: {e}")
             return {'success': False, 'message': 'Registration failed'}
@@ -62,14 +109,14 @@ class AuthService:
                 return {'success': False, 'message': 'Invalid credentials'}
             
             # Check password
-            if not user.check_password(password):
+            if not self._check_password(user, password):
                 return {'success': False, 'message': 'Invalid credentials'}
             
             # Check if account is active
             if not user.is_active:
-                return {'success': False, 'message': '
-
- is disabled'}
+                return {'success': False, 'message': 'Account is disabled'}
+            
+            self._rehash_if_needed(user, password)
             
             # Create JWT tokens
             access_token = create_access_token(
@@ -89,9 +136,13 @@ class AuthService:
                 user_agent=user_agent
             )
             self.db.create_session(session)
+            if self.session_validator:
+                self.session_validator.remember(access_token, user.id, session.expires_at)
             
             # Update last login
             self.db.update_user_last_login(user.id)
+            if self.user_cache:
+                self.user_cache.invalidate(user.id)
             
             self.logger.info(f"User logged in: {username}")
             
@@ -103,11 +154,13 @@ class AuthService:
                 'user': user.to_dict()
             }
             
+        except HasherBusyError:
+            return {'success': False, 'busy': True, 'message': 'Server busy, please retry'}
         except Exception as e:
             self.logger.error(f"Login error: {e}")
             return {'success': False, 'message': 'Login failed'}
     
-    def refresh_token(self, user_id):
+    def refresh_token(self, user_id, ip_address=None, user_agent=None):
         """Refresh access token"""
         try:
             access_token = create_access_token(
@@ -115,6 +168,17 @@ class AuthService:
                 expires_delta=timedelta(hours=24)
             )
             
+            # Refreshed tokens get their own session so they pass verification
+            session = UserSession(
+                user_id=user_id,
+                token=access_token,
+                ip_address=ip_address,
+                user_agent=user_agent
+            )
+            self.db.create_session(session)
+            if self.session_validator:
+                self.session_validator.remember(access_token, user_id, session.expires_at)
+            
             return {
                 'success': True,
                 'access_token': access_token
@@ -127,6 +191,9 @@ class AuthService:
     def logout_user(self, token):
         """Logout user and invalidate session"""
         try:
+            if self.session_validator:
+                self.session_validator.revoke(token)
+            
             session = self.db.get_session_by_token(token)
             if session:
                 self.db.invalidate_session(session.id)
@@ -140,6 +207,9 @@ class AuthService:
     def verify_session(self, token):
         """Verify if session is valid"""
         try:
+            if self.session_validator:
+                return self.session_validator.is_valid(token)
+            
             session = self.db.get_session_by_token(token)
             
             if not session:
@@ -166,19 +236,23 @@ class AuthService:
             if not user:
                 return {'success': False, 'message': 'User not found'}
             
-            if not user.check_password(old_password):
+            if not self._check_password(user, old_password):
                 return {'success': False, 'message': 'Invalid current password'}
             
-            user.set_password(new_password)
-            self.db.update_user(user)
+            user.password_hash = self._hash_password(new_password)
+            self._save_user(user)
             
             # Invalidate all sessions
+            if self.session_validator:
+                self.session_validator.revoke_user(user_id)
             self.db.invalidate_all_user_sessions(user_id)
             
             self.logger.info(f"Password changed for user: {user.username}")
             
             return {'success': True, 'message': 'Password changed successfully'}
             
+        except HasherBusyError:
+            return {'success': False, 'busy': True, 'message': 'Server busy, please retry'}
         except Exception as e:
             self.logger.error(f"Password change error: {e}")
             return {'success': False, 'message': 'Password change failed'}
@@ -0,0 +1,176 @@
+"""
+Event Bridge
+Carries trading engine events from the bot process to every API process
+"""
+
+import json
+import logging
+import threading
+import time
+
+from services.socket_backplane import LOCAL_SCHEME, _parse_local_url, connect_local
+from utils.event_bus import TRADE_UPDATE, POSITION_UPDATE, PNL_UPDATE
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+ENGINE_CHANNEL = 'tradingbot-engine-events'
+ENGINE_EVENTS = (TRADE_UPDATE, POSITION_UPDATE, PNL_UPDATE)
+
+
+class _LocalTransport:
+    """Channel on the local broker (see services.socket_backplane)"""
+
+    def __init__(self, url, channel):
+        self.address = _parse_local_url(url)
+        self.channel = channel
+        self._publisher = None
+
+    def publish(self, message):
+        if self._publisher is None:
+            self._publisher = connect_local(self.address, 'pub', self.channel)
+        try:
+            self._publisher.send_bytes(message)
+        except (OSError, EOFError):
+            self._publisher = None
+            raise
+
+    def listen(self):
+        connection = connect_local(self.address, 'sub', self.channel)
+        try:
+            while True:
+                yield connection.recv_bytes()
+        finally:
+            connection.close()
+
+
+class _RedisTransport:
+    """Redis pub/sub channel"""
+
+    def __init__(self, url, channel):
+        self.client = redis.Redis.from_url(url)
+        self.channel = channel
+
+    def publish(self, message):
+        self.client.publish(self.channel, message)
+
+    def listen(self):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+        try:
+            for message in pubsub.listen():
+                yield message['data']
+        finally:
+            pubsub.close()
+
+
+def _transport(url, channel):
+    """Transport for a redis:// or local://host:port URL (None if unsupported)"""
+    logger = logging.getLogger(__name__)
+    if not url:
+        return None
+    if url.startswith(LOCAL_SCHEME):
+        return _LocalTransport(url, channel)
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        if REDIS_AVAILABLE:
+            return _RedisTransport(url, channel)
+        logger.warning("Event bridge URL is redis but the redis package is not installed")
+        return None
+    logger.warning(f"Event bridge does not support {url.split('://')[0]} URLs")
+    return None
+
+
+class EventForwarder:
+    """
+    Publish engine events from a local EventBus to the bridge channel
+
+    Runs in the trading engine's process. Payloads must be JSON-serializable
+    (OrderExecutor already converts datetimes to ISO strings).
+    """
+
+    def __init__(self, event_bus, url, event_types=ENGINE_EVENTS, channel=ENGINE_CHANNEL):
+        """
+        Args:
+            event_bus: The engine's EventBus
+            url: redis:// or local://host:port URL shared with the API processes
+            event_types: Event types to forward
+            channel: Bridge channel name
+        """
+        self.logger = logging.getLogger(__name__)
+        self.transport = _transport(url, channel)
+        self._lock = threading.Lock()
+
+        if self.transport is not None:
+            for event_type in event_types:
+                event_bus.subscribe(event_type, self._on_event)
+
+    @property
+    def enabled(self):
+        return self.transport is not None
+
+    def _on_event(self, event_type, payload):
+        message = json.dumps({'type': event_type, 'payload': payload}, default=str).encode('utf-8')
+        with self._lock:
+            # One reconnect attempt; a dropped event is only a missed UI update
+            for retries_left in range(1, -1, -1):
+                try:
+                    self.transport.publish(message)
+                    return
+                except Exception as e:
+                    if retries_left == 0:
+                        self.logger.error(f"Event bridge publish failed: {e}")
+
+
+class EventReceiver:
+    """
+    Republish bridged engine events onto an EventBus in this process
+
+    Every API process receives every event, so consumers that act once per
+    platform (rather than once per process) must account for that.
+    """
+
+    def __init__(self, url, event_bus, channel=ENGINE_CHANNEL, retry_seconds=5):
+        """
+        Args:
+            url: redis:// or local://host:port URL shared with the engine
+            event_bus: EventBus to publish received events on
+            channel: Bridge channel name
+            retry_seconds: Delay before reconnecting after a lost connection
+        """
+        self.logger = logging.getLogger(__name__)
+        self.event_bus = event_bus
+        self.transport = _transport(url, channel)
+        self.retry_seconds = retry_seconds
+        self._thread = None
+
+    @property
+    def enabled(self):
+        return self.transport is not None
+
+    def start(self):
+        """Start listening in a background thread"""
+        if self.transport is None or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='event-bridge', daemon=True)
+        self._thread.start()
+        self.logger.info("✓ Receiving trading engine events over the event bridge")
+
+    def _run(self):
+        while True:
+            try:
+                for message in self.transport.listen():
+                    self._dispatch(message)
+            except Exception as e:
+                self.logger.error(f"Event bridge connection lost: {e}")
+            time.sleep(self.retry_seconds)
+
+    def _dispatch(self, message):
+        try:
+            event = json.loads(message)
+            self.event_bus.publish(event['type'], event['payload'])
+        except (ValueError, KeyError, TypeError) as e:
+            self.logger.error(f"Malformed event bridge message: {e}")
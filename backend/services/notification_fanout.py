@@ -0,0 +1,334 @@
+"""
+Notification Fan-out Service
+Delivers trade alerts to each subscribed user's own Telegram chat or inbox
+"""
+
+import logging
+import queue
+import smtplib
+import threading
+import time
+from collections import defaultdict
+from email.message import EmailMessage
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from models import entitlements
+from utils.event_bus import TRADE_UPDATE
+from utils.notification_dispatcher import Notification, compose_digest
+from utils.notifications import format_trade_alert, format_close_alert
+from utils.rate_limit import TokenBucket
+
+
+class TelegramRateLimited(Exception):
+    """Telegram answered 429; retry after `retry_after` seconds"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Flood control, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class TelegramClient:
+    """Minimal Telegram Bot API client over a pooled keep-alive HTTP session"""
+
+    def __init__(self, bot_token, base_url='https://api.telegram.org', pool_size=32, timeout=10):
+        """
+        Args:
+            bot_token: Bot token from @BotFather
+            base_url: API root (point at a local fake server for load tests)
+            pool_size: Keep-alive connections held open to the API
+            timeout: Request timeout in seconds
+        """
+        self.url = f"{base_url.rstrip('/')}/bot{bot_token}/sendMessage"
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def send_message(self, chat_id, text):
+        """Send one message; raises on failure"""
+        response = self.session.post(
+            self.url,
+            json={'chat_id': chat_id, 'text': text, 'disable_web_page_preview': True},
+            timeout=self.timeout
+        )
+
+        if response.status_code == 429:
+            retry_after = response.json().get('parameters', {}).get('retry_after', 1)
+            raise TelegramRateLimited(retry_after)
+        response.raise_for_status()
+
+    def close(self):
+        self.session.close()
+
+
+class SmtpClient:
+    """SMTP sender reusing a small pool of logged-in connections"""
+
+    def __init__(self, host, port=587, username=None, password=None, sender=None,
+                 use_tls=True, pool_size=4, timeout=10):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.sender = sender or username
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+
+    def _connect(self):
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            connection.starttls()
+        if self.username:
+            connection.login(self.username, self.password)
+        return connection
+
+    def send_message(self, to_address, subject, body):
+        """Send one email; raises on failure"""
+        message = EmailMessage()
+        message['From'] = self.sender
+        message['To'] = to_address
+        message['Subject'] = subject
+        message.set_content(body)
+
+        try:
+            connection = self._pool.get_nowait()
+        except queue.Empty:
+            connection = self._connect()
+
+        try:
+            connection.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            # Pooled connection timed out server-side; one fresh attempt
+            connection = self._connect()
+            connection.send_message(message)
+        except Exception:
+            connection.close()
+            raise
+
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            connection.quit()
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().quit()
+            except queue.Empty:
+                return
+            except smtplib.SMTPException:
+                pass
+
+
+class NotificationFanout:
+    """
+    Routes trade events to every user subscribed to alerts
+
+    Events are mapped to their owner; users on a tier with the
+    'telegram_alerts' entitlement and a linked chat get Telegram messages,
+    users who opted into email alerts get email. Alerts for the same
+    recipient within `batch_window` seconds are merged into one digest,
+    which also keeps each chat under Telegram's per-chat limit. A pool of
+    sender threads shares one token bucket holding all Telegram traffic
+    under the bot-wide limit.
+    """
+
+    def __init__(self, event_bus, get_user, telegram=None, smtp=None, global_rate=30,
+                 batch_window=1.0, workers=8, max_queue=10000, max_retries=3, redis_client=None):
+        """
+        Args:
+            event_bus: EventBus carrying TRADE_UPDATE events with a user_id (the
+                       engine_events bus fed by services.event_bridge in the API)
+            get_user: Callable(user_id) returning a User (e.g. UserCache.get_user)
+            telegram: TelegramClient, or None to disable Telegram
+            smtp: SmtpClient, or None to disable email
+            global_rate: Telegram messages per second across all chats
+            batch_window: Seconds alerts for one recipient are collected into a digest
+            workers: Sender threads
+            max_queue: Maximum pending outbound messages
+            max_retries: Delivery attempts per message
+            redis_client: Optional Redis client; API workers that all receive the same
+                          trade event claim it there so only one sends the alert
+        """
+        self.logger = logging.getLogger(__name__)
+        self.get_user = get_user
+        self.telegram = telegram
+        self.smtp = smtp
+        self.batch_window = batch_window
+        self.workers = workers
+        self.max_retries = max_retries
+        self.redis = redis_client
+
+        # No burst allowance: any one-second window stays within global_rate
+        self.telegram_bucket = TokenBucket(global_rate, 1)
+        self.outbox = queue.Queue(maxsize=max_queue)
+
+        # (channel, address) -> notifications waiting for the batch window
+        self._pending = defaultdict(list)
+        self._pending_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._threads = []
+
+        self.stats = {'events': 0, 'sent': 0, 'failed': 0, 'dropped': 0, 'digests': 0}
+        self._stats_lock = threading.Lock()
+
+        event_bus.subscribe(TRADE_UPDATE, self._on_trade)
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    # ==================== ROUTING ====================
+
+    def _on_trade(self, event_type, payload):
+        user_id = payload.get('user_id')
+        if user_id is None:
+            return
+
+        self._count('events')
+        status = payload.get('status')
+        try:
+            if status == 'open':
+                title, message = format_trade_alert(payload)
+            elif status == 'closed':
+                title, message = format_close_alert(payload)
+            else:
+                return
+        except (KeyError, TypeError, ValueError):
+            self.logger.debug(f"Trade event without alert fields for user {user_id}")
+            return
+
+        if not self._claim(payload):
+            return
+
+        for channel, address in self.recipients(user_id):
+            with self._pending_lock:
+                self._pending[(channel, address)].append(Notification(title, message))
+
+    def _claim(self, payload):
+        """Whether this process sends the alert (first claimant wins when Redis is shared)"""
+        if self.redis is None or payload.get('id') is None:
+            return True
+        try:
+            key = f"alert-claim:{payload['id']}:{payload.get('status')}"
+            return bool(self.redis.set(key, 1, nx=True, ex=3600))
+        except Exception as e:
+            self.logger.error(f"Alert claim failed, sending anyway: {e}")
+            return True
+
+    def recipients(self, user_id):
+        """
+        Delivery targets for a user's alerts
+
+        Returns:
+            list: (channel, address) tuples
+        """
+        user = self.get_user(user_id)
+        if user is None or not user.is_active:
+            return []
+
+        targets = []
+        if self.telegram and user.telegram_chat_id and entitlements.has_feature(user, 'telegram_alerts'):
+            targets.append(('telegram', user.telegram_chat_id))
+        if self.smtp and user.email_alerts and user.email:
+            targets.append(('email', user.email))
+        return targets
+
+    # ==================== BATCHING ====================
+
+    def _batcher(self):
+        """Every batch window, turn each recipient's pending alerts into one message"""
+        while not self._stopped.wait(self.batch_window):
+            self._flush_pending()
+        self._flush_pending()
+
+    def _flush_pending(self):
+        with self._pending_lock:
+            pending, self._pending = self._pending, defaultdict(list)
+
+        for (channel, address), notifications in pending.items():
+            title, message = compose_digest(notifications)
+            if len(notifications) > 1:
+                self._count('digests')
+            try:
+                self.outbox.put_nowait((channel, address, title, message, 0))
+            except queue.Full:
+                self._count('dropped', len(notifications))
+                self.logger.warning(f"Notification outbox full, dropped {channel} alert for {address}")
+
+    # ==================== DELIVERY ====================
+
+    def _sender(self):
+        while True:
+            item = self.outbox.get()
+            if item is None:
+                self.outbox.task_done()
+                return
+            try:
+                self._deliver(*item)
+            finally:
+                self.outbox.task_done()
+
+    def _deliver(self, channel, address, title, message, attempts):
+        try:
+            if channel == 'telegram':
+                self.telegram_bucket.acquire()
+                self.telegram.send_message(address, f"{title}\n{message}")
+            else:
+                self.smtp.send_message(address, title, message)
+            self._count('sent')
+
+        except Exception as e:
+            attempts += 1
+            if attempts >= self.max_retries or self._stopped.is_set():
+                self._count('failed')
+                self.logger.error(f"{channel} alert to {address} failed after {attempts} attempts: {e}")
+                return
+
+            # Senders are many; backing off in place keeps ordering per recipient simple
+            time.sleep(getattr(e, 'retry_after', None) or min(30, 2 ** attempts))
+            self._deliver(channel, address, title, message, attempts)
+
+    # ==================== LIFECYCLE ====================
+
+    def start(self):
+        """Start the batcher and sender threads"""
+        self._threads.append(threading.Thread(target=self._batcher, name='fanout-batcher', daemon=True))
+        for index in range(self.workers):
+            self._threads.append(threading.Thread(target=self._sender, name=f'fanout-sender-{index}', daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+        self.logger.info(f"✓ Notification fan-out started ({self.workers} senders)")
+
+    def flush(self):
+        """Send everything collected so far and wait for delivery"""
+        self._flush_pending()
+        self.outbox.join()
+
+    def stop(self):
+        """Deliver what is pending and stop all threads"""
+        self._stopped.set()
+        if not self._threads:
+            return
+        self._threads[0].join()
+        self.outbox.join()
+        for _ in range(self.workers):
+            self.outbox.put(None)
+        for thread in self._threads[1:]:
+            thread.join()
+
+        if self.telegram:
+            self.telegram.close()
+        if self.smtp:
+            self.smtp.close()
+
+    def get_stats(self):
+        """Fan-out counters"""
+        with self._stats_lock:
+            return dict(self.stats, queued=self.outbox.qsize())
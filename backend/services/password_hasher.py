@@ -0,0 +1,114 @@
+"""
+Password Hashing Service
+Runs werkzeug password hashing on a bounded worker pool off the request thread
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HasherBusyError(Exception):
+    """Raised when the hashing queue is full"""
+    pass
+
+
+def _hash_password(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def _verify_password(pwhash, password):
+    return check_password_hash(pwhash, password)
+
+
+class PasswordHasher:
+    """
+    Bounded pool for password hashing and verification
+
+    At most `workers` hashes run at once and at most `max_pending` may be
+    queued. Beyond that, calls fail fast with HasherBusyError instead of
+    letting a login burst pin every request thread.
+    """
+
+    def __init__(self, method='scrypt', workers=None, max_pending=64, use_processes=True, timeout=30):
+        """
+        Args:
+            method: werkzeug hashing method including cost, e.g. 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000'
+            workers: Number of hashing workers (default: half the CPU cores)
+            max_pending: Maximum running + queued hash operations
+            use_processes: Use a process pool (True) or a thread pool (False)
+            timeout: Seconds to wait for a single hash before giving up
+        """
+        self.logger = logging.getLogger(__name__)
+        self.method = method
+        self.workers = workers or max(1, (os.cpu_count() or 2) // 2)
+        self.max_pending = max_pending
+        self.timeout = timeout
+
+        executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        self.executor = executor_class(max_workers=self.workers)
+        self._pending = 0
+        self._lock = threading.Lock()
+
+        # Hash prefix (method and cost) produced by the configured method
+        self.target_prefix = generate_password_hash('', method=method).split('$', 1)[0]
+
+        self.logger.info(
+            f"✓ Password hasher ready: {self.target_prefix} "
+            f"({self.workers} {'processes' if use_processes else 'threads'}, queue {max_pending})"
+        )
+
+    @classmethod
+    def from_env(cls):
+        """Build a hasher from PASSWORD_HASH_* environment variables"""
+        workers = os.getenv('PASSWORD_HASH_WORKERS')
+        return cls(
+            method=os.getenv('PASSWORD_HASH_METHOD', 'scrypt'),
+            workers=int(workers) if workers else None,
+            max_pending=int(os.getenv('PASSWORD_HASH_MAX_PENDING', 64)),
+            use_processes=os.getenv('PASSWORD_HASH_EXECUTOR', 'process') == 'process'
+        )
+
+    def _submit(self, fn, *args):
+        """Run fn on the pool, failing fast when the queue is full"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HasherBusyError("Password hashing queue is full")
+            self._pending += 1
+
+        try:
+            future = self.executor.submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+
+        future.add_done_callback(lambda _: self._release())
+        return future.result(timeout=self.timeout)
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    def hash(self, password):
+        """Hash a password with the configured method"""
+        return self._submit(_hash_password, password, self.method)
+
+    def verify(self, pwhash, password):
+        """Check a password against a stored hash"""
+        if not pwhash:
+            return False
+        return self._submit(_verify_password, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """Check whether a stored hash uses a different method or cost"""
+        return not pwhash or pwhash.split('$', 1)[0] != self.target_prefix
+
+    def get_queue_depth(self):
+        """Number of hash operations currently running or queued"""
+        return self._pending
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        self.executor.shutdown(wait=False)
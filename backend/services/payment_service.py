@@ -7,14 +7,17 @@ import stripe
 import logging
 from datetime import datetime, timedelta
 from models.user import SubscriptionTier
+from utils.event_bus import SUBSCRIPTION_CHANGED, PAYMENT_RECEIVED
 
 
 class PaymentService:
     """Payment processing and subscription management"""
     
-    def __init__(self, stripe_api_key, db_manager):
+    def __init__(self, stripe_api_key, db_manager, user_cache=None, event_bus=None):
         stripe.api_key = stripe_api_key
         self.db = db_manager
+        self.user_cache = user_cache
+        self.event_bus = event_bus
         self.logger = logging.getLogger(__name__)
         
         # Subscription pricing (in cents)
@@ -25,6 +28,22 @@ class PaymentService:
             'enterprise_yearly': 99999   # $999.99/year (17% discount)
         }
     
+    def _save_user(self, user):
+        """Persist user changes and drop any cached copy"""
+        if self.user_cache:
+            self.user_cache.update_user(user)
+        else:
+            self.db.update_user(user)
+    
+    def _publish_tier_change(self, user, old_tier):
+        """Announce a saved subscription tier change"""
+        if self.event_bus and old_tier != user.subscription_tier:
+            self.event_bus.publish(SUBSCRIPTION_CHANGED, {
+                'user_id': user.id,
+                'old_tier': old_tier.value if old_tier else 'free',
+                'new_tier': user.subscription_tier.value
+            })
+    
     def create_customer(self, user_id, email, payment_method_id):
         """Create Stripe customer"""
         try:
@@ -40,7 +59,7 @@ class PaymentService:
             # Update user with Stripe customer ID
             user = self.db.get_user_by_id(user_id)
             user.stripe_customer_id = customer.id
-            self.db.update_user(user)
+            self._save_user(user)
             
             self.logger.info(f"Stripe customer created for user {user_id}")
             
@@ -92,6 +111,7 @@ class PaymentService:
             
             # Update user subscription
             tier = SubscriptionTier.PRO if plan_type == 'pro' else SubscriptionTier.ENTERPRISE
+            old_tier = user.subscription_tier
             user.subscription_tier = tier
             user.stripe_subscription_id = subscription.id
             user.subscription_start = datetime.utcnow()
@@ -101,7 +121,8 @@ class PaymentService:
             else:
                 user.subscription_end = datetime.utcnow() + timedelta(days=365)
             
-            self.db.update_user(user)
+            self._save_user(user)
+            self._publish_tier_change(user, old_tier)
             
             self.logger.info(f"Subscription created for user {user_id}: {plan_type}")
             
@@ -127,9 +148,11 @@ class PaymentService:
             subscription = stripe.Subscription.delete(user.stripe_subscription_id)
             
             # Update user
+            old_tier = user.subscription_tier
             user.subscription_tier = SubscriptionTier.FREE
             user.stripe_subscription_id = None
-            self.db.update_user(user)
+            self._save_user(user)
+            self._publish_tier_change(user, old_tier)
             
             self.logger.info(f"Subscription cancelled for user {user_id}")
             
@@ -245,13 +268,27 @@ class PaymentService:
         user_id = subscription.metadata.get('user_id')
         if user_id:
             user = self.db.get_user_by_id(int(user_id))
+            old_tier = user.subscription_tier
             user.subscription_tier = SubscriptionTier.FREE
-            self.db.update_user(user)
+            self._save_user(user)
+            self._publish_tier_change(user, old_tier)
             self.logger.info(f"Subscription deleted for user {user_id}")
     
     def _handle_payment_succeeded(self, invoice):
         """Handle successful payment"""
         self.logger.info(f"Payment succeeded: {invoice.id}")
+        recorded = self.db.record_payment(
+            invoice.amount_paid / 100,
+            'stripe',
+            reference=invoice.id,
+            currency=invoice.currency
+        )
+        # Stripe retries webhooks; count each invoice once
+        if recorded and self.event_bus:
+            self.event_bus.publish(PAYMENT_RECEIVED, {
+                'amount': invoice.amount_paid / 100,
+                'currency': invoice.currency
+            })
     
     def _handle_payment_failed(self, invoice):
         """Handle failed payment"""
@@ -0,0 +1,175 @@
+"""
+Platform Statistics Service
+Materialized counters for the admin stats endpoint
+"""
+
+import logging
+import threading
+from datetime import datetime
+from utils.event_bus import (
+    TRADE_UPDATE, USER_REGISTERED, SUBSCRIPTION_CHANGED, PAYMENT_RECEIVED, TRADING_TOGGLED
+)
+
+
+class PlatformStats:
+    """
+    Platform-wide counters kept current by domain events
+
+    Registration, subscription, trading-toggle, trade and payment events
+    adjust the counters incrementally. A periodic reconciliation job replaces
+    them with the database aggregates to correct drift (e.g. events handled
+    by another worker or a missed message). "Today" is the local calendar
+    day, as for trade timestamps and DatabaseManager.get_trades_count_today.
+    """
+
+    def __init__(self, db_manager, event_bus=None, engine_events=None, reconcile_interval=300):
+        """
+        Args:
+            db_manager: DatabaseManager providing the aggregate queries
+            event_bus: EventBus carrying the platform events
+            engine_events: EventBus carrying the trading engine's trade events from
+                           its own process (see services.event_bridge)
+            reconcile_interval: Seconds between reconciliations (0 disables)
+        """
+        self.db = db_manager
+        self.logger = logging.getLogger(__name__)
+        self.reconcile_interval = reconcile_interval
+        self._lock = threading.Lock()
+        self._timer = None
+
+        self.total_users = 0
+        self.active_traders = 0
+        self.total_revenue = 0.0
+        self.subscription_breakdown = {'free': 0, 'pro': 0, 'enterprise': 0}
+        self.trades_today = 0
+        self.trades_date = datetime.now().date()
+        self.last_reconciled = None
+
+        if event_bus is not None:
+            event_bus.subscribe(USER_REGISTERED, self._on_user_registered)
+            event_bus.subscribe(SUBSCRIPTION_CHANGED, self._on_subscription_changed)
+            event_bus.subscribe(TRADING_TOGGLED, self._on_trading_toggled)
+            event_bus.subscribe(PAYMENT_RECEIVED, self._on_payment)
+        if engine_events is not None:
+            engine_events.subscribe(TRADE_UPDATE, self._on_trade)
+
+    # ==================== EVENT HANDLERS ====================
+
+    def _apply(self, change):
+        """Apply a counter change"""
+        with self._lock:
+            change()
+
+    def _on_user_registered(self, event_type, payload):
+        tier = payload.get('subscription_tier', 'free')
+
+        def change():
+            self.total_users += 1
+            self.subscription_breakdown[tier] = self.subscription_breakdown.get(tier, 0) + 1
+        self._apply(change)
+
+    def _on_subscription_changed(self, event_type, payload):
+        old_tier = payload.get('old_tier') or 'free'
+        new_tier = payload.get('new_tier') or 'free'
+        if old_tier == new_tier:
+            return
+
+        def change():
+            self.subscription_breakdown[old_tier] = max(0, self.subscription_breakdown.get(old_tier, 0) - 1)
+            self.subscription_breakdown[new_tier] = self.subscription_breakdown.get(new_tier, 0) + 1
+        self._apply(change)
+
+    def _on_trading_toggled(self, event_type, payload):
+        delta = 1 if payload.get('enabled') else -1
+
+        def change():
+            self.active_traders = max(0, self.active_traders + delta)
+        self._apply(change)
+
+    def _on_trade(self, event_type, payload):
+        # Only newly opened trades count; closes and updates share the event
+        if payload.get('status') != 'open':
+            return
+
+        def change():
+            self._roll_date()
+            self.trades_today += 1
+        self._apply(change)
+
+    def _on_payment(self, event_type, payload):
+        amount = float(payload.get('amount', 0) or 0)
+
+        def change():
+            self.total_revenue += amount
+        self._apply(change)
+
+    def _roll_date(self):
+        """Reset the daily trade counter at local midnight (caller holds the lock)"""
+        today = datetime.now().date()
+        if today != self.trades_date:
+            self.trades_date = today
+            self.trades_today = 0
+
+    # ==================== READ / RECONCILE ====================
+
+    def snapshot(self):
+        """Get current platform statistics"""
+        with self._lock:
+            self._roll_date()
+            return {
+                'total_users': self.total_users,
+                'active_traders': self.active_traders,
+                'total_trades_today': self.trades_today,
+                'total_revenue': self.total_revenue,
+                'subscription_breakdown': dict(self.subscription_breakdown)
+            }
+
+    def reconcile(self):
+        """
+        Replace every counter with the database aggregates
+
+        Events handled while the queries run are already in the database or
+        are picked up by the next reconcile, so they are not re-applied.
+        """
+        today = datetime.now().date()
+        try:
+            total_users = self.db.get_total_users()
+            active_traders = self.db.get_active_traders_count()
+            trades_today = self.db.get_trades_count_today()
+            total_revenue = self.db.get_total_revenue()
+            breakdown = self.db.get_subscription_breakdown()
+        except Exception as e:
+            self.logger.error(f"Platform stats reconciliation failed: {e}")
+            return
+
+        with self._lock:
+            self.total_users = total_users or 0
+            self.active_traders = active_traders or 0
+            self.trades_today = trades_today or 0
+            self.trades_date = today
+            self.total_revenue = float(total_revenue or 0)
+            self.subscription_breakdown = {'free': 0, 'pro': 0, 'enterprise': 0}
+            self.subscription_breakdown.update(breakdown or {})
+            self.last_reconciled = datetime.utcnow()
+
+        self.logger.debug("Platform stats reconciled")
+
+    def start(self):
+        """Reconcile now and then every reconcile_interval seconds"""
+        self.reconcile()
+        if self.reconcile_interval > 0:
+            self._schedule()
+
+    def _schedule(self):
+        self._timer = threading.Timer(self.reconcile_interval, self._run_scheduled)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _run_scheduled(self):
+        self.reconcile()
+        self._schedule()
+
+    def stop(self):
+        """Stop the reconciliation job"""
+        if self._timer:
+            self._timer.cancel()
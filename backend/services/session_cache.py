@@ -0,0 +1,191 @@
+"""
+Session Validation Cache
+Memory-speed session checks with revocation broadcast between API workers
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from utils.cache import TTLCache
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+REVOCATION_CHANNEL = 'auth:revocations'
+
+
+def _token_key(token):
+    """Key sessions by digest so raw tokens never leave the process"""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def _to_timestamp(value):
+    """Convert a naive UTC datetime to a POSIX timestamp"""
+    if value is None:
+        return None
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class SessionValidator:
+    """
+    Validate session tokens against a local cache of active sessions
+
+    Active sessions are cached for `ttl` seconds and revoked tokens are kept in
+    a local revocation set. Revocations are published over Redis pub/sub when
+    configured; a worker that misses a message still re-reads the database once
+    its cached entry expires, so revocation is visible everywhere within `ttl`.
+    """
+
+    def __init__(self, db_manager, ttl=30, max_size=100000, revocation_ttl=86400,
+                 redis_url=None, redis_client=None):
+        """
+        Args:
+            db_manager: DatabaseManager used on cache misses
+            ttl: Seconds an active session is trusted before re-checking the database
+            max_size: Maximum number of cached sessions
+            revocation_ttl: Seconds a revoked token is remembered (access token lifetime)
+            redis_url: Optional Redis URL for cross-worker revocation
+            redis_client: Optional pre-built Redis client (e.g. fakeredis in tests)
+        """
+        self.db = db_manager
+        self.logger = logging.getLogger(__name__)
+        self.ttl = ttl
+
+        # token digest -> (user_id, issued_at, expires_at)
+        self.sessions = TTLCache(max_size=max_size, ttl=ttl)
+        self.revoked = TTLCache(max_size=max_size, ttl=revocation_ttl)
+
+        # user_id -> timestamp; sessions issued before it are invalid
+        self.user_revoked_before = {}
+        self._lock = threading.Lock()
+
+        self.redis = redis_client
+        if self.redis is None and redis_url:
+            if REDIS_AVAILABLE:
+                try:
+                    self.redis = redis.Redis.from_url(redis_url)
+                except Exception as e:
+                    self.logger.error(f"Failed to connect session cache to Redis: {e}")
+            else:
+                self.logger.warning("REDIS_URL set but redis package not installed")
+
+        if self.redis is not None:
+            self._start_listener()
+
+    def _start_listener(self):
+        """Apply revocations published by other workers"""
+        try:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(REVOCATION_CHANNEL)
+        except Exception as e:
+            self.logger.error(f"Failed to subscribe to session revocations: {e}")
+            self.redis = None
+            return
+
+        def listen():
+            for message in pubsub.listen():
+                try:
+                    self._apply(json.loads(message['data']))
+                except (TypeError, ValueError, KeyError):
+                    continue
+
+        thread = threading.Thread(target=listen, name='session-revocations', daemon=True)
+        thread.start()
+        self.logger.info("✓ Session revocation listener started")
+
+    def _apply(self, event):
+        """Apply a revocation event locally"""
+        if event['type'] == 'token':
+            self.sessions.delete(event['key'])
+            self.revoked.set(event['key'], True)
+        elif event['type'] == 'user':
+            with self._lock:
+                current = self.user_revoked_before.get(event['user_id'], 0)
+                self.user_revoked_before[event['user_id']] = max(current, event['before'])
+
+    def _publish(self, event):
+        """Broadcast a revocation event to other workers"""
+        if self.redis is None:
+            return
+        try:
+            self.redis.publish(REVOCATION_CHANNEL, json.dumps(event))
+        except Exception as e:
+            self.logger.error(f"Failed to publish session revocation: {e}")
+
+    def remember(self, token, user_id, expires_at, issued_at=None):
+        """Cache a freshly created session so the first request skips the database"""
+        issued_at = issued_at if issued_at is not None else time.time()
+        self.sessions.set(_token_key(token), (int(user_id), issued_at, _to_timestamp(expires_at)))
+
+    def is_valid(self, token):
+        """
+        Check whether a session token is active
+
+        Args:
+            token: Raw access token
+
+        Returns:
+            bool: True if the session is active and not revoked
+        """
+        if not token:
+            return False
+
+        key = _token_key(token)
+        if self.revoked.get(key):
+            return False
+
+        entry = self.sessions.get(key)
+        if entry is None:
+            entry = self._load(token, key)
+            if entry is None:
+                return False
+
+        user_id, issued_at, expires_at = entry
+
+        if expires_at is not None and time.time() > expires_at:
+            self.sessions.delete(key)
+            return False
+
+        revoked_before = self.user_revoked_before.get(user_id)
+        if revoked_before is not None and issued_at <= revoked_before:
+            return False
+
+        return True
+
+    def _load(self, token, key):
+        """Load a session from the database and cache the result"""
+        session = self.db.get_session_by_token(token)
+
+        if not session or not session.is_active:
+            # Negative-cache unknown or inactive tokens for one TTL
+            self.revoked.set(key, True, ttl=self.ttl)
+            return None
+
+        if session.is_expired():
+            self.db.invalidate_session(session.id)
+            self.revoked.set(key, True)
+            return None
+
+        created_at = session.created_at or datetime.utcnow()
+        entry = (int(session.user_id), _to_timestamp(created_at), _to_timestamp(session.expires_at))
+        self.sessions.set(key, entry)
+        return entry
+
+    def revoke(self, token):
+        """Revoke a single session token on every worker"""
+        event = {'type': 'token', 'key': _token_key(token)}
+        self._apply(event)
+        self._publish(event)
+
+    def revoke_user(self, user_id):
+        """Revoke every session issued to a user so far"""
+        event = {'type': 'user', 'user_id': int(user_id), 'before': time.time()}
+        self._apply(event)
+        self._publish(event)
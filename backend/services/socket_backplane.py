@@ -0,0 +1,235 @@
+"""
+Socket.IO Backplane
+Message-queue wiring so several Socket.IO worker processes share rooms and emits
+"""
+
+import logging
+import threading
+from collections import deque
+from multiprocessing.connection import Client, Listener
+from urllib.parse import urlparse
+
+import socketio
+from flask_socketio import SocketIO
+
+
+DEFAULT_CHANNEL = 'flask-socketio'
+LOCAL_SCHEME = 'local://'
+SUBSCRIBER_BACKLOG = 10000      # messages a subscriber may fall behind before it is dropped
+
+
+def _parse_local_url(url):
+    """Split a local://host:port URL into an address tuple"""
+    parsed = urlparse(url)
+    return (parsed.hostname or '127.0.0.1', parsed.port or 6390)
+
+
+class LocalPubSubManager(socketio.PubSubManager):
+    """
+    Socket.IO client manager backed by the local broker
+
+    A stand-in for Redis on a single machine: every worker connects to one
+    broker process (see run_local_broker) that fans each message out to all
+    connected workers.
+    """
+
+    name = 'local'
+
+    def __init__(self, url='local://127.0.0.1:6390', channel=DEFAULT_CHANNEL,
+                 write_only=False, logger=None, authkey=b'socketio'):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.address = _parse_local_url(url)
+        self.authkey = authkey
+        self._publisher = None
+        self._publish_lock = threading.Lock()
+
+    def _publish(self, data):
+        """Send one message to the broker (serialized once per emit)"""
+        message = self.json.dumps(data)
+        with self._publish_lock:
+            for retries_left in range(1, -1, -1):
+                try:
+                    if self._publisher is None:
+                        self._publisher = connect_local(self.address, 'pub', self.channel, self.authkey)
+                    self._publisher.send_bytes(message.encode('utf-8'))
+                    return
+                except (OSError, EOFError) as e:
+                    self._publisher = None
+                    if retries_left == 0:
+                        self._get_logger().error(f"Cannot publish to local broker: {e}")
+
+    def _listen(self):
+        """Yield messages fanned out by the broker"""
+        connection = connect_local(self.address, 'sub', self.channel, self.authkey)
+        try:
+            while True:
+                yield connection.recv_bytes()
+        finally:
+            connection.close()
+
+
+def connect_local(address, role, channel, authkey=b'socketio'):
+    """
+    Open a connection to the local broker
+
+    Args:
+        address: (host, port) of the broker
+        role: 'pub' to send messages on `channel`, 'sub' to receive them
+        channel: Channel name; messages only reach subscribers of the same channel
+    """
+    connection = Client(address, authkey=authkey)
+    connection.send_bytes(f'{role}:{channel}'.encode('utf-8'))
+    return connection
+
+
+class _Outbox:
+    """
+    Messages waiting for one broker subscriber
+
+    Only the subscriber's own writer thread (drain) sends on its
+    connection, so frames from several publishers never interleave and a
+    slow subscriber delays nobody else.
+    """
+
+    def __init__(self, connection, limit):
+        self.connection = connection
+        self.limit = limit
+        self.messages = deque()
+        self.ready = threading.Condition()
+        self.closed = False
+
+    def put(self, message):
+        """Queue a message; False once the subscriber is closed or `limit` messages behind"""
+        with self.ready:
+            if not self.closed and len(self.messages) >= self.limit:
+                self.closed = True
+                self.messages.clear()
+            if self.closed:
+                self.ready.notify()
+                return False
+            self.messages.append(message)
+            self.ready.notify()
+            return True
+
+    def drain(self):
+        """Write queued messages until closed or the connection fails"""
+        try:
+            while True:
+                with self.ready:
+                    while not self.messages and not self.closed:
+                        self.ready.wait()
+                    if self.closed:
+                        return
+                    message = self.messages.popleft()
+                self.connection.send_bytes(message)
+        except (OSError, EOFError):
+            pass
+        finally:
+            with self.ready:
+                self.closed = True
+                self.messages.clear()
+            self.connection.close()
+
+
+def run_local_broker(url='local://127.0.0.1:6390', authkey=b'socketio', ready=None,
+                     backlog=SUBSCRIBER_BACKLOG):
+    """
+    Run the local fan-out broker (blocks forever)
+
+    Each connection opens with a 'pub:<channel>' or 'sub:<channel>' line
+    (see connect_local); messages from a publisher are copied to every
+    subscriber of its channel. Each subscriber has its own queue and
+    writer thread; one that falls `backlog` messages behind is
+    disconnected (like Redis' client output buffer limit).
+
+    Args:
+        url: local://host:port address to listen on
+        authkey: Shared secret for worker connections
+        ready: Optional threading/multiprocessing Event set once listening
+        backlog: Messages a subscriber may fall behind before it is dropped
+    """
+    logger = logging.getLogger(__name__)
+    listener = Listener(_parse_local_url(url), authkey=authkey)
+    subscribers = {}            # channel -> [_Outbox]
+    lock = threading.Lock()
+
+    if ready is not None:
+        ready.set()
+    logger.info(f"✓ Local Socket.IO broker listening on {url}")
+
+    def drop(channel, outbox):
+        """Forget a subscriber; False if it was already gone"""
+        with lock:
+            targets = subscribers.get(channel, [])
+            if outbox not in targets:
+                return False
+            targets.remove(outbox)
+            return True
+
+    def pump(connection, channel):
+        try:
+            while True:
+                message = connection.recv_bytes()
+                with lock:
+                    targets = list(subscribers.get(channel, ()))
+                for outbox in targets:
+                    if not outbox.put(message) and drop(channel, outbox):
+                        logger.warning(f"Local broker: dropped a subscriber of {channel!r} (disconnected or {backlog} messages behind)")
+        except (OSError, EOFError):
+            connection.close()
+
+    while True:
+        connection = listener.accept()
+        try:
+            role, _, channel = connection.recv_bytes().decode('utf-8').partition(':')
+        except (OSError, EOFError, UnicodeDecodeError):
+            connection.close()
+            continue
+
+        if role == 'sub':
+            outbox = _Outbox(connection, backlog)
+            with lock:
+                subscribers.setdefault(channel, []).append(outbox)
+            threading.Thread(target=outbox.drain, daemon=True).start()
+        elif role == 'pub':
+            threading.Thread(target=pump, args=(connection, channel), daemon=True).start()
+        else:
+            logger.warning(f"Local broker: unknown role {role!r}")
+            connection.close()
+
+
+def create_socketio(app=None, message_queue=None, channel=DEFAULT_CHANNEL, **kwargs):
+    """
+    Build a SocketIO server, optionally attached to a message-queue backplane
+
+    With no app the instance is write-only: it can emit to rooms served by
+    other processes but does not accept connections.
+
+    Args:
+        app: Flask app, or None for an emit-only instance
+        message_queue: redis://, amqp://, zmq+tcp:// or local://host:port URL
+        channel: Backplane channel shared by all workers
+
+    Returns:
+        SocketIO instance
+    """
+    if message_queue and message_queue.startswith(LOCAL_SCHEME):
+        kwargs['client_manager'] = LocalPubSubManager(
+            message_queue, channel=channel, write_only=app is None
+        )
+    elif message_queue:
+        kwargs['message_queue'] = message_queue
+        kwargs['channel'] = channel
+
+    instance = SocketIO(app, **kwargs)
+    if instance.server is None and 'client_manager' in kwargs:
+        # Emit-only instance on the local broker
+        instance.init_app(None, **kwargs)
+    return instance
+
+
+if __name__ == '__main__':
+    import os
+
+    logging.basicConfig(level=logging.INFO)
+    run_local_broker(os.getenv('SOCKETIO_MESSAGE_QUEUE', 'local://127.0.0.1:6390'))
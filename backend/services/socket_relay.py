@@ -0,0 +1,109 @@
+"""
+Socket Relay Service
+Relays trading engine events to Socket.IO user rooms with per-room coalescing
+"""
+
+import logging
+import threading
+from utils.event_bus import TRADE_UPDATE, POSITION_UPDATE, PNL_UPDATE
+
+
+class SocketRelay:
+    """
+    Forward event bus messages to `user_{id}` rooms
+
+    Events are buffered per room and flushed at most `max_rate` times per
+    second. Within one flush window trades are batched, while positions and
+    PnL keep only their latest state per position id and per pair.
+    """
+
+    def __init__(self, socketio, event_bus, max_rate=4, local_only=False):
+        """
+        Args:
+            socketio: Flask-SocketIO server
+            event_bus: EventBus the trading engine publishes to
+            max_rate: Maximum emits per room per second (must be positive)
+            local_only: Emit to this process's clients only, skipping the message
+                        queue; for events every worker receives (see services.event_bridge)
+        """
+        if max_rate <= 0:
+            raise ValueError(f"max_rate must be positive, got {max_rate}")
+
+        self.socketio = socketio
+        self.logger = logging.getLogger(__name__)
+        self.interval = 1.0 / max_rate
+        self._emit_options = {'ignore_queue': True} if local_only else {}
+
+        # room -> {'trades': [], 'positions': {id: data}, 'pnl': {pair: data}}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._running = False
+
+        for event_type in (TRADE_UPDATE, POSITION_UPDATE, PNL_UPDATE):
+            event_bus.subscribe(event_type, self._on_event)
+
+    def start(self):
+        """Start the background flush loop"""
+        if self._running:
+            return
+        self._running = True
+        self.socketio.start_background_task(self._flush_loop)
+        self.logger.info(f"✓ Socket relay started (flush every {self.interval * 1000:.0f}ms)")
+
+    def stop(self):
+        """Stop the flush loop after its current cycle"""
+        self._running = False
+
+    def _on_event(self, event_type, payload):
+        """Buffer an engine event for its user's room"""
+        user_id = payload.get('user_id')
+        if user_id is None:
+            return
+
+        room = f'user_{user_id}'
+        with self._lock:
+            buffer = self._pending.get(room)
+            if buffer is None:
+                buffer = self._pending[room] = {'trades': [], 'positions': {}, 'pnl': {}}
+
+            if event_type == TRADE_UPDATE:
+                buffer['trades'].append(payload)
+                if payload.get('status') != 'open':
+                    # Trades are emitted first; a buffered mark would re-open the position
+                    buffer['positions'].pop(payload.get('id'), None)
+            elif event_type == POSITION_UPDATE:
+                buffer['positions'][payload.get('id')] = payload
+            else:
+                buffer['pnl'][payload.get('pair')] = payload
+
+    def _flush_loop(self):
+        """Emit buffered updates once per interval"""
+        while self._running:
+            self.socketio.sleep(self.interval)
+            self.flush()
+
+    def pending(self):
+        """Rooms with updates buffered for the next flush"""
+        return len(self._pending)
+
+    def flush(self):
+        """Emit everything buffered since the last flush"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        for room, buffer in pending.items():
+            try:
+                if buffer['trades']:
+                    self.socketio.emit(TRADE_UPDATE, {'trades': buffer['trades']}, room=room, **self._emit_options)
+                if buffer['positions']:
+                    self.socketio.emit(
+                        POSITION_UPDATE,
+                        {'positions': list(buffer['positions'].values())},
+                        room=room,
+                        **self._emit_options
+                    )
+                if buffer['pnl']:
+                    self.socketio.emit(PNL_UPDATE, {'pnl': list(buffer['pnl'].values())}, room=room,
+                                       **self._emit_options)
+            except Exception as e:
+                self.logger.error(f"Socket relay emit error for {room}: {e}")
@@ -0,0 +1,127 @@
+"""
+User Cache Service
+Read-through cache for user profiles used by the API endpoints
+"""
+
+import logging
+import threading
+from sqlalchemy import inspect
+from utils.cache import TTLCache
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+INVALIDATION_CHANNEL = 'user_cache:invalidate'
+
+
+class UserCache:
+    """
+    Read-through LRU+TTL cache in front of DatabaseManager.get_user_by_id
+
+    Entries live in the local process. When Redis is configured, invalidations
+    are published on a shared channel so every API worker evicts the same user.
+    Callers get their own detached copy, so edits made before update_user are
+    never visible to other requests and a failed write leaves the cache intact.
+    """
+
+    def __init__(self, db_manager, max_size=10000, ttl=60, redis_url=None, redis_client=None):
+        """
+        Args:
+            db_manager: DatabaseManager used on cache misses and writes
+            max_size: Maximum number of cached users
+            ttl: Seconds before a cached user is reloaded
+            redis_url: Optional Redis URL for cross-worker invalidation
+            redis_client: Optional pre-built Redis client (e.g. fakeredis in tests)
+        """
+        self.db = db_manager
+        self.logger = logging.getLogger(__name__)
+        self.cache = TTLCache(max_size=max_size, ttl=ttl)
+
+        self.redis = redis_client
+        if self.redis is None and redis_url:
+            if REDIS_AVAILABLE:
+                try:
+                    self.redis = redis.Redis.from_url(redis_url)
+                except Exception as e:
+                    self.logger.error(f"Failed to connect user cache to Redis: {e}")
+            else:
+                self.logger.warning("REDIS_URL set but redis package not installed")
+
+        self._listener = None
+        if self.redis is not None:
+            self._start_listener()
+
+    def _start_listener(self):
+        """Subscribe to invalidations published by other workers"""
+        try:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+        except Exception as e:
+            self.logger.error(f"Failed to subscribe to user cache invalidations: {e}")
+            self.redis = None
+            return
+
+        def listen():
+            for message in pubsub.listen():
+                try:
+                    self.cache.delete(int(message['data']))
+                except (TypeError, ValueError):
+                    continue
+
+        self._listener = threading.Thread(target=listen, name='user-cache-invalidator', daemon=True)
+        self._listener.start()
+        self.logger.info("✓ User cache invalidation listener started")
+
+    def get_user(self, user_id):
+        """Get a user, loading it from the database on a miss"""
+        if user_id is None:
+            return None
+
+        user_id = int(user_id)
+        user = self.cache.get(user_id)
+        if user is None:
+            user = self.db.get_user_by_id(user_id)
+            if user is None:
+                return None
+            self.cache.set(user_id, user)
+
+        return _copy_user(user)
+
+    def update_user(self, user):
+        """Write a user through to the database and invalidate cached copies"""
+        try:
+            self.db.update_user(user)
+        finally:
+            self.invalidate(user.id)
+
+    def invalidate(self, user_id):
+        """Evict a user locally and on every other worker"""
+        if user_id is None:
+            return
+
+        user_id = int(user_id)
+        self.cache.delete(user_id)
+
+        if self.redis is not None:
+            try:
+                self.redis.publish(INVALIDATION_CHANNEL, user_id)
+            except Exception as e:
+                self.logger.error(f"Failed to publish user cache invalidation: {e}")
+
+    def get_stats(self):
+        """Get cache statistics"""
+        stats = self.cache.get_stats()
+        stats['redis'] = self.redis is not None
+        return stats
+
+
+def _copy_user(user):
+    """New unattached instance with the same column values (skips per-attribute instrumentation)"""
+    mapper = inspect(type(user))
+    copy = mapper.class_manager.new_instance()
+    copy.__dict__.update({column.key: getattr(user, column.key) for column in mapper.column_attrs})
+    return copy
@@ -0,0 +1,9 @@
+"""
+Test setup
+Backend modules import each other from the backend directory (e.g. `from models.user import User`)
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
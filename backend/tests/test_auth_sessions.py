@@ -0,0 +1,62 @@
+"""
+Login, session verification and logout against a real SQLite database
+"""
+
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager
+
+from database.db_manager import DatabaseManager
+from services.auth_service import AuthService
+from services.session_cache import SessionValidator
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'test-secret-key-at-least-32-bytes-long'
+    app.config['JWT_VERIFY_SUB'] = False
+    JWTManager(app)
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def db(tmp_path):
+    return DatabaseManager({'database': {'type': 'sqlite', 'sqlite_path': str(tmp_path / 'test.db')}})
+
+
+@pytest.fixture(params=['database', 'session_cache'])
+def auth(request, db):
+    validator = SessionValidator(db) if request.param == 'session_cache' else None
+    service = AuthService(db, session_validator=validator)
+    assert service.register_user('alice', 'alice@example.com', 'correct horse')['success']
+    return service
+
+
+def test_login_verify_logout(app, auth):
+    result = auth.login_user('alice', 'correct horse', ip_address='127.0.0.1')
+    assert result['success'], result
+    token = result['access_token']
+    assert auth.verify_session(token)
+
+    assert auth.logout_user(token)['success']
+    assert not auth.verify_session(token)
+    assert not auth.db.get_session_by_token(token).is_active
+
+
+def test_wrong_password_creates_no_session(app, auth):
+    assert not auth.login_user('alice', 'wrong')['success']
+    assert not auth.verify_session('not-a-token')
+
+
+def test_password_change_ends_every_session(app, auth):
+    first = auth.login_user('alice', 'correct horse')['access_token']
+    second = auth.login_user('alice', 'correct horse')['access_token']
+    user_id = auth.db.get_user_by_username('alice').id
+
+    assert auth.change_password(user_id, 'correct horse', 'battery staple')['success']
+    assert not auth.verify_session(first)
+    assert not auth.verify_session(second)
+    assert not auth.db.get_session_by_token(first).is_active
+    assert auth.login_user('alice', 'battery staple')['success']
@@ -0,0 +1,75 @@
+"""
+Local Socket.IO broker fan-out with concurrent publishers and a stalled subscriber
+"""
+
+import socket
+import threading
+
+import pytest
+
+from services.socket_backplane import connect_local, run_local_broker
+
+
+def _start_broker(**kwargs):
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    ready = threading.Event()
+    threading.Thread(
+        target=run_local_broker, args=(f'local://127.0.0.1:{port}',),
+        kwargs=dict(kwargs, ready=ready), daemon=True
+    ).start()
+    ready.wait(5)
+    return ('127.0.0.1', port)
+
+
+@pytest.fixture
+def broker():
+    return _start_broker()
+
+
+def test_concurrent_publishers_reach_a_subscriber_intact(broker):
+    fast = connect_local(broker, 'sub', 'test')
+    stalled = connect_local(broker, 'sub', 'test')     # never reads
+    publishers, per_publisher = 4, 500
+    payload = b'x' * 4096
+
+    def publish(index):
+        connection = connect_local(broker, 'pub', 'test')
+        for sequence in range(per_publisher):
+            connection.send_bytes(f'{index}:{sequence}:'.encode() + payload)
+        connection.close()
+
+    threads = [threading.Thread(target=publish, args=(index,)) for index in range(publishers)]
+    for thread in threads:
+        thread.start()
+
+    received = {index: [] for index in range(publishers)}
+    for _ in range(publishers * per_publisher):
+        assert fast.poll(10), "subscriber stalled behind the blocked one"
+        index, sequence, body = fast.recv_bytes().split(b':', 2)
+        assert body == payload
+        received[int(index)].append(int(sequence))
+
+    for thread in threads:
+        thread.join()
+    assert all(sequences == list(range(per_publisher)) for sequences in received.values())
+    stalled.close()
+    fast.close()
+
+
+def test_subscriber_too_far_behind_is_dropped():
+    broker = _start_broker(backlog=10)
+    stalled = connect_local(broker, 'sub', 'test')
+    publisher = connect_local(broker, 'pub', 'test')
+    messages = 500
+    for _ in range(messages):
+        publisher.send_bytes(b'x' * 65536)
+
+    received = 0
+    with pytest.raises(EOFError):
+        while stalled.poll(10):
+            stalled.recv_bytes()
+            received += 1
+    assert received < messages
+    publisher.close()
@@ -0,0 +1,50 @@
+"""
+Syncing users into the multi-tenant engine only refreshes changed users and keeps daily risk state
+"""
+
+from datetime import datetime, timedelta
+
+from benchmarks.multi_tenant import CONFIG, make_users
+from engines.multi_tenant_engine import MultiTenantEngine
+
+
+def _engine_with_user():
+    engine = MultiTenantEngine(CONFIG)
+    user = make_users(1)[0]
+    user.updated_at = datetime.utcnow()
+    engine.sync_users([user])
+    return engine, user, engine.tenants[user.id]
+
+
+def test_unchanged_user_is_not_refreshed():
+    engine, user, tenant = _engine_with_user()
+    tenant.pairs = ['SENTINEL']
+
+    engine.sync_users([user])
+    assert tenant.pairs == ['SENTINEL']
+
+
+def test_refresh_keeps_risk_manager_and_daily_state():
+    engine, user, tenant = _engine_with_user()
+    risk = tenant.risk
+    risk.daily_pnl = -120.0
+    risk.increment_positions()
+
+    user.max_position_size = 123.0
+    user.updated_at += timedelta(seconds=1)
+    engine.sync_users([user])
+
+    assert tenant.risk is risk
+    assert risk.max_position_size == 123.0
+    assert risk.daily_pnl == -120.0
+    assert risk.open_positions_count == 1
+
+
+def test_lapsed_subscription_refreshes_without_a_row_change():
+    engine, user, tenant = _engine_with_user()
+    version = tenant.version
+
+    user.subscription_end = datetime.utcnow() - timedelta(days=1)
+    engine.sync_users([user])
+
+    assert tenant.version != version
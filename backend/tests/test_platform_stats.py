@@ -0,0 +1,58 @@
+"""
+Platform counters: events, reconciliation and the daily trade boundary
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from database.db_manager import DatabaseManager
+from models.user import User
+from services.platform_stats import PlatformStats
+from utils.event_bus import EventBus, TRADE_UPDATE, USER_REGISTERED
+
+
+@pytest.fixture
+def db(tmp_path):
+    return DatabaseManager({'database': {'type': 'sqlite', 'sqlite_path': str(tmp_path / 'test.db')}})
+
+
+def _register(db, event_bus, name):
+    db.create_user(User(name, f'{name}@example.com', password_hash='x'))
+    event_bus.publish(USER_REGISTERED, {'subscription_tier': 'free'})
+
+
+def test_event_during_reconcile_is_not_counted_twice(db):
+    event_bus = EventBus()
+    stats = PlatformStats(db, event_bus=event_bus, reconcile_interval=0)
+    _register(db, event_bus, 'alice')
+
+    # A registration committed and announced while reconcile is querying
+    count_users = db.get_total_users
+    def get_total_users():
+        _register(db, event_bus, 'bob')
+        return count_users()
+    db.get_total_users = get_total_users
+
+    stats.reconcile()
+    snapshot = stats.snapshot()
+    assert snapshot['total_users'] == 2
+    assert snapshot['subscription_breakdown']['free'] == 2
+
+
+def test_trades_today_uses_the_local_day_of_the_database(db):
+    engine_events = EventBus()
+    stats = PlatformStats(db, engine_events=engine_events, reconcile_interval=0)
+    midnight = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    for timestamp in (midnight - timedelta(minutes=1), midnight + timedelta(minutes=1)):
+        db.save_trade({
+            'id': f'trade-{timestamp:%H%M}', 'pair': 'BTC/USDT', 'action': 'buy', 'size': 1.0,
+            'entry_price': 100.0, 'current_price': 100.0, 'strategy': 'test', 'status': 'open',
+            'timestamp': timestamp
+        })
+
+    stats.reconcile()
+    assert stats.snapshot()['total_trades_today'] == 1
+
+    engine_events.publish(TRADE_UPDATE, {'status': 'open'})
+    assert stats.snapshot()['total_trades_today'] == 2
@@ -0,0 +1,109 @@
+"""
+Time-Series Downsampling
+Reduce long series to roughly one point per chart pixel while keeping their shape
+"""
+
+import numpy as np
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling
+
+    Keeps the first and last points and, from each bucket in between, the
+    point forming the largest triangle with the previous pick and the
+    average of the next bucket.
+
+    Args:
+        x: Monotonic x values (e.g. epoch timestamps)
+        y: Values
+        threshold: Number of points to return
+
+    Returns:
+        tuple: (x, y) numpy arrays of at most `threshold` points
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+
+    if threshold >= n or threshold < 3:
+        return x, y
+
+    # Bucket boundaries over the interior points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start = end
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # Twice the triangle area; the constant factor does not change argmax
+        area = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(area.argmax())
+        selected[i + 1] = previous
+
+    return x[selected], y[selected]
+
+
+def min_max(x, y, buckets):
+    """
+    Min/max-per-bucket downsampling
+
+    Keeps the lowest and highest point of each bucket (in time order), so
+    spikes and drawdowns are never smoothed away.
+
+    Args:
+        x: Monotonic x values
+        y: Values
+        buckets: Number of buckets (returns up to 2 * buckets points)
+
+    Returns:
+        tuple: (x, y) numpy arrays
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+
+    if buckets < 1 or 2 * buckets >= n:
+        return x, y
+
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+    selected = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end <= start:
+            continue
+        low = start + int(y[start:end].argmin())
+        high = start + int(y[start:end].argmax())
+        selected.extend(sorted({low, high}))
+
+    selected = np.array(selected, dtype=int)
+    return x[selected], y[selected]
+
+
+def downsample(x, y, width, method='lttb'):
+    """
+    Downsample a series for a chart `width` pixels wide
+
+    Args:
+        x: Monotonic x values
+        y: Values
+        width: Target chart width in pixels (one point per pixel)
+        method: 'lttb' or 'minmax'
+
+    Returns:
+        tuple: (x, y) numpy arrays
+    """
+    if method == 'minmax':
+        return min_max(x, y, max(1, width // 2))
+    if method == 'lttb':
+        return lttb(x, y, width)
+    raise ValueError(f"Unknown downsampling method: {method}")
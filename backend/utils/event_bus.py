@@ -0,0 +1,64 @@
+"""
+Event Bus
+In-process publish/subscribe channel between the trading engine and its consumers
+"""
+
+import logging
+import threading
+from collections import defaultdict
+
+
+# Trading engine event types
+TRADE_UPDATE = 'trade_update'
+POSITION_UPDATE = 'position_update'
+PNL_UPDATE = 'pnl_update'
+ORDER_UPDATE = 'order_update'
+
+# Platform event types
+USER_REGISTERED = 'user_registered'
+SUBSCRIPTION_CHANGED = 'subscription_changed'
+PAYMENT_RECEIVED = 'payment_received'
+TRADING_TOGGLED = 'trading_toggled'
+
+
+class EventBus:
+    """Synchronous publish/subscribe hub keyed by event type"""
+
+    WILDCARD = '*'
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._handlers = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def subscribe(self, event_type, handler):
+        """
+        Register a handler for an event type
+
+        Args:
+            event_type: Event name, or '*' for every event
+            handler: Callable taking (event_type, payload); must return quickly
+        """
+        with self._lock:
+            # Copy-on-write so publish can iterate without locking
+            handlers = list(self._handlers[event_type])
+            handlers.append(handler)
+            self._handlers[event_type] = handlers
+
+    def unsubscribe(self, event_type, handler):
+        """Remove a previously registered handler"""
+        with self._lock:
+            handlers = [h for h in self._handlers.get(event_type, []) if h is not handler]
+            self._handlers[event_type] = handlers
+
+    def publish(self, event_type, payload):
+        """
+        Deliver an event to every subscriber
+
+        Handler errors are logged and never propagate to the publisher.
+        """
+        for handler in self._handlers.get(event_type, []) + self._handlers.get(self.WILDCARD, []):
+            try:
+                handler(event_type, payload)
+            except Exception as e:
+                self.logger.error(f"Event handler error for {event_type}: {e}", exc_info=True)
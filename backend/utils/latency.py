@@ -0,0 +1,269 @@
+"""
+Latency Instrumentation
+HDR-style latency histograms, per-stage timers and latency budgets
+
+Usage (report saved by a running bot):
+    python -m utils.latency [data/latency.json]
+"""
+
+import json
+import logging
+import sys
+import threading
+import time
+from pathlib import Path
+
+
+# 128 linear sub-buckets per power of two: values are kept to within ~1%
+SUB_BUCKET_BITS = 7
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+HALF_BUCKETS = SUB_BUCKETS // 2
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+# Relative report paths resolve against the project root, like the database path
+REPORT_ROOT = Path(__file__).parent.parent.parent
+
+
+class LatencyHistogram:
+    """
+    Fixed-memory log-linear histogram of nanosecond latencies
+
+    Values below 128ns are counted exactly; above that each power-of-two
+    range is split into 64 equal buckets, like HdrHistogram with two
+    significant digits. Recording is a bit_length and an index update.
+    """
+
+    def __init__(self, max_value_ns=2 ** 40):
+        shifts = max(0, max_value_ns.bit_length() - SUB_BUCKET_BITS)
+        self.counts = [0] * (SUB_BUCKETS + shifts * HALF_BUCKETS)
+        self.max_value = max_value_ns
+        self.total = 0
+        self.sum = 0
+        self.min = None
+        self.max = 0
+
+    @staticmethod
+    def _index(value):
+        if value < SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - SUB_BUCKET_BITS
+        return SUB_BUCKETS + (shift - 1) * HALF_BUCKETS + (value >> shift) - HALF_BUCKETS
+
+    @staticmethod
+    def _value(index):
+        """Upper bound of a bucket"""
+        if index < SUB_BUCKETS:
+            return index
+        shift = (index - SUB_BUCKETS) // HALF_BUCKETS + 1
+        mantissa = (index - SUB_BUCKETS) % HALF_BUCKETS + HALF_BUCKETS
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, value_ns):
+        value = min(max(int(value_ns), 0), self.max_value)
+        self.counts[self._index(value)] += 1
+        self.total += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self.min = value if self.min is None else min(self.min, value)
+
+    def percentile(self, percentile):
+        """Latency (ns) at or below which `percentile` percent of samples fall"""
+        if not self.total:
+            return 0
+        target = max(1, int(round(self.total * percentile / 100.0)))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self._value(index), self.max)
+        return self.max
+
+    def merge(self, other):
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+
+    def summary(self):
+        """Count, mean, min/max and percentiles in milliseconds"""
+        summary = {
+            'count': self.total,
+            'mean_ms': (self.sum / self.total / 1e6) if self.total else 0.0,
+            'min_ms': (self.min or 0) / 1e6,
+            'max_ms': self.max / 1e6
+        }
+        for percentile in PERCENTILES:
+            summary[f'p{percentile:g}_ms'] = self.percentile(percentile) / 1e6
+        return summary
+
+
+class _StageTimer:
+    """Plain context manager (cheaper than a generator-based one)"""
+
+    __slots__ = ('tracker', 'name', 'pair', 'started')
+
+    def __init__(self, tracker, name, pair):
+        self.tracker = tracker
+        self.name = name
+        self.pair = pair
+
+    def __enter__(self):
+        self.started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.tracker.record(self.name, time.perf_counter_ns() - self.started, self.pair)
+        return False
+
+
+class LatencyTracker:
+    """
+    Times named stages overall and per pair against configurable budgets
+
+    A budget breach is logged (at most once per stage per `alert_interval`
+    seconds) and passed to the optional `on_breach(stage, pair, ms, budget_ms)`
+    callback, e.g. to send a notification.
+    """
+
+    def __init__(self, config=None, on_breach=None):
+        """
+        Args:
+            config: Bot configuration; reads the optional 'latency' section
+            on_breach: Callable invoked when a stage exceeds its budget
+        """
+        latency_config = (config or {}).get('latency', {})
+        self.logger = logging.getLogger(__name__)
+        self.enabled = latency_config.get('enabled', True)
+        self.budgets = {stage: ms * 1e6 for stage, ms in latency_config.get('budgets_ms', {}).items()}
+        self.alert_interval = latency_config.get('alert_interval', 60)
+        self.report_path = REPORT_ROOT / latency_config.get('report_path', 'data/latency.json')
+        self.on_breach = on_breach
+
+        self.stages = {}
+        self.by_pair = {}
+        self.breaches = {}
+        self._last_alert = {}
+        self._lock = threading.Lock()
+
+    def stage(self, name, pair=None):
+        """Context manager timing the enclosed block as stage `name`"""
+        return _StageTimer(self, name, pair)
+
+    def record(self, name, elapsed_ns, pair=None):
+        """Record a stage duration measured elsewhere"""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.stages.get(name)
+            if histogram is None:
+                histogram = self.stages[name] = LatencyHistogram()
+            histogram.record(elapsed_ns)
+
+            if pair is not None:
+                histogram = self.by_pair.get((name, pair))
+                if histogram is None:
+                    histogram = self.by_pair[(name, pair)] = LatencyHistogram()
+                histogram.record(elapsed_ns)
+
+        budget = self.budgets.get(name)
+        if budget is not None and elapsed_ns > budget:
+            self._breach(name, pair, elapsed_ns)
+
+    def _breach(self, name, pair, elapsed_ns):
+        with self._lock:
+            self.breaches[name] = self.breaches.get(name, 0) + 1
+            now = time.monotonic()
+            if now - self._last_alert.get(name, -self.alert_interval) < self.alert_interval:
+                return
+            self._last_alert[name] = now
+
+        elapsed_ms, budget_ms = elapsed_ns / 1e6, self.budgets[name] / 1e6
+        self.logger.warning(
+            f"⏱️  Latency budget exceeded: {name}{f' [{pair}]' if pair else ''} "
+            f"{elapsed_ms:.3f}ms > {budget_ms:.3f}ms"
+        )
+        if self.on_breach:
+            try:
+                self.on_breach(name, pair, elapsed_ms, budget_ms)
+            except Exception as e:
+                self.logger.error(f"Latency alert failed: {e}")
+
+    def report(self):
+        """
+        Latency summary per stage and per (stage, pair)
+
+        Returns:
+            dict: {'stages': {...}, 'pairs': {stage: {pair: {...}}}, 'breaches': {...}}
+        """
+        with self._lock:
+            pairs = {}
+            for (name, pair), histogram in self.by_pair.items():
+                pairs.setdefault(name, {})[pair] = histogram.summary()
+            return {
+                'generated_at': time.time(),
+                'stages': {name: dict(histogram.summary(), budget_ms=self.budgets.get(name, 0) / 1e6 or None)
+                           for name, histogram in self.stages.items()},
+                'pairs': pairs,
+                'breaches': dict(self.breaches)
+            }
+
+    def save_report(self, path=None):
+        """Write the report as JSON (read by `python -m utils.latency`)"""
+        try:
+            path = Path(path or self.report_path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(self.report(), indent=2))
+        except Exception as e:
+            self.logger.error(f"Error saving latency report: {e}")
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+            self.by_pair.clear()
+            self.breaches.clear()
+
+
+def format_report(report):
+    """Render a report dict as a text table"""
+    columns = ['count', 'mean_ms'] + [f'p{p:g}_ms' for p in PERCENTILES] + ['max_ms', 'budget_ms']
+    lines = [f"{'stage':<28}" + ''.join(f'{c:>12}' for c in columns)]
+
+    def row(label, summary):
+        cells = []
+        for column in columns:
+            value = summary.get(column)
+            if value is None:
+                cells.append(f"{'-':>12}")
+            elif column == 'count':
+                cells.append(f'{value:>12d}')
+            else:
+                cells.append(f'{value:>12.3f}')
+        return f'{label:<28}' + ''.join(cells)
+
+    for name, summary in sorted(report['stages'].items()):
+        lines.append(row(name, summary))
+        for pair, pair_summary in sorted(report['pairs'].get(name, {}).items()):
+            lines.append(row(f'  {pair}', pair_summary))
+
+    if report.get('breaches'):
+        lines.append('')
+        lines.append('Budget breaches: ' + ', '.join(f'{k}={v}' for k, v in sorted(report['breaches'].items())))
+    return '\n'.join(lines)
+
+
+def main():
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else REPORT_ROOT / 'data' / 'latency.json'
+    if not path.exists():
+        print(f"No latency report at {path} (is the bot running with latency tracking?)")
+        return 1
+    print(format_report(json.loads(path.read_text())))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
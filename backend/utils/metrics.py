@@ -0,0 +1,374 @@
+"""
+Metrics
+Counters, gauges and histograms exposed in the Prometheus text format at /metrics
+"""
+
+import logging
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; covers sub-millisecond hot paths up to slow exchange round trips
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Cells:
+    """
+    Per-thread accumulators
+
+    Each thread adds into its own list, so updates take no lock and never
+    contend; a scrape sums the lists. A thread's cell is folded into one
+    retired cell when its thread-local storage is torn down, so
+    request-per-thread servers don't accumulate them.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._local = threading.local()
+        self._cells = {}            # thread ident -> cell
+        self._retired = [0.0] * size
+        # Reentrant: a retiring thread's finalizer may run while this thread holds it
+        self._lock = threading.RLock()
+
+    def cell(self):
+        try:
+            return self._local.owner.cell
+        except AttributeError:
+            owner = self._local.owner = _CellOwner([0.0] * self.size)
+            ident = threading.get_ident()
+            with self._lock:
+                self._cells[ident] = owner.cell
+            # Runs when the thread ends and drops its locals (any kind of thread)
+            weakref.finalize(owner, self._retire, ident, owner.cell).atexit = False
+            return owner.cell
+
+    def _retire(self, ident, cell):
+        with self._lock:
+            if self._cells.get(ident) is cell:
+                del self._cells[ident]
+            for index, value in enumerate(cell):
+                self._retired[index] += value
+
+    def reset(self):
+        """Zero every cell (for gauges being set to an absolute value)"""
+        with self._lock:
+            for cell in list(self._cells.values()):
+                cell[:] = [0.0] * self.size
+            self._retired = [0.0] * self.size
+
+    def totals(self):
+        with self._lock:
+            totals = list(self._retired)
+            for cell in list(self._cells.values()):
+                for index, value in enumerate(cell):
+                    totals[index] += value
+        return totals
+
+
+class _CellOwner:
+    """Holds a thread's cell in its thread-local storage; weakref-able so its end can be observed"""
+
+    __slots__ = ('cell', '__weakref__')
+
+    def __init__(self, cell):
+        self.cell = cell
+
+
+class _Timer:
+    """Observes elapsed seconds into a histogram; a context manager or a decorator"""
+
+    __slots__ = ('histogram', 'started')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started)
+
+    def __call__(self, func):
+        histogram = self.histogram
+
+        @wraps(func)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        return timed
+
+
+# ==================== SERIES ====================
+
+class _CounterSeries:
+    def __init__(self, metric):
+        self._cells = _Cells(1)
+
+    def inc(self, amount=1):
+        self._cells.cell()[0] += amount
+
+    def samples(self, name, labels):
+        return [(name + '_total', labels, self._cells.totals()[0])]
+
+
+class _GaugeSeries:
+    def __init__(self, metric):
+        self._value = 0.0
+        self._cells = _Cells(1)
+        self._function = None
+
+    def set(self, value):
+        with self._cells._lock:
+            self._cells.reset()
+            self._value = value
+
+    def inc(self, amount=1):
+        self._cells.cell()[0] += amount
+
+    def dec(self, amount=1):
+        self._cells.cell()[0] -= amount
+
+    def set_function(self, function):
+        """Read the value from `function` at scrape time (free on the hot path)"""
+        self._function = function
+
+    def value(self):
+        if self._function is not None:
+            return float(self._function())
+        return self._value + self._cells.totals()[0]
+
+    def samples(self, name, labels):
+        return [(name, labels, self.value())]
+
+
+class _HistogramSeries:
+    def __init__(self, metric):
+        self.buckets = metric.buckets
+        # One count per bucket, one for +Inf, then the sum
+        self._cells = _Cells(len(self.buckets) + 2)
+
+    def observe(self, value):
+        cell = self._cells.cell()
+        cell[bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def time(self):
+        """Time a block (`with`) or a function (decorator)"""
+        return _Timer(self)
+
+    def samples(self, name, labels):
+        totals = self._cells.totals()
+        samples, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float('inf'),), totals[:-1]):
+            cumulative += count
+            samples.append((name + '_bucket', labels + (('le', _format_bound(bound)),), cumulative))
+        samples.append((name + '_sum', labels, totals[-1]))
+        samples.append((name + '_count', labels, cumulative))
+        return samples
+
+
+# ==================== METRICS ====================
+
+class _Metric:
+    """A named metric; with label names, each label combination is its own series"""
+
+    kind = None
+    series_class = None
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}           # label values as strings -> series
+        self._lookup = {}           # label values as passed -> series (skips str() on the hot path)
+        self._lock = threading.Lock()
+        self._default = None if self.labelnames else self.labels()
+
+    def labels(self, *values, **labels):
+        """The series for one label combination (created on first use)"""
+        if labels:
+            values = tuple(labels[name] for name in self.labelnames)
+        series = self._lookup.get(values)
+        if series is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            key = tuple(str(value) for value in values)
+            with self._lock:
+                series = self._series.setdefault(key, self.series_class(self))
+                self._lookup[values] = series
+        return series
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, series in list(self._series.items()):
+            labels = tuple(zip(self.labelnames, key))
+            for name, sample_labels, value in series.samples(self.name, labels):
+                lines.append(f"{name}{_format_labels(sample_labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonic count (exposed with a _total suffix)"""
+
+    kind = 'counter'
+    series_class = _CounterSeries
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, or is read from a callback at scrape time"""
+
+    kind = 'gauge'
+    series_class = _GaugeSeries
+
+    def set(self, value):
+        self._default.set(value)
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+    def dec(self, amount=1):
+        self._default.dec(amount)
+
+    def set_function(self, function):
+        self._default.set_function(function)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets"""
+
+    kind = 'histogram'
+    series_class = _HistogramSeries
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+
+class MetricsRegistry:
+    """Named metrics of one process; get-or-create so modules can declare what they use"""
+
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, metric_class, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = metric_class(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, metric_class) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered with a different type or labels")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in list(self.metrics.values()):
+            try:
+                lines.extend(metric.collect())
+            except Exception as e:
+                logging.getLogger(__name__).error(f"Error collecting metric {metric.name}: {e}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+
+def counter(name, documentation, labelnames=()):
+    return REGISTRY.counter(name, documentation, labelnames)
+
+
+def gauge(name, documentation, labelnames=()):
+    return REGISTRY.gauge(name, documentation, labelnames)
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.histogram(name, documentation, labelnames, buckets)
+
+
+# ==================== EXPOSITION ====================
+
+def metrics_response(registry=REGISTRY):
+    """(body, status, headers) for a Flask /metrics route"""
+    return registry.render(), 200, {'Content-Type': CONTENT_TYPE}
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port, host='0.0.0.0', registry=REGISTRY):
+    """
+    Serve /metrics from a background thread (for processes without a web server)
+
+    Returns:
+        ThreadingHTTPServer (call shutdown() to stop it)
+    """
+    handler = type('MetricsHandler', (_MetricsHandler,), {'registry': registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    logging.getLogger(__name__).info(f"✓ Metrics served at http://{host}:{server.server_port}/metrics")
+    return server
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (f'{name}="{_escape(value)}"' for name, value in labels)
+    return '{' + ','.join(escaped) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if value == float('-inf'):
+        return '-Inf'
+    return repr(float(value))
@@ -0,0 +1,310 @@
+"""
+Notification Dispatcher
+Background delivery of notifications with rate limits, retries and digests
+"""
+
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from datetime import datetime
+from utils.rate_limit import TokenBucket
+
+
+# Lower value = more important
+PRIORITY_CRITICAL = 0
+PRIORITY_HIGH = 1
+PRIORITY_NORMAL = 2
+PRIORITY_LOW = 3
+
+# Telegram rejects messages longer than this
+MAX_MESSAGE_LENGTH = 4096
+
+
+def compose_digest(notifications):
+    """
+    Merge notifications into one message
+
+    Args:
+        notifications: Notification objects
+
+    Returns:
+        tuple: (title, message); a single notification is returned unchanged
+    """
+    if len(notifications) == 1:
+        return notifications[0].title, notifications[0].message
+
+    notifications = sorted(notifications, key=lambda n: n.created)
+    title = f"📦 {len(notifications)} notifications"
+    message = '\n\n'.join(
+        f"{n.title} ({datetime.fromtimestamp(n.created).strftime('%H:%M:%S')})\n{n.message}"
+        for n in notifications
+    )
+    if len(message) > MAX_MESSAGE_LENGTH - 200:
+        message = message[:MAX_MESSAGE_LENGTH - 200] + '\n…'
+    return title, message
+
+
+class Notification:
+    """A queued notification"""
+
+    __slots__ = ('title', 'message', 'priority', 'created', 'attempts')
+
+    def __init__(self, title, message, priority=PRIORITY_NORMAL):
+        self.title = title
+        self.message = message
+        self.priority = priority
+        self.created = time.time()
+        self.attempts = 0
+
+
+class _Channel:
+    """Queue, rate limiter and worker thread for one delivery channel"""
+
+    def __init__(self, name, send, rate, burst, max_queue):
+        self.name = name
+        self.send = send
+        self.bucket = TokenBucket(rate, burst)
+        self.max_queue = max_queue
+
+        self.ready = []     # heap of (priority, seq, notification)
+        self.delayed = []   # heap of (not_before, seq, notification) awaiting retry
+        self.in_flight = 0
+        self.condition = threading.Condition()
+        self.thread = None
+
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.digests = 0
+
+
+class NotificationDispatcher:
+    """
+    Delivers notifications off the trading thread
+
+    Each channel (Telegram, email, ...) gets its own bounded priority queue
+    and worker, so a slow or unreachable API never blocks callers or other
+    channels. Workers respect a per-channel token bucket; when messages
+    back up behind the limit they are merged into one digest message.
+    Failed sends are retried with exponential backoff. When a queue is
+    full the least important message is dropped.
+    """
+
+    def __init__(self, max_queue=500, max_retries=5, base_backoff=1.0, max_backoff=60.0,
+                 coalesce_window=0.25, max_digest=20):
+        """
+        Args:
+            max_queue: Maximum queued notifications per channel
+            max_retries: Delivery attempts before a notification is discarded
+            base_backoff: Initial retry delay in seconds (doubles per attempt)
+            max_backoff: Maximum retry delay in seconds
+            coalesce_window: Seconds to wait for a burst to accumulate before sending
+            max_digest: Maximum notifications merged into one digest
+        """
+        self.logger = logging.getLogger(__name__)
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.coalesce_window = coalesce_window
+        self.max_digest = max_digest
+
+        self.channels = {}
+        self._seq = itertools.count()
+        self._stopped = False
+
+    def register_channel(self, name, send, rate=1.0, burst=1):
+        """
+        Register a delivery channel and start its worker
+
+        Args:
+            name: Channel name
+            send: Callable(title, message) that delivers or raises
+            rate: Sustained sends per second
+            burst: Sends allowed back-to-back before rate limiting applies
+        """
+        channel = _Channel(name, send, rate, burst, self.max_queue)
+        channel.thread = threading.Thread(
+            target=self._run, args=(channel,), name=f'notify-{name}', daemon=True
+        )
+        self.channels[name] = channel
+        channel.thread.start()
+
+    def submit(self, title, message, priority=PRIORITY_NORMAL, channels=None):
+        """
+        Queue a notification; never blocks
+
+        Args:
+            title: Notification title
+            message: Notification body
+            priority: PRIORITY_* constant
+            channels: Channel names (defaults to all)
+
+        Returns:
+            bool: True if queued on every target channel
+        """
+        queued = True
+        for name in channels or list(self.channels):
+            channel = self.channels.get(name)
+            if channel is None:
+                continue
+            queued &= self._enqueue(channel, Notification(title, message, priority))
+        return queued
+
+    def _enqueue(self, channel, notification):
+        with channel.condition:
+            if len(channel.ready) + len(channel.delayed) >= channel.max_queue:
+                # Evict the least important queued message if the new one outranks it
+                worst = max(channel.ready) if channel.ready else None
+                if worst is None or worst[0] <= notification.priority:
+                    channel.dropped += 1
+                    self.logger.warning(f"Notification queue full on {channel.name}, dropped: {notification.title}")
+                    return False
+                channel.ready.remove(worst)
+                heapq.heapify(channel.ready)
+                channel.dropped += 1
+                self.logger.warning(f"Notification queue full on {channel.name}, dropped: {worst[2].title}")
+
+            heapq.heappush(channel.ready, (notification.priority, next(self._seq), notification))
+            channel.condition.notify()
+        return True
+
+    # ==================== WORKER ====================
+
+    def _run(self, channel):
+        while True:
+            batch = self._next_batch(channel)
+            if batch is None:
+                return
+
+            # Messages that pile up while we wait for a token join the digest
+            channel.bucket.acquire()
+            batch.extend(self._drain(channel, self.max_digest - len(batch)))
+
+            title, message = compose_digest(batch)
+            try:
+                channel.send(title, message)
+                channel.sent += len(batch)
+                if len(batch) > 1:
+                    channel.digests += 1
+            except Exception as e:
+                self._retry(channel, batch, e)
+            finally:
+                with channel.condition:
+                    channel.in_flight = 0
+                    channel.condition.notify_all()
+
+    def _next_batch(self, channel):
+        """Wait for work and take the first burst (None once stopped and drained)"""
+        with channel.condition:
+            while True:
+                self._promote_due(channel)
+                if channel.ready:
+                    break
+                if self._stopped and not channel.delayed:
+                    return None
+                timeout = channel.delayed[0][0] - time.monotonic() if channel.delayed else None
+                channel.condition.wait(timeout)
+
+            first = heapq.heappop(channel.ready)[2]
+            channel.in_flight = 1
+
+        # Give a burst a moment to arrive so it goes out as one message
+        if self.coalesce_window > 0 and not self._stopped:
+            time.sleep(self.coalesce_window)
+        return [first] + self._drain(channel, self.max_digest - 1)
+
+    def _drain(self, channel, limit):
+        """Take up to `limit` more ready notifications, most important first"""
+        taken = []
+        with channel.condition:
+            self._promote_due(channel)
+            while channel.ready and len(taken) < limit:
+                taken.append(heapq.heappop(channel.ready)[2])
+            channel.in_flight += len(taken)
+        return taken
+
+    def _promote_due(self, channel):
+        """Move retries whose backoff has elapsed back to the ready queue (caller holds the lock)"""
+        now = time.monotonic()
+        while channel.delayed and channel.delayed[0][0] <= now:
+            notification = heapq.heappop(channel.delayed)[2]
+            heapq.heappush(channel.ready, (notification.priority, next(self._seq), notification))
+
+    def _retry(self, channel, batch, error):
+        """Schedule a failed batch for another attempt"""
+        # Honour the server's flood-wait hint when given (Telegram RetryAfter)
+        retry_after = getattr(error, 'retry_after', None)
+        if hasattr(retry_after, 'total_seconds'):
+            retry_after = retry_after.total_seconds()
+
+        with channel.condition:
+            for notification in batch:
+                notification.attempts += 1
+                if notification.attempts >= self.max_retries:
+                    channel.failed += 1
+                    self.logger.error(f"{channel.name} notification failed after {notification.attempts} attempts: {error}")
+                    continue
+
+                delay = retry_after
+                if delay is None:
+                    delay = min(self.max_backoff, self.base_backoff * 2 ** (notification.attempts - 1))
+                    delay *= random.uniform(0.8, 1.2)
+                heapq.heappush(channel.delayed, (time.monotonic() + float(delay), next(self._seq), notification))
+
+        self.logger.warning(f"{channel.name} send failed, retrying {len(batch)} notification(s): {error}")
+
+    # ==================== LIFECYCLE ====================
+
+    def pending(self):
+        """Number of notifications queued or in flight, per channel"""
+        pending = {}
+        for name, channel in self.channels.items():
+            with channel.condition:
+                pending[name] = len(channel.ready) + len(channel.delayed) + channel.in_flight
+        return pending
+
+    def get_stats(self):
+        """Delivery counters per channel"""
+        return {
+            name: {
+                'sent': channel.sent,
+                'failed': channel.failed,
+                'dropped': channel.dropped,
+                'digests': channel.digests,
+                'queued': len(channel.ready) + len(channel.delayed)
+            }
+            for name, channel in self.channels.items()
+        }
+
+    def flush(self, timeout=10.0):
+        """
+        Wait until queued notifications are delivered (retries included)
+
+        Returns:
+            bool: True if everything was delivered within the timeout
+        """
+        deadline = time.monotonic() + timeout
+        for channel in self.channels.values():
+            with channel.condition:
+                while channel.ready or channel.delayed or channel.in_flight:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    channel.condition.wait(min(remaining, 0.1))
+        return True
+
+    def stop(self, timeout=10.0):
+        """Deliver what can be delivered within `timeout`, then stop the workers"""
+        self.flush(timeout)
+        self._stopped = True
+        for channel in self.channels.values():
+            with channel.condition:
+                # Abandon retries still backing off
+                channel.delayed.clear()
+                channel.condition.notify_all()
+        for channel in self.channels.values():
+            channel.thread.join(1.0)
@@ -3,8 +3,11 @@ Notification Manager
 Send alerts via Telegram and Email
 """
 
+import asyncio
+import inspect
 import logging
 from datetime import datetime
+from utils.notification_dispatcher import NotificationDispatcher, PRIORITY_NORMAL, PRIORITY_HIGH
 
 try:
     from telegram import Bot
@@ -13,12 +16,47 @@ except ImportError:
     TELEGRAM_AVAILABLE = False
 
 
+def format_trade_alert(trade):
+    """Title and message for a newly opened trade"""
+    title = f"🎯 New {trade['action'].upper()} Trade"
+    message = (
+        f"Pair: {trade['pair']}\n"
+        f"Price: ${trade['entry_price']:.2f}\n"
+        f"Size: {trade['size']:.4f}\n"
+        f"Strategy: {trade['strategy']}"
+    )
+    return title, message
+
+
+def format_close_alert(trade):
+    """Title and message for a closed trade"""
+    emoji = "💰" if trade['pnl'] > 0 else "📉"
+    title = f"{emoji} Trade Closed"
+    message = (
+        f"Pair: {trade['pair']}\n"
+        f"Entry: ${trade['entry_price']:.2f}\n"
+        f"Exit: ${trade['exit_price']:.2f}\n"
+        f"P&L: ${trade['pnl']:.2f} ({trade['pnl_percent']:.2f}%)\n"
+        f"Reason: {trade.get('close_reason', 'manual')}"
+    )
+    return title, message
+
+
 class NotificationManager:
     """Manage trading notifications"""
     
     def __init__(self, config):
         self.config = config
         self.logger = logging.getLogger(__name__)
+        self._telegram_loop = None
+        
+        # Deliveries happen on background workers, never on the caller's thread
+        notifications_config = config['notifications']
+        self.dispatcher = NotificationDispatcher(
+            max_queue=notifications_config.get('queue_size', 500),
+            max_retries=notifications_config.get('max_retries', 5),
+            coalesce_window=notifications_config.get('digest_window', 0.25)
+        )
         
         # Initialize Telegram
         self.telegram_enabled = config['notifications']['telegram']['enabled']
@@ -30,6 +68,8 @@ class NotificationManager:
         
         # Email notifications (TODO)
         self.email_enabled = config['notifications']['email']['enabled']
+        if self.email_enabled:
+            self.dispatcher.register_channel('email', self._send_email, rate=1.0, burst=5)
     
     def _init_telegram(self):
         """Initialize Telegram bot"""
@@ -37,43 +77,45 @@ class NotificationManager:
             bot_token = self.config['notifications']['telegram']['bot_token']
             self.chat_id = self.config['notifications']['telegram']['chat_id']
             self.bot = Bot(token=bot_token)
+            
+            # Telegram allows about one message per second per chat
+            rate = self.config['notifications']['telegram'].get('rate_limit', 1.0)
+            self.dispatcher.register_channel('telegram', self._send_telegram, rate=rate, burst=3)
             self.logger.info("✓ Telegram notifications enabled")
         except Exception as e:
             self.logger.error(f"Failed to initialize Telegram: {e}")
             self.telegram_enabled = False
     
-    def send_notification(self, title, message):
+    def send_notification(self, title, message, priority=PRIORITY_NORMAL):
         """
-        Send a notification
+        Queue a notification for delivery; returns immediately
         
         Args:
             title: Notification title
             message: Notification message
+            priority: Dispatcher priority (low-priority messages are dropped first under load)
         """
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        full_message = f"**{title}**\n{message}\n\n_{timestamp}_"
-        
         # Log locally
         self.logger.info(f"📬 Notification: {title} - {message}")
         
-        # Send via Telegram
-        if self.telegram_enabled:
-            self._send_telegram(full_message)
-        
-        # Send via Email
-        if self.email_enabled:
-            self._send_email(title, message)
+        self.dispatcher.submit(title, message, priority)
     
-    def _send_telegram(self, message):
-        """Send message via Telegram"""
-        try:
-            self.bot.send_message(
-                chat_id=self.chat_id,
-                text=message,
-                parse_mode='Markdown'
-            )
-        except Exception as e:
-            self.logger.error(f"Telegram send error: {e}")
+    def _send_telegram(self, title, message):
+        """Send message via Telegram (runs on the dispatcher worker; raises to trigger a retry)"""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        full_message = f"**{title}**\n{message}\n\n_{timestamp}_"
+        
+        result = self.bot.send_message(
+            chat_id=self.chat_id,
+            text=full_message,
+            parse_mode='Markdown'
+        )
+        
+        # python-telegram-bot 20+ returns a coroutine
+        if inspect.isawaitable(result):
+            if self._telegram_loop is None:
+                self._telegram_loop = asyncio.new_event_loop()
+            self._telegram_loop.run_until_complete(result)
     
     def _send_email(self, subject, body):
         """Send email notification (TODO)"""
@@ -82,31 +124,15 @@ class NotificationManager:
     
     def send_trade_alert(self, trade):
         """Send alert for a new trade"""
-        title = f"🎯 New {trade['action'].upper()} Trade"
-        message = (
-            f"Pair: {trade['pair']}\n"
-            f"Price: ${trade['entry_price']:.2f}\n"
-            f"Size: {trade['size']:.4f}\n"
-            f"Strategy: {trade['strategy']}"
-        )
-        self.send_notification(title, message)
+        self.send_notification(*format_trade_alert(trade))
     
     def send_close_alert(self, trade):
         """Send alert for a closed trade"""
-        emoji = "💰" if trade['pnl'] > 0 else "📉"
-        title = f"{emoji} Trade Closed"
-        message = (
-            f"Pair: {trade['pair']}\n"
-            f"Entry: ${trade['entry_price']:.2f}\n"
-            f"Exit: ${trade['exit_price']:.2f}\n"
-            f"P&L: ${trade['pnl']:.2f} ({trade['pnl_percent']:.2f}%)\n"
-            f"Reason: {trade.get('close_reason', 'manual')}"
-        )
-        self.send_notification(title, message)
+        self.send_notification(*format_close_alert(trade))
     
     def send_error_alert(self, error_message):
         """Send alert for errors"""
-        self.send_notification("⚠️ Trading Bot Error", error_message)
+        self.send_notification("⚠️ Trading Bot Error", error_message, PRIORITY_HIGH)
     
     def send_daily_summary(self, stats):
         """Send daily performance summary"""
@@ -118,3 +144,9 @@ class NotificationManager:
             f"Open Positions: {stats.get('open_positions', 0)}"
         )
         self.send_notification(title, message)
+    
+    def close(self, timeout=10.0):
+        """Deliver queued notifications (up to `timeout` seconds) and stop the workers"""
+        self.dispatcher.stop(timeout)
+        if self._telegram_loop is not None:
+            self._telegram_loop.close()
@@ -0,0 +1,110 @@
+"""
+Response Cache
+Caches rendered JSON responses per user and query, with strong ETags and 304 replies
+"""
+
+import hashlib
+import logging
+import threading
+from functools import wraps
+from flask import current_app, make_response, request
+from utils.cache import TTLCache
+from utils.event_bus import (
+    TRADE_UPDATE, USER_REGISTERED, SUBSCRIPTION_CHANGED, PAYMENT_RECEIVED, TRADING_TOGGLED
+)
+
+
+class ResponseCache:
+    """
+    Cache for read-heavy JSON endpoints
+
+    Keys combine the endpoint, the caller and the query string with an
+    invalidation generation. Bumping a generation makes every older entry
+    unreachable in O(1); stale entries then age out of the LRU.
+    """
+
+    def __init__(self, max_size=10000, ttl=60, event_bus=None, engine_events=None):
+        """
+        Args:
+            max_size: Maximum cached responses
+            ttl: Upper bound in seconds on how stale a response may get
+            event_bus: Optional EventBus; trade and platform events invalidate affected entries
+            engine_events: Optional EventBus carrying the trading engine's events from
+                           its own process (see services.event_bridge)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.cache = TTLCache(max_size=max_size, ttl=ttl)
+
+        self._user_generations = {}
+        self._global_generation = 0
+        self._lock = threading.Lock()
+
+        if engine_events is not None:
+            engine_events.subscribe(TRADE_UPDATE, self._on_trade_event)
+        if event_bus is not None:
+            event_bus.subscribe(TRADE_UPDATE, self._on_trade_event)
+            for event_type in (USER_REGISTERED, SUBSCRIPTION_CHANGED, PAYMENT_RECEIVED, TRADING_TOGGLED):
+                event_bus.subscribe(event_type, self._on_platform_event)
+
+    def _on_trade_event(self, event_type, payload):
+        self.invalidate_user(payload.get('user_id'))
+
+    def _on_platform_event(self, event_type, payload):
+        # Platform-wide views only; per-user trade views are unaffected
+        with self._lock:
+            self._global_generation += 1
+
+    def invalidate_user(self, user_id):
+        """Invalidate one user's responses and every platform-wide response"""
+        with self._lock:
+            if user_id is not None:
+                user_id = str(user_id)
+                self._user_generations[user_id] = self._user_generations.get(user_id, 0) + 1
+            self._global_generation += 1
+
+    def invalidate_all(self):
+        """Drop every cached response"""
+        self.cache.clear()
+
+    def cached(self, user_key=None, invalidate_on='user'):
+        """
+        Decorator caching a view's 200 responses
+
+        Args:
+            user_key: Callable returning the caller's id (e.g. get_jwt_identity), or None
+            invalidate_on: 'user' to refresh on the caller's own trades,
+                           'any' to refresh on any trade (platform-wide views)
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                user_id = str(user_key()) if user_key else None
+
+                if invalidate_on == 'any':
+                    generation = self._global_generation
+                else:
+                    generation = self._user_generations.get(user_id, 0)
+
+                key = (request.endpoint, user_id, generation, request.query_string)
+                entry = self.cache.get(key)
+
+                if entry is None:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+
+                    body = response.get_data()
+                    etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+                    entry = (body, response.mimetype, etag)
+                    self.cache.set(key, entry)
+
+                body, mimetype, etag = entry
+                response = current_app.response_class(body, mimetype=mimetype)
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = 'private, no-cache'
+
+                # Answers If-None-Match with 304 Not Modified
+                return response.make_conditional(request)
+
+            return wrapper
+        return decorator
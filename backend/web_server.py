@@ -3,18 +3,72 @@ Web Server for Trading Bot Dashboard
 Serves the frontend and provides API endpoints
 """
 
-from flask import Flask, render_template, jsonify, send_from_directory
+from flask import Flask, Response, render_template, jsonify, request, send_from_directory, stream_with_context
 from flask_cors import CORS
 import os
+import time
 import webbrowser
 import threading
+from datetime import datetime, timedelta
 from pathlib import Path
+import numpy as np
+from database.db_manager import DatabaseManager
+from engines.state_snapshot import StateSnapshotReader, DEFAULT_SEGMENT
+from utils.downsample import downsample
+from utils.response_cache import ResponseCache
 
 app = Flask(__name__, 
             static_folder='../frontend',
             template_folder='../frontend')
 CORS(app)
 
+# Live state published by the running bot (see engines/state_snapshot.py)
+snapshot = StateSnapshotReader(DEFAULT_SEGMENT)
+
+# Stored equity series; opened by start_dashboard
+db_manager = None
+
+# Equity samples arrive about once a minute, so chart data can be reused briefly
+response_cache = ResponseCache(max_size=256, ttl=30)
+
+EQUITY_PERIODS = {
+    '24h': timedelta(days=1),
+    '7d': timedelta(days=7),
+    '30d': timedelta(days=30),
+    'day': timedelta(days=1),
+    'week': timedelta(days=7),
+    'month': timedelta(days=30),
+    'all': None
+}
+
+# Served while no bot is running
+OFFLINE_STATE = {
+    'status': {'running': False, 'mode': None, 'balance': 0, 'equity': 0, 'open_positions': 0},
+    'performance': {'total_pnl': 0, 'unrealized_pnl': 0, 'win_rate': 0, 'winning_trades': 0,
+                    'total_trades': 0, 'sharpe_ratio': 0},
+    'positions': [],
+    'trades': [],
+    'strategies': {}
+}
+
+
+def _snapshot_response(section, key=None):
+    """
+    Serve one section of the bot snapshot
+
+    The snapshot sequence number is the ETag, so polling clients get
+    304 Not Modified until the bot publishes new state.
+    """
+    seq, _ = snapshot.read_raw()
+    state = snapshot.read() or OFFLINE_STATE
+    
+    body = state[section]
+    response = jsonify({key: body} if key else body)
+    response.headers['Cache-Control'] = 'no-cache'
+    if seq is not None:
+        response.set_etag(f'{seq}-{section}')
+    return response.make_conditional(request)
+
 
 @app.route('/')
 def index():
@@ -31,41 +85,105 @@ def serve_static(path):
 @app.route('/api/status')
 def get_status():
     """Get bot status"""
-    return jsonify({
-        'running': True,
-        'mode': 'paper',
-        'balance': 10000,
-        'open_positions': 2
-    })
+    return _snapshot_response('status')
 
 
 @app.route('/api/performance')
 def get_performance():
     """Get performance metrics"""
-    return jsonify({
-        'total_pnl': 450.25,
-        'win_rate': 65.5,
-        'total_trades': 42,
-        'sharpe_ratio': 1.85
-    })
+    return _snapshot_response('performance')
 
 
 @app.route('/api/positions')
 def get_positions():
     """Get open positions"""
-    return jsonify({
-        'positions': []
-    })
+    return _snapshot_response('positions', 'positions')
 
 
 @app.route('/api/trades')
 def get_trades():
     """Get trade history"""
+    return _snapshot_response('trades', 'trades')
+
+
+@app.route('/api/equity')
+@response_cache.cached()
+def get_equity_curve():
+    """
+    Get the equity curve downsampled for a chart
+    
+    Query args: period (24h/day, 7d/week, 30d/month, all), width (chart
+    width in pixels, one point per pixel) and method (lttb or minmax).
+    """
+    period = request.args.get('period', '24h')
+    method = request.args.get('method', 'lttb')
+    width = min(max(request.args.get('width', 800, type=int), 10), 4000)
+    
+    if period not in EQUITY_PERIODS:
+        return jsonify({'error': f'Unknown period: {period}'}), 400
+    if method not in ('lttb', 'minmax'):
+        return jsonify({'error': f'Unknown method: {method}'}), 400
+    if db_manager is None:
+        return jsonify({'error': 'Equity history not available'}), 503
+    
+    since = datetime.utcnow() - EQUITY_PERIODS[period] if EQUITY_PERIODS[period] else None
+    timestamps, equity = db_manager.get_equity_history(since)
+    
+    t, y = [], []
+    if timestamps:
+        epoch_ms = np.array(timestamps, dtype='datetime64[ms]').astype(np.int64)
+        t, y = downsample(epoch_ms, equity, width, method)
+        t, y = t.astype(np.int64).tolist(), np.round(y, 2).tolist()
+    
     return jsonify({
-        'trades': []
+        'period': period,
+        'method': method,
+        'total_points': len(timestamps),
+        't': t,
+        'equity': y
     })
 
 
+@app.route('/api/stream')
+def stream_state():
+    """
+    Server-sent events stream of the full bot snapshot
+    
+    Each event carries the snapshot JSON exactly as the bot published it,
+    sent only when it changes. Query args: interval (seconds between checks).
+    """
+    interval = min(max(request.args.get('interval', 0.1, type=float), 0.05), 5.0)
+    heartbeat = 15.0
+    
+    def events():
+        reader = StateSnapshotReader(snapshot.name)
+        last_seq = None
+        last_sent = time.monotonic()
+        
+        yield b'retry: 2000\n\n'
+        while True:
+            seq, data = reader.read_raw()
+            if data is None and last_seq is not None:
+                # Bot went away; tell the client once
+                last_seq = None
+                yield b'event: offline\ndata: {}\n\n'
+                last_sent = time.monotonic()
+            elif data is not None and seq != last_seq:
+                last_seq = seq
+                yield b'id: %d\ndata: %s\n\n' % (seq, data)
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent > heartbeat:
+                yield b': keepalive\n\n'
+                last_sent = time.monotonic()
+            time.sleep(interval)
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 def start_dashboard(config, port=8080):
     """
     Start the web dashboard
@@ -74,6 +192,9 @@ def start_dashboard(config, port=8080):
         config: Bot configuration
         port: Port to run on
     """
+    global db_manager
+    db_manager = DatabaseManager(config)
+    
     host = config['dashboard']['host']
     auto_open = config['dashboard'].get('auto_open', True)
     
@@ -86,7 +207,7 @@ def start_dashboard(config, port=8080):
         threading.Timer(1.5, lambda: webbrowser.open(f'http://{host}:{port}')).start()
     
     # Run Flask app
-    app.run(host=host, port=port, debug=False)
+    app.run(host=host, port=port, debug=False, threaded=True)
 
 
 if __name__ == '__main__':
@@ -19,12 +19,37 @@ let botState = {
 };
 
 let equityChart = null;
+let chartPeriod = '24h';
+let chartPointSpacing = 1000;
+
+const CHART_PERIOD_MS = {
+    '24h': 24 * 3600000,
+    '7d': 7 * 24 * 3600000,
+    '30d': 30 * 24 * 3600000
+};
+
+// === REAL-TIME CONFIG ===
+const REALTIME_CONFIG = {
+    url: window.TRADING_API_URL || 'http://localhost:5000',
+    userId: window.TRADING_USER_ID || null,
+    token: window.TRADING_API_TOKEN || null
+};
+
+let stateStream = null;
+let lastEquityPointAt = 0;
+
+let socket = null;
+let livePositions = {};
+let liveTrades = [];
+let unrealizedByPair = {};
 
 // === INITIALIZATION ===
 document.addEventListener('DOMContentLoaded', () => {
     initializeCharts();
     initializeEventListeners();
-    loadMockData();
+    loadDashboardState();
+    connectStateStream();
+    connectRealtime();
     startDataRefresh();
     loadStrategies();
     loadMarketData();
@@ -178,49 +203,54 @@ function saveSettings() {
 }
 
 // === DATA LOADING ===
-function loadMockData() {
-    // Generate mock equity curve
-    const now = Date.now();
-    const points = 50;
-    const labels = [];
-    const data = [];
-    let balance = 10000;
-
-    for (let i = 0; i < points; i++) {
-        const date = new Date(now - (points - i) * 3600000);
-        labels.push(date.toLocaleTimeString());
-
-        // Random walk with slight upward bias
-        balance += (Math.random() - 0.45) * 100;
-        data.push(Math.round(balance * 100) / 100);
-    }
+function loadDashboardState() {
+    // One-off fetch; the state stream takes over once connected
+    updateLiveData();
+    updateChartPeriod(chartPeriod);
+}
 
-    equityChart.data.labels = labels;
-    equityChart.data.datasets[0].data = data;
-    equityChart.update('none');
+function applySnapshot(state) {
+    botState.running = state.status.running;
+    botState.mode = state.status.mode || botState.mode;
+    botState.balance = state.status.balance;
+    botState.openPositions = state.positions;
+    botState.trades = state.trades;
+    botState.performance = {
+        totalPnl: state.performance.total_pnl,
+        winRate: state.performance.win_rate,
+        winningTrades: state.performance.winning_trades,
+        totalTrades: state.performance.total_trades,
+        sharpeRatio: state.performance.sharpe_ratio
+    };
 
-    // Update balance
-    botState.balance = data[data.length - 1];
     updatePerformanceMetrics();
+    renderPositions(state.positions.map(toPositionView));
+    renderTrades(state.trades.slice(0, 20).map(toTradeView));
+    document.getElementById('tradingMode').textContent = botState.mode.toUpperCase();
+
+    const statusBadge = document.getElementById('botStatus');
+    statusBadge.innerHTML = botState.running ? '<span class="pulse"></span> Active' : '⏸️ Paused';
+    statusBadge.classList.toggle('active', botState.running);
+
+    if (state.status.running) {
+        pushEquityPoint(state.status.equity);
+    }
 }
 
 function updatePerformanceMetrics() {
-    // Generate mock performance data
-    const totalTrades = Math.floor(Math.random() * 50) + 10;
-    const winningTrades = Math.floor(totalTrades * (0.55 + Math.random() * 0.15));
-    const totalPnl = (botState.balance - 10000);
-    const winRate = (winningTrades / totalTrades) * 100;
-    const sharpeRatio = 1.2 + Math.random() * 0.8;
+    const performance = botState.performance;
+    const totalPnl = performance.totalPnl;
+    const startingBalance = botState.balance - totalPnl;
 
     // Update DOM
     document.getElementById('currentBalance').textContent = '$' + botState.balance.toLocaleString('en-US', { minimumFractionDigits: 2, maximumFractionDigits: 2 });
     document.getElementById('totalPnl').textContent = (totalPnl >= 0 ? '+' : '') + '$' + totalPnl.toLocaleString('en-US', { minimumFractionDigits: 2 });
-    document.getElementById('pnlChange').textContent = (totalPnl >= 0 ? '+' : '') + ((totalPnl / 10000) * 100).toFixed(2) + '%';
-    document.getElementById('winRate').textContent = winRate.toFixed(1) + '%';
-    document.getElementById('winRateDetail').textContent = `${winningTrades}/${totalTrades} trades`;
-    document.getElementById('totalTrades').textContent = totalTrades;
-    document.getElementById('tradesDetail').textContent = `${Math.floor(Math.random() * 3)} open positions`;
-    document.getElementById('sharpeRatio').textContent = sharpeRatio.toFixed(2);
+    document.getElementById('pnlChange').textContent = (totalPnl >= 0 ? '+' : '') + (startingBalance ? (totalPnl / startingBalance) * 100 : 0).toFixed(2) + '%';
+    document.getElementById('winRate').textContent = performance.winRate.toFixed(1) + '%';
+    document.getElementById('winRateDetail').textContent = `${performance.winningTrades || 0}/${performance.totalTrades} trades`;
+    document.getElementById('totalTrades').textContent = performance.totalTrades;
+    document.getElementById('tradesDetail').textContent = `${botState.openPositions.length} open positions`;
+    document.getElementById('sharpeRatio').textContent = performance.sharpeRatio.toFixed(2);
 
     // Update colors
     const pnlElement = document.getElementById('totalPnl');
@@ -237,21 +267,21 @@ function updatePerformanceMetrics() {
     }
 }
 
-function loadActivePositions() {
+function renderPositions(positions) {
     const container = document.getElementById('activePositions');
-    const mockPositions = generateMockPositions();
 
-    if (mockPositions.length === 0) {
+    if (positions.length === 0) {
         container.innerHTML = `
             <div class="empty-state">
                 <div class="empty-icon">📭</div>
                 <p>No active positions</p>
             </div>
         `;
+        document.getElementById('activeCount').textContent = 0;
         return;
     }
 
-    container.innerHTML = mockPositions.map(position => `
+    container.innerHTML = positions.map(position => `
         <div class="position-card">
             <div style="display: flex; justify-content: space-between; align-items: start;">
                 <div>
@@ -277,14 +307,13 @@ function loadActivePositions() {
         </div>
     `).join('');
 
-    document.getElementById('activeCount').textContent = mockPositions.length;
+    document.getElementById('activeCount').textContent = positions.length;
 }
 
-function loadRecentTrades() {
+function renderTrades(trades) {
     const container = document.getElementById('recentTrades');
-    const mockTrades = generateMockTrades();
 
-    if (mockTrades.length === 0) {
+    if (trades.length === 0) {
         container.innerHTML = `
             <div class="empty-state">
                 <div class="empty-icon">📊</div>
@@ -294,7 +323,7 @@ function loadRecentTrades() {
         return;
     }
 
-    container.innerHTML = mockTrades.map(trade => `
+    container.innerHTML = trades.map(trade => `
         <div class="trade-card">
             <div style="display: flex; justify-content: space-between; align-items: start;">
                 <div>
@@ -384,47 +413,6 @@ function loadMarketData(market = 'crypto') {
     `).join('');
 }
 
-// === MOCK DATA GENERATORS ===
-function generateMockPositions() {
-    const pairs = ['BTC/USDT', 'ETH/USDT', 'EUR/USD'];
-    const strategies = ['RSI Mean Reversion', 'MACD Trend Following', 'MA Crossover'];
-    const positions = [];
-
-    for (let i = 0; i < Math.floor(Math.random() * 3); i++) {
-        const entry = 1000 + Math.random() * 500;
-        const current = entry + (Math.random() - 0.5) * 100;
-        positions.push({
-            pair: pairs[Math.floor(Math.random() * pairs.length)],
-            action: Math.random() > 0.5 ? 'buy' : 'sell',
-            strategy: strategies[Math.floor(Math.random() * strategies.length)],
-            entry: entry,
-            current: current,
-            pnl: current - entry
-        });
-    }
-
-    return positions;
-}
-
-function generateMockTrades() {
-    const pairs = ['BTC/USDT', 'ETH/USDT', 'SOL/USDT', 'EUR/USD', 'GBP/USD'];
-    const reasons = ['Take Profit', 'Stop Loss', 'Manual Close', 'Signal Exit'];
-    const trades = [];
-
-    for (let i = 0; i < 5; i++) {
-        const pnl = (Math.random() - 0.3) * 100;
-        trades.push({
-            pair: pairs[Math.floor(Math.random() * pairs.length)],
-            action: Math.random() > 0.5 ? 'buy' : 'sell',
-            time: `${Math.floor(Math.random() * 12) + 1}h ago`,
-            pnl: pnl,
-            reason: reasons[Math.floor(Math.random() * reasons.length)]
-        });
-    }
-
-    return trades;
-}
-
 // === NOTIFICATIONS ===
 function showNotification(message, type = 'info') {
     // Create notification element
@@ -452,43 +440,187 @@ function showNotification(message, type = 'info') {
     }, 3000);
 }
 
+// === REAL-TIME UPDATES ===
+function isRealtimeConnected() {
+    return (socket !== null && socket.connected) ||
+        (stateStream !== null && stateStream.readyState === EventSource.OPEN);
+}
+
+function connectStateStream() {
+    if (typeof EventSource === 'undefined') {
+        return;
+    }
+
+    // Full bot snapshots pushed by the dashboard server whenever they change
+    stateStream = new EventSource('/api/stream');
+
+    stateStream.onmessage = (event) => {
+        applySnapshot(JSON.parse(event.data));
+    };
+
+    stateStream.addEventListener('offline', () => {
+        botState.running = false;
+        document.getElementById('botStatus').innerHTML = '⏸️ Offline';
+        document.getElementById('botStatus').classList.remove('active');
+    });
+}
+
+function connectRealtime() {
+    if (typeof io === 'undefined' || !REALTIME_CONFIG.userId || !REALTIME_CONFIG.token) {
+        return;
+    }
+
+    socket = io(REALTIME_CONFIG.url, { transports: ['websocket'] });
+
+    socket.on('connect', () => {
+        socket.emit('join_user_room', { user_id: REALTIME_CONFIG.userId, token: REALTIME_CONFIG.token });
+    });
+
+    socket.on('trade_update', (data) => {
+        data.trades.forEach(trade => {
+            if (trade.status === 'open') {
+                livePositions[trade.id] = trade;
+            } else {
+                delete livePositions[trade.id];
+                liveTrades.unshift(trade);
+                // Realized now; drop the pair's unrealized P&L once its last position closes
+                if (!Object.values(livePositions).some(position => position.pair === trade.pair)) {
+                    delete unrealizedByPair[trade.pair];
+                }
+            }
+        });
+        liveTrades = liveTrades.slice(0, 20);
+
+        renderPositions(Object.values(livePositions).map(toPositionView));
+        renderTrades(liveTrades.map(toTradeView));
+    });
+
+    socket.on('position_update', (data) => {
+        data.positions.forEach(position => {
+            // Marks can trail a close; never resurrect a closed position
+            if (position.status === 'open') {
+                livePositions[position.id] = position;
+            }
+        });
+        renderPositions(Object.values(livePositions).map(toPositionView));
+    });
+
+    socket.on('pnl_update', (data) => {
+        data.pnl.forEach(update => {
+            if (update.open_positions === 0) {
+                delete unrealizedByPair[update.pair];
+            } else {
+                unrealizedByPair[update.pair] = update.unrealized_pnl;
+            }
+        });
+
+        const unrealized = Object.values(unrealizedByPair).reduce((sum, pnl) => sum + pnl, 0);
+        pushEquityPoint(botState.balance + unrealized);
+    });
+}
+
+function toPositionView(position) {
+    return {
+        pair: position.pair,
+        action: position.action,
+        strategy: position.strategy,
+        entry: position.entry_price,
+        current: position.current_price,
+        pnl: position.pnl || 0
+    };
+}
+
+function toTradeView(trade) {
+    const closedAt = trade.close_timestamp ? new Date(trade.close_timestamp) : new Date();
+    return {
+        pair: trade.pair,
+        action: trade.action,
+        time: closedAt.toLocaleTimeString(),
+        pnl: trade.pnl || 0,
+        reason: (trade.close_reason || 'manual').replace('_', ' ')
+    };
+}
+
+function pushEquityPoint(value) {
+    const labels = equityChart.data.labels;
+    const data = equityChart.data.datasets[0].data;
+
+    // Live updates arrive many times a second: move the last point until a
+    // new one is due at the loaded history's spacing
+    if (data.length > 0 && Date.now() - lastEquityPointAt < chartPointSpacing) {
+        data[data.length - 1] = value;
+    } else {
+        lastEquityPointAt = Date.now();
+        labels.push(formatChartLabel(lastEquityPointAt, chartPeriod));
+        data.push(value);
+    }
+
+    // Roughly one point per pixel
+    const maxPoints = Math.max(equityChart.canvas.clientWidth, 50);
+    while (labels.length > maxPoints) {
+        labels.shift();
+        data.shift();
+    }
+
+    equityChart.update('none');
+}
+
+function formatChartLabel(timestamp, period) {
+    const date = new Date(timestamp);
+    if (period === '24h') {
+        return date.toLocaleTimeString();
+    }
+    return date.toLocaleString([], { month: 'short', day: 'numeric', hour: '2-digit', minute: '2-digit' });
+}
+
 // === AUTO REFRESH ===
 function startDataRefresh() {
+    // Polling is only a fallback while the real-time connection is down
     setInterval(() => {
-        if (botState.running) {
+        if (!isRealtimeConnected()) {
             updateLiveData();
         }
     }, 5000); // Refresh every 5 seconds
 }
 
 function updateLiveData() {
-    // Simulate live updates
-    const currentBalance = parseFloat(document.getElementById('currentBalance').textContent.replace(/[$,]/g, ''));
-    const newBalance = currentBalance + (Math.random() - 0.48) * 50;
-
-    // Update equity chart
-    const newLabel = new Date().toLocaleTimeString();
-    equityChart.data.labels.push(newLabel);
-    equityChart.data.datasets[0].data.push(newBalance);
-
-    // Keep only last 50 points
-    if (equityChart.data.labels.length > 50) {
-        equityChart.data.labels.shift();
-        equityChart.data.datasets[0].data.shift();
-    }
-
-    equityChart.update('none');
-
-    // Update metrics
-    botState.balance = newBalance;
-    updatePerformanceMetrics();
-    loadActivePositions();
-    loadRecentTrades();
+    // Polling fallback: the same snapshot, one section per endpoint (ETag-validated)
+    const sections = ['status', 'performance', 'positions', 'trades'];
+
+    Promise.all(sections.map(section => fetch(`/api/${section}`).then(response => response.json())))
+        .then(([status, performance, positions, trades]) => {
+            applySnapshot({
+                status: status,
+                performance: performance,
+                positions: positions.positions,
+                trades: trades.trades
+            });
+        })
+        .catch(error => console.error('Failed to refresh dashboard:', error));
 }
 
 function updateChartPeriod(period) {
-    // Update chart based on selected period
-    console.log('Updating chart for period:', period);
+    // Server downsamples the stored equity series to the chart width
+    const width = Math.max(equityChart.canvas.clientWidth, 100);
+    chartPeriod = period;
+
+    fetch(`/api/equity?period=${period}&width=${width}`)
+        .then(response => response.json())
+        .then(series => {
+            if (period !== chartPeriod || !series.t) {
+                return;
+            }
+
+            const last = series.t.length ? series.t[series.t.length - 1] : 0;
+            const span = CHART_PERIOD_MS[period] || (series.t.length > 1 ? last - series.t[0] : 0);
+            chartPointSpacing = Math.max(1000, span / width);
+            lastEquityPointAt = last;
+
+            equityChart.data.labels = series.t.map(t => formatChartLabel(t, period));
+            equityChart.data.datasets[0].data = series.equity;
+            equityChart.update('none');
+        })
+        .catch(error => console.error('Failed to load equity curve:', error));
 }
 
 // === CSS ANIMATIONS ===
@@ -522,8 +654,4 @@ style.textContent = `
 `;
 document.head.appendChild(style);
 
-// Initialize positions and trades
-loadActivePositions();
-loadRecentTrades();
-
 console.log('🤖 Trading Bot Dashboard Initialized');